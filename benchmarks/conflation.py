@@ -0,0 +1,106 @@
+"""
+Benchmark: conflation of official and public facility records (spatial grid candidates + names on candidates only)
+    Synthetic official records, public copies with jittered coordinates and name variants, and records in one source only
+    Run from the repository root: python -m benchmarks.conflation [n_facilities]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.processing.conflation import get_conflated, get_name_keys, get_name_similarity
+
+COUNTRIES = ["ARG", "BOL", "BRA", "COL", "MEX", "PER"]
+PREFIXES  = ["Hospital", "Centro de Salud", "Clínica", "Puesto de Salud", "Posto de Saúde", "UBS"]
+WORDS     = ["San José", "Santa María", "Miraflores", "Los Andes", "La Esperanza", "Sagrado Corazón", "El Carmen",
+             "Vila Nova", "San Martín", "Belén", "Cristo Rey", "Santa Rosa", "La Paz", "Bom Jesus", "Nuestra Señora"]
+
+def get_facilities(n, seed = 0):
+    # Facilities clustered in cities, as in the official and public records
+    rng    = np.random.default_rng(seed)
+    cities = rng.uniform([-110, -50], [-35, 30], (max(n // 500, 1), 2))
+    city   = rng.integers(0, len(cities), n)
+    spread = rng.exponential(0.05, (n, 1))
+    lon, lat = (cities[city] + rng.normal(0, 1, (n, 2)) * spread).T
+    names  = (np.array(PREFIXES)[rng.integers(0, len(PREFIXES), n)] + " " + np.array(WORDS)[rng.integers(0, len(WORDS), n)] +
+              " " + pd.Series(rng.integers(1, 200, n)).astype(str).values)
+
+    return pd.DataFrame({"isoalpha3": np.array(COUNTRIES)[city % len(COUNTRIES)], "amenity": "hospital",
+                         "name": names, "lat": lat, "lon": lon, "truth": np.arange(n)})
+
+def get_sources(n, seed = 0):
+    # Official: 70% of facilities, public: 60% (half of them also official), copies within ~40 m, names rewritten
+    rng        = np.random.default_rng(seed)
+    facilities = get_facilities(n, seed)
+
+    official = facilities[rng.random(n) < 0.7].reset_index(drop = True)
+    official = official.assign(source = "Ministry of Health", source_id = official.isoalpha3 + official.truth.astype(str))
+
+    public = facilities[rng.random(n) < 0.6].reset_index(drop = True)
+    shift  = rng.normal(0, 25, (len(public), 2)) / 111_320
+    public = public.assign(lat = public.lat + shift[:, 0], lon = public.lon + shift[:, 1],
+                           name = public.name.str.replace("Centro de Salud", "C.S.").str.upper(),
+                           source = "OSM", source_id = np.arange(len(public)))
+    public.loc[rng.random(len(public)) < 0.2, "name"] = None
+
+    return official, public
+
+def get_pair_accuracy(facilities, frames):
+    # Precision and recall of the records merged together, against the true facility
+    truth = {(frame.source.iloc[0], source_id): truth for frame in frames for source_id, truth in zip(frame.source_id, frame.truth)}
+    found = {(tuple(t for t in [truth[(s, i)] for s, i in zip(sources, ids)])) for sources, ids in zip(facilities.sources, facilities.source_ids)}
+
+    merged  = [ids for ids in found if len(ids) > 1]
+    correct = sum(len(set(ids)) == 1 for ids in merged)
+    shared  = len(set(frames[0].truth) & set(frames[1].truth))
+
+    return correct / max(len(merged), 1), correct / max(shared, 1)
+
+def get_brute_force_pairs(frames, distance):
+    # Every official record against every public record of the same country (quadratic)
+    a, b  = frames
+    pairs = []
+    for code in COUNTRIES:
+        i = np.flatnonzero(a.isoalpha3.values == code)
+        j = np.flatnonzero(b.isoalpha3.values == code)
+        for i_ in np.array_split(i, max(len(i) // 2000, 1)):
+            lat = np.radians((a.lat.values[i_][:, None] + b.lat.values[j][None, :]) / 2)
+            dx  = (a.lon.values[i_][:, None] - b.lon.values[j][None, :]) * 111_320 * np.cos(lat)
+            dy  = (a.lat.values[i_][:, None] - b.lat.values[j][None, :]) * 111_320
+            r, c = np.nonzero(dx ** 2 + dy ** 2 <= distance ** 2)
+            pairs.append(np.stack([i_[r], j[c]], axis = 1))
+
+    return np.concatenate(pairs)
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    official, public = get_sources(n)
+    frames = [official, public]
+    print(f"official: {len(official):,} | public: {len(public):,} | all pairs: {len(official) * len(public) / len(COUNTRIES):,.0f}")
+
+    start = time.perf_counter()
+    facilities, mapping = get_conflated(frames)
+    elapsed = time.perf_counter() - start
+
+    precision, recall = get_pair_accuracy(facilities, frames)
+    print(f"    conflation : {elapsed:8.2f} s | {len(facilities):,} facilities ({(facilities.n_sources > 1).sum():,} merged) | "
+          f"precision {precision:.3f} | recall {recall:.3f}")
+
+    # Quadratic candidates on a subset (distance only, names would be scored on every pair)
+    subset = [official[official.isoalpha3 == "BRA"].head(20_000), public[public.isoalpha3 == "BRA"].head(20_000)]
+    start  = time.perf_counter()
+    pairs  = get_brute_force_pairs(subset, 150)
+    brute  = time.perf_counter() - start
+    start  = time.perf_counter()
+    get_conflated(subset)
+    grid   = time.perf_counter() - start
+    print(f"    BRA subset ({len(subset[0]):,} x {len(subset[1]):,}): quadratic distances {brute:.2f} s "
+          f"({len(pairs):,} pairs within 150 m) | conflation {grid:.2f} s")
+
+    # Name scoring on candidates only
+    keys = get_name_keys(pd.concat([official.name, public.name], ignore_index = True))
+    start = time.perf_counter()
+    get_name_similarity(keys, np.stack([np.arange(len(official)), len(official) + np.arange(len(official)) % len(public)], axis = 1))
+    print(f"    name similarity: {time.perf_counter() - start:.2f} s per {len(official):,} pairs")
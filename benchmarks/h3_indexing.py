@@ -0,0 +1,55 @@
+"""
+Benchmark: H3 indexing and hexagon construction
+    Row-wise `apply` path (previous `get_access`) vs batched H3 layer
+    Run from the repository root: python -m benchmarks.h3_indexing [n_points]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from shapely.geometry import Polygon
+from h3 import geo_to_h3, h3_to_geo_boundary
+
+from src.geospatial.hexagons import get_h3_population
+
+def get_population_sample(n, seed = 42):
+    # Synthetic Meta-like grid points over Colombia's bounding box
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"latitude"  : rng.uniform(-4.2, 12.5 , n),
+                         "longitude" : rng.uniform(-79.0, -66.9, n),
+                         "population": rng.gamma(2, 3, n)})
+
+def h3_apply(population, resolution = 6):
+    # Previous implementation in `get_access`
+    population["hex_id"] = population.apply(lambda x: geo_to_h3(x["latitude"], x["longitude"], resolution), axis = 1)
+    h3_population             = population.groupby("hex_id").population.agg("sum").reset_index()
+    h3_population["geometry"] = h3_population['hex_id'].apply(lambda x: h3_to_geo_boundary(x, geo_json = True))
+    h3_population['hex_poly'] = h3_population['geometry'].apply(lambda x: Polygon(x))
+    h3_population             = gpd.GeoDataFrame(h3_population, geometry = h3_population.hex_poly, crs = "EPSG:4326")
+    
+    return h3_population
+
+def timeit(func, *args, **kwargs):
+    start  = time.perf_counter()
+    output = func(*args, **kwargs)
+    return output, time.perf_counter() - start
+
+if __name__ == "__main__":
+    n          = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    population = get_population_sample(n)
+    
+    old, t_old = timeit(h3_apply, population.copy())
+    new, t_new = timeit(get_h3_population, population)
+    
+    # Same cells and totals
+    old = old.set_index("hex_id").sort_index()
+    new = new.set_index("hex_id").sort_index()
+    assert old.index.equals(new.index)
+    assert np.allclose(old.population.values, new.population.values)
+    
+    print(f"points: {n:,} | cells: {len(new):,}")
+    print(f"apply  : {t_old:8.3f} s")
+    print(f"batched: {t_new:8.3f} s ({t_old / t_new:.1f}x)")
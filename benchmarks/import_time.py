@@ -0,0 +1,48 @@
+"""
+Benchmark: cold start time of `import src.main`
+    Lazy: the package as it is (third-party libraries and S3 clients created on first use)
+    Eager: the third-party libraries and S3 client that `src/main.py` used to create at import time
+    Every run is a fresh interpreter
+    Run from the repository root: python -m benchmarks.import_time [runs]
+"""
+
+import sys
+import time
+import subprocess
+import importlib.util
+
+# Libraries imported by `src/main.py` before lazy loading
+EAGER = ["boto3", "numpy", "pandas", "geopandas", "sodapy", "requests", "bs4", "fiona",
+         "rasterio", "geopandas.tools", "shapely.geometry", "h3", "matplotlib.pyplot",
+         "seaborn", "contextily"]
+
+def get_import_time(code, runs):
+    # Median wall time of `python -c code` in fresh interpreters
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check = True)
+        times.append(time.perf_counter() - start)
+
+    return sorted(times)[len(times) // 2]
+
+def main(runs):
+    # Only installed libraries are part of the eager baseline
+    installed = [name for name in EAGER if importlib.util.find_spec(name.split(".")[0]) is not None]
+    missing   = sorted(set(EAGER) - set(installed))
+    eager     = "; ".join(f"import {name}" for name in installed)
+    eager    += "; boto3.client('s3', region_name = 'us-east-1')" if "boto3" in installed else ""
+
+    t_base  = get_import_time("pass", runs)
+    t_lazy  = get_import_time("import src.main", runs)
+    t_eager = get_import_time(eager, runs)
+
+    print(f"Interpreter         : {t_base:.3f} s")
+    print(f"import src.main     : {t_lazy:.3f} s (lazy)")
+    print(f"Eager dependencies  : {t_eager:.3f} s")
+    print(f"Speed-up            : {t_eager / t_lazy:.1f}x")
+    if missing:
+        print(f"Not installed (excluded from the eager baseline): {', '.join(missing)}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,98 @@
+"""
+Benchmark: row-wise `apply` normalization (previous `get_amenity_official`) vs vectorized normalization
+    Synthetic Brazil (CNES) and Mexico (CLUES) sized master table
+    Run from the repository root: python -m benchmarks.infrastructure_normalization [n_brazil] [n_mexico]
+"""
+
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.processing.infrastructure import get_numeric, get_source_id, get_text
+
+def get_master_table(n_brazil, n_mexico, seed = 42):
+    # Brazil: numeric ids and coordinates, Mexico: numeric ids and coordinates read as text
+    rng = np.random.default_rng(seed)
+    brazil = pd.DataFrame({"isoalpha3": "BRA",
+                           "source"   : "Ministry of Health",
+                           "source_id": rng.integers(2_000_000, 9_999_999, n_brazil),
+                           "amenity"  : rng.choice(["Posto de Saude", "Hospital Geral", "Policlinica"], n_brazil),
+                           "name"     : [f"UNIDADE {i}" for i in range(n_brazil)],
+                           "lat"      : rng.uniform(-33, 5, n_brazil),
+                           "lon"      : rng.uniform(-73, -35, n_brazil)})
+    mexico = pd.DataFrame({"isoalpha3": "MEX",
+                           "source"   : "Ministry of Health",
+                           "source_id": rng.integers(1, 99_999, n_mexico),
+                           "amenity"  : rng.choice(["CONSULTA EXTERNA", "HOSPITALIZACION"], n_mexico),
+                           "name"     : [f"CENTRO DE SALUD {i}" for i in range(n_mexico)],
+                           "lat"      : [f"{value:.6f}" for value in rng.uniform(14, 32, n_mexico)],
+                           "lon"      : [f"{value:.6f}" for value in rng.uniform(-117, -87, n_mexico)]})
+    
+    # Sequential ids and missing coordinates as in other countries
+    mexico["source_id"]           = mexico.source_id.astype(object)
+    brazil.loc[::50, "lat"]       = np.nan
+    mexico.loc[::40, "lat"]       = "SIN COORDENADA"
+    mexico.loc[::7 , "source_id"] = [f"MEX{i}" for i in range(len(mexico.loc[::7]))]
+    
+    return pd.concat([brazil, mexico]).reset_index(drop = True)
+
+def get_raw_names(n, seed = 42):
+    # Raw columns of a country with names built from several columns (e.g. BOL, SLV)
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"Name"     : [f"Centro {i}" for i in range(n)],
+                         "MUNICIPIO": rng.choice(["La Paz", "El Alto", "Oruro", None], n),
+                         "PROVINCIA": rng.choice(["Murillo", "Cercado"], n)})
+
+def normalize_apply(infrastructure):
+    # Previous implementation in `get_amenity_official`
+    infrastructure = infrastructure.copy()
+    infrastructure.lat = infrastructure.lat.apply(pd.to_numeric, errors = 'coerce', downcast = 'float')
+    infrastructure.lon = infrastructure.lon.apply(pd.to_numeric, errors = 'coerce', downcast = 'float')
+    infrastructure = infrastructure[~infrastructure.lat.isna()] 
+    infrastructure['source_id'] = infrastructure.apply(
+        lambda row: str(row['isoalpha3']) + str(int(row['source_id'])) if re.match(r'^\d', str(row['source_id'])) else row['source_id'], 
+        axis = 1)
+    
+    return infrastructure
+
+def normalize_vectorized(infrastructure):
+    # Current implementation in `get_amenity_official`
+    infrastructure = infrastructure.copy()
+    infrastructure.lat = get_numeric(infrastructure.lat)
+    infrastructure.lon = get_numeric(infrastructure.lon)
+    infrastructure = infrastructure[~infrastructure.lat.isna()] 
+    infrastructure['source_id'] = get_source_id(infrastructure)
+    
+    return infrastructure
+
+def timeit(func, *args, **kwargs):
+    start  = time.perf_counter()
+    output = func(*args, **kwargs)
+    return output, time.perf_counter() - start
+
+if __name__ == "__main__":
+    n_brazil = int(sys.argv[1]) if len(sys.argv) > 1 else 350_000
+    n_mexico = int(sys.argv[2]) if len(sys.argv) > 2 else 45_000
+    master   = get_master_table(n_brazil, n_mexico)
+    raw      = get_raw_names(n_brazil)
+    
+    # Master table: coordinates and source ids
+    old, t_old = timeit(normalize_apply, master)
+    new, t_new = timeit(normalize_vectorized, master)
+    pd.testing.assert_frame_equal(old, new)
+    
+    print(f"rows: {len(master):,} (Brazil {n_brazil:,}, Mexico {n_mexico:,})")
+    print(f"master table, apply     : {t_old:8.3f} s")
+    print(f"master table, vectorized: {t_new:8.3f} s ({t_old / t_new:.1f}x)")
+    
+    # Names from several columns
+    old, t_old = timeit(lambda: raw[['Name','MUNICIPIO','PROVINCIA']].apply(lambda x : '{}, {}, {}'.format(x.iloc[0], x.iloc[1], x.iloc[2]), axis = 1))
+    new, t_new = timeit(get_text, raw, ['Name','MUNICIPIO','PROVINCIA'])
+    pd.testing.assert_series_equal(old, new, check_names = False)
+    
+    print(f"names, apply            : {t_old:8.3f} s")
+    print(f"names, vectorized       : {t_new:8.3f} s ({t_old / t_new:.1f}x)")
+    print("identical output: True")
@@ -0,0 +1,74 @@
+"""
+Benchmark: concurrent isochrone fetcher against a local stand-in for the Mapbox API
+    The stand-in returns Mapbox-like FeatureCollections and randomly answers 429/503
+    Run from the repository root: python -m benchmarks.isochrone_fetch [n_facilities]
+"""
+
+import sys
+import time
+import random
+import asyncio
+
+import numpy as np
+import pandas as pd
+from aiohttp import web
+
+from src.geospatial.isochrones import fetch_isochrones
+
+def get_isochrone_app(error_rate = 0.2, latency = 0.05):
+    # Stand-in for https://api.mapbox.com/isochrone/v1/mapbox/{profile}/{lon},{lat}
+    async def isochrone(request):
+        if random.random() < error_rate:
+            return web.Response(status = random.choice([429, 503]))
+        
+        lon, lat = map(float, request.match_info["coords"].split(","))
+        features = []
+        for minute in request.query["contours_minutes"].split(","):
+            d = int(minute) / 1000
+            features.append({"type"      : "Feature",
+                             "properties": {"contour": int(minute), "metric": "time"},
+                             "geometry"  : {"type": "Polygon",
+                                            "coordinates": [[[lon - d, lat - d], [lon + d, lat - d],
+                                                             [lon + d, lat + d], [lon - d, lat + d],
+                                                             [lon - d, lat - d]]]}})
+        
+        await asyncio.sleep(latency)
+        return web.json_response({"type": "FeatureCollection", "features": features})
+    
+    app = web.Application()
+    app.router.add_get("/{profile}/{coords}", isochrone)
+    
+    return app
+
+async def main(n, port = 8765):
+    # Start stand-in server
+    runner = web.AppRunner(get_isochrone_app())
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    
+    # Facilities
+    data = pd.DataFrame({"lon"    : np.random.uniform(-90, -88, n),
+                         "lat"    : np.random.uniform(13, 14, n),
+                         "amenity": "hospital"})
+    
+    # Sequential requests (one at a time, as the previous loop), without the on-disk cache:
+    # stand-in isochrones must not reach the cache nor warm the concurrent run
+    start = time.perf_counter()
+    await fetch_isochrones(data.head(50), 30, "driving", base_url = f"http://127.0.0.1:{port}/",
+                           requests_per_minute = 60_000, max_connections = 1, backoff = 0.05, cache = False)
+    t_seq = (time.perf_counter() - start) / 50 * n
+    
+    # Concurrent requests
+    start = time.perf_counter()
+    isochrones = await fetch_isochrones(data, 30, "driving", base_url = f"http://127.0.0.1:{port}/",
+                                        requests_per_minute = 60_000, max_connections = 50, backoff = 0.05, cache = False)
+    t_con = time.perf_counter() - start
+    
+    await runner.cleanup()
+    
+    print(f"facilities: {n:,} | isochrones: {len(isochrones):,} | requests: {isochrones.attrs['requests']['requests']:,}")
+    print(f"sequential (estimated): {t_seq:8.3f} s")
+    print(f"concurrent            : {t_con:8.3f} s ({t_seq / t_con:.1f}x)")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
@@ -0,0 +1,52 @@
+"""
+Benchmark: point-in-polygon from shapely Points (STRtree) vs coordinate arrays (grid lookup + intersects_xy)
+    Synthetic META-like points, Voronoi admin-2 units and buffered facilities as isochrones
+    Run from the repository root: python -m benchmarks.point_labels [n_points]
+"""
+
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import shapely
+
+from src.geospatial.points import get_polygon_index
+from benchmarks.raster_coverage import get_population_grid, get_polygons
+
+def get_polygon_index_points(geometries, lon, lat):
+    # Previous path: one shapely Point per population point, first polygon per point
+    points = shapely.points(lon, lat)
+    pairs  = shapely.STRtree(geometries).query(points, predicate = "intersects")
+
+    index = np.full(len(points), -1, dtype = np.int64)
+    point_, first = np.unique(pairs[0], return_index = True)
+    index[point_] = pairs[1][first]
+
+    return index
+
+def measure(func, *args):
+    tracemalloc.start()
+    start  = time.perf_counter()
+    output = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return output, elapsed, peak / 2**20
+
+if __name__ == "__main__":
+    size       = int(np.sqrt(int(sys.argv[1]) / 0.4)) if len(sys.argv) > 1 else 3000
+    population = get_population_grid(size)
+    adm2, iso  = get_polygons(size)
+    lon        = population.longitude.values.astype(np.float64)
+    lat        = population.latitude.values.astype(np.float64)
+
+    print(f"points: {len(population):,} | admin-2: {len(adm2):,}")
+    for name, polygons in [("admin-2", adm2.geometry.values), ("isochrone", iso.geometry.values)]:
+        old, t_old, m_old = measure(get_polygon_index_points, polygons, lon, lat)
+        new, t_new, m_new = measure(get_polygon_index, polygons, lon, lat)
+
+        print(f"{name}")
+        print(f"    points: {t_old:8.3f} s | {m_old:8.1f} MB")
+        print(f"    arrays: {t_new:8.3f} s | {m_new:8.1f} MB ({t_old / t_new:.1f}x)")
+        print(f"    identical labels: {np.array_equal(old, new)}")
@@ -0,0 +1,112 @@
+"""
+Benchmark: public records (OSM, healthsites.io) with pandas.read_csv vs the columnar reader (streamed .csv, converted parquet copy)
+    Synthetic regional OSM dump with geometry and tags, filtered to a few countries
+    Synthetic healthsites.io dump with every column read, including sparse columns empty until the last rows
+    Every reader runs in its own process to measure its peak memory (max RSS)
+    Run from the repository root: python -m benchmarks.public_records [n_records]
+"""
+
+import os
+import sys
+import time
+import resource
+import tempfile
+import subprocess
+
+import numpy as np
+import pandas as pd
+
+PATH      = "Geospatial infrastructure/Healthcare Facilities"
+COUNTRIES = ["ARG", "BOL", "BRA", "COL", "MEX", "PER"]
+
+def write_osm(lake, n):
+    # Regional dump: LAC and other countries, extra columns as in the OSM extracts
+    rng   = np.random.default_rng(0)
+    codes = np.array(["ARG", "BOL", "BRA", "COL", "MEX", "PER", "USA", "CAN", "ESP", "FRA", None], dtype = object)
+    lat   = rng.uniform(-55, 60, n).round(7)
+    lon   = rng.uniform(-120, 0, n).round(7)
+    data  = pd.DataFrame({"isoalpha3": codes[rng.integers(0, len(codes), n)],
+                          "id"       : rng.integers(1, 10**10, n),
+                          "amenity"  : rng.choice(["hospital", "clinic", "doctors", "pharmacy"], n),
+                          "name"     : np.where(rng.random(n) < 0.3, None, "Centro de Salud " + pd.Series(rng.integers(0, 10**5, n)).astype(str)),
+                          "lat"      : lat,
+                          "lon"      : lon,
+                          "geometry" : "POINT (" + pd.Series(lon).astype(str) + " " + pd.Series(lat).astype(str) + ")",
+                          "tags"     : '{"healthcare": "clinic", "opening_hours": "Mo-Fr 08:00-17:00", "operator": "Ministerio de Salud"}'})
+
+    os.makedirs(os.path.join(lake, PATH), exist_ok = True)
+    data.to_csv(os.path.join(lake, PATH, "OSM_LAC.csv"), index = False)
+
+def write_healthsites(lake, n):
+    # Every column is read: sparse columns must not take the type of the first block
+    rng  = np.random.default_rng(1)
+    data = pd.DataFrame({"isoalpha3" : np.array(COUNTRIES + [None], dtype = object)[rng.integers(0, len(COUNTRIES) + 1, n)],
+                         "source"    : "healthsites",
+                         "source_id" : rng.integers(1, 10**9, n),
+                         "amenity"   : rng.choice(["hospital", "clinic", "doctors"], n),
+                         "name"      : "Clinica " + pd.Series(rng.integers(0, 10**4, n)).astype(str),
+                         "lat"       : rng.uniform(-55, 30, n).round(7),
+                         "lon"       : rng.uniform(-110, -35, n).round(7),
+                         "operator"  : None,
+                         "beds"      : None,
+                         "geometry"  : "POINT (0 0)"})
+    data.loc[n - 8:, "operator"] = "Ministerio de Salud"
+    data.loc[n - 8:, "beds"]     = "12"
+
+    os.makedirs(os.path.join(lake, PATH), exist_ok = True)
+    data.to_csv(os.path.join(lake, PATH, "healthsites.csv"), index = False)
+
+def run(reader):
+    # Runs in a child process
+    start = time.perf_counter()
+    if reader.startswith("healthsites"):
+        if reader == "healthsites-pandas":
+            file = pd.read_csv(f"{os.environ['scldatalake']}{PATH}/healthsites.csv", low_memory = False)
+            file = file[file.isoalpha3.isin(COUNTRIES)].drop(columns = "geometry")
+        else:
+            from src.processing.infrastructure import get_public_healthsites
+            file = get_public_healthsites(PATH, "healthsites.csv", COUNTRIES, None if reader == "healthsites-stream" else "etag")
+    elif reader == "pandas":
+        file = pd.read_csv(f"{os.environ['scldatalake']}{PATH}/OSM_LAC.csv", low_memory = False)
+        file = file[file.isoalpha3.isin(COUNTRIES)]
+        file = file[['isoalpha3', 'id', 'amenity', 'name', 'lat', 'lon']]
+    else:
+        from src.processing.infrastructure import get_public_osm
+        file = get_public_osm(PATH, "OSM_LAC.csv", COUNTRIES, None if reader == "stream" else "etag")
+    elapsed = time.perf_counter() - start
+
+    peak    = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+
+    print(f"{elapsed} {len(file)} {file.memory_usage(deep = True).sum() / 2**20} {peak}")
+
+def measure(reader, environment):
+    output = subprocess.run([sys.executable, "-m", "benchmarks.public_records", "--run", reader],
+                            env = environment, capture_output = True, text = True, check = True).stdout.split()
+    return float(output[0]), int(output[1]), float(output[2]), float(output[3])
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--run"]:
+        run(sys.argv[2])
+        sys.exit()
+    if sys.argv[1:2] == ["--write"]:
+        write_osm(sys.argv[2], int(sys.argv[3]))
+        write_healthsites(sys.argv[2], int(sys.argv[3]) // 4)
+        sys.exit()
+
+    # The dump is written by a child process: the max RSS of the parent would be inherited by the readers
+    n           = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    temp        = tempfile.mkdtemp()
+    environment = dict(os.environ, scldatalake = f"{temp}/lake/", scl_cache_dir = f"{temp}/cache")
+    subprocess.run([sys.executable, "-m", "benchmarks.public_records", "--write", f"{temp}/lake", str(n)], check = True)
+
+    print(f"records: {n:,} | file: {os.path.getsize(f'{temp}/lake/{PATH}/OSM_LAC.csv') / 2**20:.0f} MB")
+    for name, reader in [("pandas.read_csv", "pandas"), ("columnar (stream)", "stream"),
+                         ("columnar (convert)", "convert"), ("columnar (cached)", "cached")]:
+        elapsed, rows, size, peak = measure(reader, environment)
+        print(f"    {name:20s}: {elapsed:8.2f} s | {rows:,} rows | frame {size:7.1f} MB | peak RSS {peak:7.1f} MB")
+
+    print(f"healthsites.io records: {n // 4:,} (all columns, sparse columns filled in the last rows)")
+    for name, reader in [("pandas.read_csv", "healthsites-pandas"), ("columnar (stream)", "healthsites-stream"),
+                         ("columnar (convert)", "healthsites-convert"), ("columnar (cached)", "healthsites-cached")]:
+        elapsed, rows, size, peak = measure(reader, environment)
+        print(f"    {name:20s}: {elapsed:8.2f} s | {rows:,} rows | frame {size:7.1f} MB | peak RSS {peak:7.1f} MB")
@@ -1,4 +1,7 @@
 # Libraries
+import os
+import sys
+
 import pandas as pd
 import numpy as np
 
@@ -7,6 +10,13 @@ import contextily as ctx
 from shapely.geometry import Point, LineString, Polygon
 from h3 import geo_to_h3, h3_to_geo_boundary
 
+# Repository root (notebooks run from sector/HNP), for the `src` package
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if root not in sys.path:
+    sys.path.insert(0, root)
+
+from src.geospatial.hexagons import get_h3_population
+
 import requests
 from bs4 import BeautifulSoup
 
@@ -85,11 +95,8 @@ def get_meta_url(country):
     return url
 
 def get_point_to_h3(data, resolution):
-    data["hex_id"]      = data.apply(lambda x: geo_to_h3(x["latitude"], x["longitude"], resolution), axis = 1)
-    h3_data             = data.groupby("hex_id").population.agg(sum).reset_index()
-    h3_data["geometry"] = h3_data['hex_id'].apply(lambda x: h3_to_geo_boundary(x, geo_json = True))
-    h3_data['hex_poly'] = h3_data['geometry'].apply(lambda x: Polygon(x))
-    h3_data             = gpd.GeoDataFrame(h3_data, geometry = h3_data.hex_poly, crs = "EPSG:4326")
+    # Batched H3 index and hexagons (see src/geospatial/hexagons.py)
+    h3_data = get_h3_population(data, resolution)
     
     return h3_data
 
@@ -6,17 +6,23 @@ setup(
     packages         = find_packages(where = 'src'),
     package_dir      = {'': 'src'},
     install_requires = [
+        'aiohttp',
+        'affine',
         'boto3',
         'bs4',
         'dotenv',
         'fiona',
+        'fsspec',
         'geopandas',
         'h3',
         'io',
         'matplotlib',
         'numpy',
         'pandas',
+        'pyarrow',
+        'rasterio',
         'requests',
+        'scipy',
         'shapely',
         'sodapy',
         'urllib'
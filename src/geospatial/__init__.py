@@ -1,11 +1,61 @@
-from .coordinates  import get_coordinates
-from .isochrones   import get_isochrone, get_isochrones_country
-from .accesibility import get_access
+from importlib import import_module
+
+# Functions by module, imported on first use
+modules = {
+    ".coordinates" : ['get_coordinates'],
+    ".isochrones"  : ['get_isochrone', 'get_isochrones_country', 'fetch_isochrones', 'get_isochrone_cache'],
+    ".accesibility": ['get_access', 'get_access_bands'],
+    ".hexagons"    : ['get_h3_index', 'get_h3_geometry', 'get_h3_population'],
+    ".points"      : ['get_polygon_index', 'get_polygon_population', 'get_point_gdf'],
+    ".coverage"    : ['get_point_labels', 'get_raster_labels', 'get_coverage'],
+    ".clusters"    : ['get_facility_clusters'],
+    ".dissolve"    : ['get_coverage_mask', 'get_coverage_mask_country'],
+    ".raster"      : ['write_population_raster', 'PopulationRaster'],
+    ".summed_area" : ['write_population_index', 'PopulationIndex'],
+    ".pyramid"     : ['get_h3_pyramid', 'write_h3_pyramid', 'H3Pyramid'],
+    ".routing"     : ['get_road_network', 'get_travel_times', 'get_isochrones_osm']
+}
 
 __all__ = [
     'get_coordinates',
     'get_isochrone',
     'get_isochrones_country',
-    'get_access'
+    'fetch_isochrones',
+    'get_isochrone_cache',
+    'get_access',
+    'get_access_bands',
+    'get_h3_index',
+    'get_h3_geometry',
+    'get_h3_population',
+    'get_polygon_index',
+    'get_polygon_population',
+    'get_point_gdf',
+    'get_point_labels',
+    'get_raster_labels',
+    'get_coverage',
+    'get_facility_clusters',
+    'get_coverage_mask',
+    'get_coverage_mask_country',
+    'get_road_network',
+    'get_travel_times',
+    'get_isochrones_osm',
+    'write_population_raster',
+    'PopulationRaster',
+    'write_population_index',
+    'PopulationIndex',
+    'get_h3_pyramid',
+    'write_h3_pyramid',
+    'H3Pyramid'
 ]
-            
\ No newline at end of file
+
+def __getattr__(name):
+    # Import the module of a function on first access (PEP 562)
+    for module, names in modules.items():
+        if name in names:
+            value = getattr(import_module(module, __name__), name)
+            globals()[name] = value
+            return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
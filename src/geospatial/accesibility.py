@@ -1,4 +1,8 @@
-def get_access(code, amenity, profile, minute, isochrone, popdata):
+from .coverage                 import get_point_labels, get_raster_labels, get_coverage
+from .dissolve                 import get_coverage_mask_country
+from ..utilities.auxiliary_data import get_country_shp
+
+def get_access(code, amenity, profile, minute, isochrone, popdata, engine = "vector", band = "total_population"):
     # TODO: Generalize function
     """
     calculates the coverage percentage per country by admin-2 level and H3 cell (resolution 3)
@@ -20,8 +24,15 @@ def get_access(code, amenity, profile, minute, isochrone, popdata):
         distance in minutes from facility 
     popdata: str
         population link or csv.gz 
+        or population raster (path or `PopulationRaster`) for the raster engine
     isochrone : str
         isochrone path
+    engine : str, optional
+        coverage engine (default is `vector`), including:
+            vector: point-in-polygon tests of every population point
+            raster: admin-2 and isochrones rasterized onto the population grid
+    band : str, optional
+        population band of the raster engine (default is `total_population`)
     
     Returns
     ----------
@@ -39,70 +50,77 @@ def get_access(code, amenity, profile, minute, isochrone, popdata):
         adm2_shp = get_country_shp(code, level = 2)
     
         # Population and isochrones
+    import fiona
     with fiona.Env(OGR_GEOJSON_MAX_OBJ_SIZE = 2000):  
         isochrone  = isochrone
     population = popdata
-    geometry   = gpd.points_from_xy(population['longitude'], population['latitude'])
-    population = gpd.GeoDataFrame(population.copy(), geometry = geometry, crs = 4326)
     
-    # Population in isochrone 
-    pop_iso = gpd.clip(population, isochrone)
+        # Dissolved coverage mask (cached per country, amenity, profile and minute)
+    isochrone = get_coverage_mask_country(code, amenity, profile, minute, isochrone)
     
-    # Coverage at admin-2 level 
+    # Label every point once: admin-2 code, H3 cell and isochrone
+    # Source: resolution table 
+    # https://h3geo.org/docs/core-library/restable/
     #--------------------------------------------------------
-        # Population in admin-2 level 
-    pop_adm2 = gpd.sjoin(population, adm2_shp)
-    pop_adm2 = pop_adm2[["ADM2_PCODE","population"]].groupby("ADM2_PCODE").sum().reset_index()
-    pop_adm2 = pop_adm2.rename(columns = {"population":"pop_tot"})
-    
-        # Covered population in admin-2 level
-    pop_adm2_cov = gpd.sjoin(pop_iso, adm2_shp)
-    pop_adm2_cov = pop_adm2_cov[["ADM2_PCODE","population"]].groupby("ADM2_PCODE").sum().reset_index()
-    pop_adm2_cov = pop_adm2_cov.rename(columns = {"population":"pop_cov"})
+    if engine == "raster":
+        labels = get_raster_labels(population, adm2_shp, isochrone, band = band, resolution = 6)
+    else:
+        labels = get_point_labels(population, adm2_shp, isochrone, resolution = 6)
     
-        # Coverage map 
-    adm2_coverage = adm2_shp.copy()
-    adm2_coverage = adm2_coverage.merge(pop_adm2    , on = "ADM2_PCODE", how = "left")
-    adm2_coverage = adm2_coverage.merge(pop_adm2_cov, on = "ADM2_PCODE", how = "left")
+    # Coverage at admin-2 level and H3 cell (grouped sums)
+    #--------------------------------------------------------
+    adm2_coverage, h3_coverage = get_coverage(labels, adm2_shp)
     
-        # Create coverage features
-    adm2_coverage["pop_cov"]   = adm2_coverage.pop_cov.fillna(0)
-    adm2_coverage["pop_uncov"] = adm2_coverage.pop_tot   - adm2_coverage.pop_cov
-    adm2_coverage["per_cov"]   = adm2_coverage.pop_cov   * 100 / adm2_coverage.pop_tot
-    adm2_coverage["per_uncov"] = adm2_coverage.pop_uncov * 100 / adm2_coverage.pop_tot
+    return adm2_coverage, h3_coverage  
+
+def get_access_bands(code, amenity, isochrones, popdata):
+    """
+    calculates the coverage percentage per country by admin-2 level and H3 cell (resolution 6)
+    for several profiles and minutes at once, from a single labelling of the population points
     
-    # Coverage at H3 cell
-    # Source: resolution table 
-    # https://h3geo.org/docs/core-library/restable/
-    #--------------------------------------------------------
-        # Calculate H3 cells per population points
-    population["hex_id"] = population.apply(lambda x: geo_to_h3(x["latitude"], x["longitude"], resolution = 6), axis = 1)
+    Parameters
+    ----------
+    code : str
+        country isoalpha3 code
+    amenity : str
+        string with amenity name, including:
+            financial
+            healthcare
+    isochrones : dict
+        dictionary with isochrones by profile and minute, e.g.
+            {("driving", 10): geopandas.GeoDataFrame, ("driving", 20): ..., ("walking", 10): ...}
+    popdata: pandas.DataFrame
+        population with `latitude`, `longitude` and `population`
     
-        # Collapse by H3
-    h3_population             = population.groupby("hex_id").population.agg(sum).reset_index()
-    h3_population["geometry"] = h3_population['hex_id'].apply(lambda x: h3_to_geo_boundary(x, geo_json = True))
-    h3_population['hex_poly'] = h3_population['geometry'].apply(lambda x: Polygon(x))
-    h3_population             = gpd.GeoDataFrame(h3_population, geometry = h3_population.hex_poly, crs = "EPSG:4326")
+    Returns
+    ----------
+    geopandas.GeoDataFrame
+        geo pandas dataframe with coverage at admin-2 and H3
+        one set of rows per `profile` and `minute`
+    """
     
-        # Covered population in H3 cells
-    h3_pop_cov = gpd.sjoin(pop_iso, h3_population.drop(columns = "population"))
-    h3_pop_cov = h3_pop_cov[["hex_id","population"]]
-    h3_pop_cov = h3_pop_cov.rename(columns = {"population":"pop_cov"})
-    h3_pop_cov = h3_pop_cov.groupby("hex_id").sum().reset_index()
+    # Inputs 
+    #--------------------------------------------------------
+        # Shapefile
+    if code in ["BHS","BRB","BLZ","JAM","TTO"]:
+        adm2_shp = get_country_shp(code, level = 1)
+        adm2_shp["ADM2_PCODE"] = adm2_shp.ADM1_PCODE
+    else: 
+        adm2_shp = get_country_shp(code, level = 2)
     
-        # H3 coverage map 
-    h3_coverage = h3_population.merge(h3_pop_cov, on = "hex_id", how = "left")
-    h3_coverage = h3_coverage.rename(columns = {"population":"pop_tot"})
-    h3_coverage = h3_coverage.drop(columns = "geometry")
-    h3_coverage = h3_coverage.rename(columns = {"hex_poly":"geometry"})
+        # Thresholds by profile and dissolved coverage masks
+    bands = {}
+    masks = {}
+    for (profile, minute), isochrone in isochrones.items():
+        bands.setdefault(profile, []).append(minute)
+        masks[(profile, minute)] = get_coverage_mask_country(code, amenity, profile, minute, isochrone)
     
-        # Create coverage features
-    h3_coverage["pop_cov"]   = h3_coverage.pop_cov.fillna(0)
-    h3_coverage["pop_uncov"] = h3_coverage.pop_tot   - h3_coverage.pop_cov
-    h3_coverage["per_cov"]   = h3_coverage.pop_cov   * 100 / h3_coverage.pop_tot
-    h3_coverage["per_uncov"] = h3_coverage.pop_uncov * 100 / h3_coverage.pop_tot
+    # Label every point once: admin-2 code, H3 cell and smallest band by profile
+    #--------------------------------------------------------
+    labels = get_point_labels(popdata, adm2_shp, masks, resolution = 6)
     
-        # Set `geometry` as geometry in h3 level
-    h3_coverage = h3_coverage.set_geometry(col = 'geometry')
+    # Coverage at admin-2 level and H3 cell for every threshold
+    #--------------------------------------------------------
+    adm2_coverage, h3_coverage = get_coverage(labels, adm2_shp, bands = bands)
     
-    return adm2_coverage, h3_coverage  
+    return adm2_coverage, h3_coverage
@@ -0,0 +1,236 @@
+import numpy as np
+import pandas as pd
+
+# Meters per degree of latitude (mean)
+METERS_PER_DEGREE = 111_320
+
+def get_close_pairs(x, y, distance, group = None):
+    """
+    finds all pairs of points within a distance using a spatial grid
+    only points in the same or neighbouring grid cells are compared
+
+    Parameters
+    ----------
+    x,y : numpy.ndarray
+        projected coordinates in meters
+    distance : float
+        maximum distance in meters
+    group : numpy.ndarray, optional
+        integer group per point (e.g. country), pairs are only found within groups
+
+    Returns
+    ----------
+    numpy.ndarray
+        array of shape (n_pairs, 2) with point indices (i < j)
+    """
+
+    group = np.zeros(len(x), dtype = np.int64) if group is None else np.asarray(group, dtype = np.int64)
+
+    # Grid cells with side `distance`
+    cells = pd.DataFrame({"i"    : np.arange(len(x)),
+                          "group": group,
+                          "cx"   : np.floor(x / distance).astype(np.int64),
+                          "cy"   : np.floor(y / distance).astype(np.int64)})
+
+    # Same cell and half of the neighbouring cells (each pair of cells once)
+    pairs = []
+    for dx, dy in [(0, 0), (1, -1), (1, 0), (1, 1), (0, 1)]:
+        shifted = cells.assign(cx = cells.cx + dx, cy = cells.cy + dy)
+        pairs_  = cells.merge(shifted, on = ["group", "cx", "cy"], suffixes = ("", "_"))
+        pairs_  = pairs_[["i", "i_"]].values
+        if (dx, dy) == (0, 0):
+            pairs_ = pairs_[pairs_[:, 0] < pairs_[:, 1]]
+        pairs.append(pairs_)
+    pairs = np.concatenate(pairs)
+
+    # Keep pairs within distance
+    d2    = (x[pairs[:, 0]] - x[pairs[:, 1]]) ** 2 + (y[pairs[:, 0]] - y[pairs[:, 1]]) ** 2
+    pairs = pairs[d2 <= distance ** 2]
+
+    return np.sort(pairs, axis = 1)
+
+def get_local_xy(lon, lat, group = None):
+    """
+    projects coordinates in meters around one reference latitude per group (equirectangular)
+    a single reference latitude keeps north-south offsets unsheared, east-west distances are
+    scaled by cos(lat) / cos(reference latitude)
+
+    Parameters
+    ----------
+    lon,lat : numpy.ndarray
+        longitude, latitude in degrees
+    group : numpy.ndarray, optional
+        integer group per point (e.g. country), each group has its own reference latitude
+
+    Returns
+    ----------
+    numpy.ndarray
+        projected x in meters
+    numpy.ndarray
+        projected y in meters
+    float
+        largest ratio between projected and true east-west distances (>= 1)
+    """
+
+    lon   = np.asarray(lon, dtype = np.float64)
+    lat   = np.asarray(lat, dtype = np.float64)
+    group = np.zeros(len(lat), dtype = np.int64) if group is None else pd.factorize(np.asarray(group))[0]
+    if len(lat) == 0:
+        return lon.copy(), lat.copy(), 1.0
+
+    # Reference latitude: middle of the latitude range of each group
+    low  = pd.Series(lat).groupby(group).transform("min").values
+    high = pd.Series(lat).groupby(group).transform("max").values
+    cos0 = np.cos(np.radians((low + high) / 2))
+    cos_ = np.maximum(np.cos(np.radians(lat)), 1e-6)
+
+    x = lon * METERS_PER_DEGREE * cos0
+    y = lat * METERS_PER_DEGREE
+
+    return x, y, max(float(np.max(cos0 / cos_)), 1.0)
+
+def get_haversine(lon1, lat1, lon2, lat2):
+    """
+    great-circle distance in meters (sphere consistent with `METERS_PER_DEGREE`)
+    """
+
+    lon1, lat1, lon2, lat2 = (np.radians(np.asarray(v, dtype = np.float64)) for v in (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+
+    return 2 * np.degrees(1) * METERS_PER_DEGREE * np.arcsin(np.sqrt(np.minimum(a, 1)))
+
+def get_nearby_pairs(lon, lat, distance, group = None):
+    """
+    finds all pairs of points within a great-circle distance
+    candidates come from `get_close_pairs` on a reference-latitude projection (radius widened by its scale error),
+    and are confirmed with the haversine distance
+
+    Parameters
+    ----------
+    lon,lat : numpy.ndarray
+        longitude, latitude in degrees
+    distance : float
+        maximum distance in meters
+    group : numpy.ndarray, optional
+        integer group per point (e.g. country), pairs are only found within groups
+
+    Returns
+    ----------
+    numpy.ndarray
+        array of shape (n_pairs, 2) with point indices (i < j)
+    numpy.ndarray
+        distance in meters per pair
+    """
+
+    lon   = np.asarray(lon, dtype = np.float64)
+    lat   = np.asarray(lat, dtype = np.float64)
+    group = np.zeros(len(lon), dtype = np.int64) if group is None else pd.factorize(np.asarray(group))[0]
+    if len(lon) == 0:
+        return np.empty((0, 2), dtype = np.int64), np.empty(0)
+
+    x, y, scale = get_local_xy(lon, lat, group)
+    pairs = get_close_pairs(x, y, distance * scale, group)
+    d     = get_haversine(lon[pairs[:, 0]], lat[pairs[:, 0]], lon[pairs[:, 1]], lat[pairs[:, 1]])
+
+    return pairs[d <= distance], d[d <= distance]
+
+def get_leader_clusters(n, pairs):
+    """
+    groups the nodes of a graph around leaders, every member is a neighbour of its leader
+    unlike connected components, chains of neighbours do not merge: with pairs within a distance,
+    members are within that distance of their leader (and within twice of each other)
+    nodes with the most neighbours lead first (ties by index)
+
+    Parameters
+    ----------
+    n : int
+        number of nodes
+    pairs : numpy.ndarray
+        array of shape (n_pairs, 2) with edges
+
+    Returns
+    ----------
+    numpy.ndarray
+        leader per node (a leader is its own leader)
+    """
+
+    leaders = np.arange(n)
+    if len(pairs) == 0:
+        return leaders
+
+    # Neighbours of every node (both directions), as offsets into one array
+    source = np.concatenate([pairs[:, 0], pairs[:, 1]])
+    target = np.concatenate([pairs[:, 1], pairs[:, 0]])
+    order  = np.argsort(source, kind = "stable")
+    target = target[order]
+    degree = np.bincount(source, minlength = n)
+    bounds = np.concatenate([[0], np.cumsum(degree)])
+
+    # Greedy: densest unassigned node first, it takes its unassigned neighbours
+    assigned = np.zeros(n, dtype = bool)
+    for i in np.argsort(-degree, kind = "stable")[:np.count_nonzero(degree)]:
+        if assigned[i]:
+            continue
+        members = target[bounds[i]:bounds[i + 1]]
+        members = members[~assigned[members]]
+        leaders[members] = i
+        assigned[members] = True
+        assigned[i] = True
+
+    return leaders
+
+def get_facility_clusters(data, distance = 50):
+    """
+    snaps facilities within a distance to one representative point per cluster
+    e.g. multiple services in one building or duplicated OSM nodes
+    the representative is the facility with the most neighbours, every facility of the cluster is within
+    `distance` of it (chains of close facilities, e.g. along a street, are split, see `get_leader_clusters`)
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        facilities with `isoalpha3`, `source_id`, `amenity`, `lat` and `lon`
+    distance : float, optional
+        maximum distance in meters between a facility and its representative (default is 50)
+
+    Returns
+    ----------
+    pandas.DataFrame
+        representatives, one row per cluster, including:
+            cluster_id  : cluster identifier
+            isoalpha3   : country code
+            amenity     : amenity of the representative facility
+            lat,lon     : coordinates of the representative facility
+            n_facilities: number of facilities in the cluster
+            source_ids  : list of `source_id` in the cluster
+    pandas.DataFrame
+        mapping from `source_id` to `cluster_id`
+    """
+
+    # Inputs
+    data = data[~data.lat.isna() & ~data.lon.isna()].reset_index(drop = True)
+    lat  = data.lat.values.astype(np.float64)
+    lon  = data.lon.values.astype(np.float64)
+    if len(data) == 0:
+        return data.assign(cluster_id = [], n_facilities = [], source_ids = []), data[["source_id"]].assign(cluster_id = [])
+
+    # Clusters: facilities within distance of a representative (same country)
+    pairs, _ = get_nearby_pairs(lon, lat, distance, pd.factorize(data.isoalpha3)[0])
+    leaders  = get_leader_clusters(len(data), pairs)
+
+    # Representative first in its cluster
+    data = data.assign(cluster_id = pd.factorize(leaders)[0], d_ = leaders != np.arange(len(data)))
+    data = data.sort_values(["cluster_id", "d_"], kind = "stable")
+
+    representatives = data.drop_duplicates("cluster_id")
+    representatives = representatives.drop(columns = ["source_id", "d_"]).reset_index(drop = True)
+
+        # Facilities by cluster (data is sorted by cluster)
+    n_facilities = np.bincount(data.cluster_id.values)
+    representatives["n_facilities"] = n_facilities
+    representatives["source_ids"]   = [list(ids) for ids in np.split(data.source_id.values, np.cumsum(n_facilities)[:-1])]
+
+    # Mapping back to the original facilities
+    mapping = data[["source_id", "cluster_id"]].sort_index().reset_index(drop = True)
+
+    return representatives, mapping
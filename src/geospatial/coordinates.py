@@ -1,3 +1,10 @@
+import os
+import urllib.parse
+
+import requests
+
+from ..utilities.auxiliary_data import get_iadb
+
 def get_coordinates(address, code):
     """
     gets the coordinates for address
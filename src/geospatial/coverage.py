@@ -0,0 +1,305 @@
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+from .hexagons import get_h3_index, get_h3_grid, get_h3_string, get_h3_geometry
+from .raster   import PopulationRaster, get_rasterized
+from .points   import get_polygon_index
+
+def get_point_bands(lon, lat, isochrones):
+    """
+    labels every point with the smallest travel-time band that reaches it
+
+    Parameters
+    ----------
+    lon,lat : numpy.ndarray
+        longitude, latitude of the points in degrees
+    isochrones : dict
+        dictionary with isochrone polygons by minute {minute: geopandas.GeoDataFrame}
+
+    Returns
+    ----------
+    numpy.ndarray
+        array with the smallest minute covering each point (NaN if not covered)
+    """
+
+    band = np.full(len(lon), np.nan)
+
+    # Smallest band first, only points not yet reached are tested
+    for minute in sorted(isochrones):
+        isochrone = isochrones[minute]
+        todo      = np.flatnonzero(np.isnan(band))
+        if len(isochrone) == 0 or len(todo) == 0:
+            continue
+
+        inside = get_polygon_index(isochrone.geometry.values, lon[todo], lat[todo]) >= 0
+        band[todo[inside]] = minute
+
+    return band
+
+def get_point_labels(population, adm2_shp, isochrone, resolution = 6):
+    """
+    labels every population point once with its admin-2 code, H3 cell
+    and whether it is inside the isochrone
+
+    Parameters
+    ----------
+    population : pandas.DataFrame
+        dataframe with `latitude`, `longitude` and `population`
+    adm2_shp : geopandas.GeoDataFrame
+        admin-2 shapefile with `ADM2_PCODE`
+    isochrone : geopandas.GeoDataFrame or dict
+        isochrone polygons (may be empty) or dictionary with isochrone polygons
+        by profile and minute {(profile, minute): geopandas.GeoDataFrame}
+    resolution : int, optional
+        H3 resolution (default is 6)
+
+    Returns
+    ----------
+    pandas.DataFrame
+        dataframe with one row per population point, including:
+            ADM2_PCODE    : admin-2 code (categorical, NaN outside admin-2)
+            hex_id        : H3 cell as unsigned 64-bit integer
+            covered       : True if the point is inside the isochrone
+            band_{profile}: smallest minute reaching the point (dict input only)
+            population    : population
+    """
+
+    # Inputs (coordinate arrays, no point geometries)
+    lat = population["latitude"].values.astype(np.float64)
+    lon = population["longitude"].values.astype(np.float64)
+
+    # Admin-2 label (first polygon per point)
+    adm2_idx = get_polygon_index(adm2_shp.geometry.values, lon, lat)
+
+        # Polygon index to admin-2 code
+    codes, pcodes = pd.factorize(adm2_shp.ADM2_PCODE)
+    adm2_code     = np.where(adm2_idx >= 0, codes[adm2_idx], -1)
+
+    # Labels
+    labels = pd.DataFrame({
+        "ADM2_PCODE": pd.Categorical.from_codes(adm2_code, categories = pcodes),
+        "hex_id"    : get_h3_index(lat, lon, resolution)
+    })
+
+    # Isochrone label
+    if isinstance(isochrone, dict):
+        # Smallest travel-time band by profile
+        profiles = sorted(set(profile for profile, _ in isochrone))
+        for profile in profiles:
+            layers = {minute: shp_ for (profile_, minute), shp_ in isochrone.items() if profile_ == profile}
+            labels[f"band_{profile}"] = get_point_bands(lon, lat, layers)
+    else:
+        labels["covered"] = get_point_bands(lon, lat, {0: isochrone}) == 0
+
+    labels["population"] = population["population"].values
+
+    return labels
+
+def get_raster_labels(raster, adm2_shp, isochrone, band = "total_population", resolution = 6, block = 4096):
+    """
+    labels every populated cell of a population raster with its admin-2 code, H3 cell
+    and whether it is inside the isochrone, like `get_point_labels` for the cell centers
+    admin-2 polygons and isochrones are rasterized onto the grid window by window
+    instead of testing every point
+
+    Parameters
+    ----------
+    raster : str or PopulationRaster
+        population raster from `write_population_raster`
+    adm2_shp : geopandas.GeoDataFrame
+        admin-2 shapefile with `ADM2_PCODE`
+    isochrone : geopandas.GeoDataFrame or dict
+        isochrone polygons (may be empty) or dictionary with isochrone polygons
+        by profile and minute {(profile, minute): geopandas.GeoDataFrame}
+    band : str, optional
+        population band (default is `total_population`)
+    resolution : int, optional
+        H3 resolution (default is 6)
+    block : int, optional
+        window size in cells (default is 4096)
+
+    Returns
+    ----------
+    pandas.DataFrame
+        dataframe with one row per populated cell, same columns as `get_point_labels`
+    """
+
+    raster = PopulationRaster(raster) if isinstance(raster, str) else raster
+
+    # Admin-2 polygons and isochrone layers {name: [(minute, polygons)]}
+    adm2_geom     = adm2_shp.geometry.values
+    adm2_tree     = shapely.STRtree(adm2_geom)
+    codes, pcodes = pd.factorize(adm2_shp.ADM2_PCODE)
+
+    if isinstance(isochrone, dict):
+        layers = {}
+        for (profile, minute), shp_ in sorted(isochrone.items()):
+            layers.setdefault(f"band_{profile}", []).append((minute, shp_.geometry.values))
+    else:
+        layers = {"covered": [(1, isochrone.geometry.values)]}
+
+    # Labels by window of the grid
+    height, width = raster.shape
+    labels        = []
+    for row0 in range(0, height, block):
+        for col0 in range(0, width, block):
+            window         = (row0, col0, min(block, height - row0), min(block, width - col0))
+            pop, transform = raster.read(bands = [band], window = window)
+            rows, cols     = np.nonzero(pop[0] > 0)
+            if len(rows) == 0:
+                continue
+
+            # Window extent
+            xmin, ymax = transform.c, transform.f
+            box        = shapely.box(xmin, ymax + window[2] * transform.e, xmin + window[3] * transform.a, ymax)
+
+            # Admin-2 (index + 1, 0 outside)
+            idx      = np.sort(adm2_tree.query(box, predicate = "intersects"))
+            adm2_idx = get_rasterized(adm2_geom[idx], idx + 1, transform, pop[0].shape)[rows, cols] - 1
+
+            label = {"adm2_idx"  : adm2_idx,
+                     "longitude" : transform.c + (cols + 0.5) * transform.a,
+                     "latitude"  : transform.f + (rows + 0.5) * transform.e,
+                     "population": pop[0][rows, cols],
+                     "hex_id"    : get_h3_grid(raster.transform, rows + row0, cols + col0, resolution)}
+
+            # Smallest band reaching each cell (polygons of smaller minutes first)
+            for name, minutes in layers.items():
+                geometries, values = [], []
+                for minute, geom in minutes:
+                    geom = geom[shapely.intersects(geom, box)]
+                    geometries.extend(geom)
+                    values.extend([minute] * len(geom))
+                grid = get_rasterized(geometries, values, transform, pop[0].shape, fill = np.nan, dtype = "float32")
+                label[name] = grid[rows, cols]
+
+            labels.append(pd.DataFrame(label))
+
+    columns = ["adm2_idx", "longitude", "latitude", "population", "hex_id"] + list(layers)
+    labels  = pd.concat(labels, ignore_index = True) if labels else pd.DataFrame({name: [] for name in columns})
+
+    # Same layout as `get_point_labels`
+    adm2_idx  = labels.adm2_idx.values.astype(np.int64)
+    adm2_code = np.where(adm2_idx >= 0, codes[np.maximum(adm2_idx, 0)], -1)
+
+    labels_ = pd.DataFrame({
+        "ADM2_PCODE": pd.Categorical.from_codes(adm2_code, categories = pcodes),
+        "hex_id"    : labels.hex_id.values.astype(np.uint64)
+    })
+    for name in layers:
+        labels_[name] = labels[name].values == 1 if name == "covered" else labels[name].values
+    labels_["population"] = labels.population.values
+
+    return labels_
+
+def get_coverage_features(coverage):
+    """
+    creates the coverage features from total and covered population
+
+    Parameters
+    ----------
+    coverage : pandas.DataFrame
+        dataframe with `pop_tot` and `pop_cov`
+
+    Returns
+    ----------
+    pandas.DataFrame
+        dataframe with `pop_cov`, `pop_uncov`, `per_cov` and `per_uncov`
+    """
+
+    coverage["pop_cov"]   = coverage.pop_cov.fillna(0)
+    coverage["pop_uncov"] = coverage.pop_tot   - coverage.pop_cov
+    coverage["per_cov"]   = coverage.pop_cov   * 100 / coverage.pop_tot
+    coverage["per_uncov"] = coverage.pop_uncov * 100 / coverage.pop_tot
+
+    return coverage
+
+def get_coverage(labels, adm2_shp, bands = None):
+    """
+    calculates the coverage by admin-2 level and H3 cell
+    from the population point labels with grouped sums
+
+    Parameters
+    ----------
+    labels : pandas.DataFrame
+        dataframe from `get_point_labels`
+    adm2_shp : geopandas.GeoDataFrame
+        admin-2 shapefile with `ADM2_PCODE`
+    bands : dict, optional
+        dictionary with minutes by profile {profile: [minutes]}
+        if provided, coverage is calculated for every profile and minute
+        using the `band_{profile}` labels (default is None)
+
+    Returns
+    ----------
+    geopandas.GeoDataFrame
+        geo pandas dataframe with coverage at admin-2 and H3
+        with `profile` and `minute` columns when `bands` is provided
+    """
+
+    # Covered points by threshold
+    population = np.nan_to_num(labels.population.values)
+    if bands is None:
+        covered = [(None, None, labels.covered.values)]
+    else:
+        covered = [(profile, minute, labels[f"band_{profile}"].values <= minute)
+                   for profile, minutes in bands.items() for minute in sorted(minutes)]
+
+    # Groups: admin-2 codes and H3 cells
+    pcodes         = labels.ADM2_PCODE.cat.categories
+    adm2_code      = labels.ADM2_PCODE.cat.codes.values
+    inside         = adm2_code >= 0
+    cells, inverse = np.unique(labels.hex_id.values, return_inverse = True)
+    inverse        = inverse.ravel()
+
+        # Totals
+    adm2_n   = np.bincount(adm2_code[inside], minlength = len(pcodes))
+    adm2_tot = np.bincount(adm2_code[inside], weights = population[inside], minlength = len(pcodes))
+    h3_tot   = np.bincount(inverse, weights = population, minlength = len(cells))
+    h3_ids   = get_h3_string(cells)
+    h3_geom  = get_h3_geometry(cells)
+
+    # Coverage by threshold
+    adm2_coverage = []
+    h3_coverage   = []
+    for profile, minute, mask in covered:
+        pop_cov = np.where(mask, population, 0)
+
+        # Coverage at admin-2 level
+        #--------------------------------------------------------
+        pop_adm2 = pd.DataFrame({
+            "ADM2_PCODE": pcodes,
+            "pop_tot"   : adm2_tot,
+            "pop_cov"   : np.bincount(adm2_code[inside], weights = pop_cov[inside], minlength = len(pcodes))
+        })
+        pop_adm2 = pop_adm2[adm2_n > 0]
+
+            # Coverage map
+        adm2_ = adm2_shp.copy()
+        adm2_ = adm2_.merge(pop_adm2, on = "ADM2_PCODE", how = "left")
+        adm2_ = get_coverage_features(adm2_)
+
+        # Coverage at H3 cell
+        #--------------------------------------------------------
+        h3_ = pd.DataFrame({"hex_id": h3_ids, "pop_tot": h3_tot})
+        h3_ = gpd.GeoDataFrame(h3_, geometry = h3_geom, crs = "EPSG:4326")
+        h3_["pop_cov"] = np.bincount(inverse, weights = pop_cov, minlength = len(cells))
+        h3_ = get_coverage_features(h3_)
+
+        # Threshold
+        if profile is not None:
+            adm2_.insert(0, "minute" , minute)
+            adm2_.insert(0, "profile", profile)
+            h3_  .insert(0, "minute" , minute)
+            h3_  .insert(0, "profile", profile)
+
+        adm2_coverage.append(adm2_)
+        h3_coverage  .append(h3_)
+
+    # Master tables
+    adm2_coverage = pd.concat(adm2_coverage, ignore_index = True).pipe(gpd.GeoDataFrame)
+    h3_coverage   = pd.concat(h3_coverage  , ignore_index = True).pipe(gpd.GeoDataFrame)
+
+    return adm2_coverage, h3_coverage
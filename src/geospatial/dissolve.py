@@ -0,0 +1,169 @@
+import struct
+import hashlib
+
+import numpy as np
+import geopandas as gpd
+import shapely
+
+from ..utilities.cache import DiskCache, get_cache_key
+
+# On-disk coverage mask cache (created on first use)
+mask_cache = None
+
+def get_mask_cache(max_size = 2**30):
+    """
+    gets the on-disk cache of dissolved coverage masks
+
+    Parameters
+    ----------
+    max_size : int, optional
+        maximum size of the cache in bytes (default is 1 GB)
+
+    Returns
+    ----------
+    DiskCache
+        coverage mask cache, with `stats()` for hit/miss counters and `clear()` for invalidation
+    """
+
+    global mask_cache
+    if mask_cache is None:
+        mask_cache = DiskCache("coverage_masks", max_size = max_size)
+
+    return mask_cache
+
+def get_subdivided(geometry, max_vertices = 256, tile_size = 0.5):
+    """
+    splits a geometry into small pieces by recursive halving of their bounding box
+    until every piece has at most `max_vertices` and fits in a `tile_size` square
+
+    Parameters
+    ----------
+    geometry : shapely.Geometry
+        polygon or multipolygon
+    max_vertices : int, optional
+        maximum number of vertices per piece (default is 256)
+    tile_size : float, optional
+        maximum width and height per piece in degrees (default is 0.5)
+
+    Returns
+    ----------
+    list
+        list of shapely polygons
+    """
+
+    pieces = []
+    stack  = list(shapely.get_parts(geometry))
+    while stack:
+        piece = stack.pop()
+        xmin, ymin, xmax, ymax = piece.bounds
+        width, height = xmax - xmin, ymax - ymin
+
+        # Small enough
+        if shapely.get_num_coordinates(piece) <= max_vertices and max(width, height) <= tile_size:
+            pieces.append(piece)
+            continue
+
+        # Split the longest side in two
+        if width >= height:
+            halves = [shapely.clip_by_rect(piece, xmin, ymin, xmin + width / 2, ymax),
+                      shapely.clip_by_rect(piece, xmin + width / 2, ymin, xmax, ymax)]
+        else:
+            halves = [shapely.clip_by_rect(piece, xmin, ymin, xmax, ymin + height / 2),
+                      shapely.clip_by_rect(piece, xmin, ymin + height / 2, xmax, ymax)]
+
+        for half in halves:
+            stack.extend(part for part in shapely.get_parts(half) if part.geom_type == "Polygon" and not part.is_empty)
+
+    return pieces
+
+def get_coverage_mask(isochrones, max_vertices = 256, tile_size = 0.5):
+    """
+    dissolves overlapping isochrones into one coverage layer of small, bbox-friendly tiles
+    point-in-coverage queries then only touch a few small polygons
+
+    Parameters
+    ----------
+    isochrones : geopandas.GeoDataFrame
+        isochrone polygons
+    max_vertices : int, optional
+        maximum number of vertices per tile (default is 256)
+    tile_size : float, optional
+        maximum width and height per tile in degrees (default is 0.5)
+
+    Returns
+    ----------
+    geopandas.GeoDataFrame
+        geo pandas dataframe with non-overlapping coverage tiles
+    """
+
+    if len(isochrones) == 0:
+        return gpd.GeoDataFrame(geometry = [], crs = "EPSG:4326")
+
+    # Valid polygons
+    geometry = isochrones.geometry.values
+    geometry = np.where(shapely.is_valid(geometry), geometry, shapely.make_valid(geometry))
+
+    # Tree-based (cascaded) union
+    union = shapely.union_all(geometry)
+
+    # Subdivision
+    pieces = get_subdivided(union, max_vertices, tile_size)
+    mask   = gpd.GeoDataFrame(geometry = pieces, crs = isochrones.crs or "EPSG:4326")
+
+    return mask
+
+def get_coverage_mask_country(code, amenity, profile, minute, isochrones, cache = True, **kwargs):
+    """
+    dissolves the isochrones of a country into a coverage mask (see `get_coverage_mask`)
+    masks are cached per country, amenity, profile and minute and rebuilt if the isochrones change
+
+    Parameters
+    ----------
+    code : str
+        country isoalpha3 code
+    amenity : str
+        amenity name
+    profile : str
+        routing profile
+    minute : int
+        distance in minutes from facility
+    isochrones : geopandas.GeoDataFrame
+        isochrone polygons
+    cache : bool, optional
+        read and store the mask in the on-disk cache (default is True)
+    **kwargs
+        options passed to `get_coverage_mask`
+
+    Returns
+    ----------
+    geopandas.GeoDataFrame
+        geo pandas dataframe with non-overlapping coverage tiles
+    """
+
+    if len(isochrones) == 0:
+        return get_coverage_mask(isochrones)
+
+    # Key and fingerprint of the isochrones
+    key = get_cache_key(code = code, amenity = amenity, profile = profile, minute = minute, **kwargs)
+    tag = hashlib.sha256(b"".join(shapely.to_wkb(isochrones.geometry.values))).hexdigest()
+
+    # Cached mask
+    if cache:
+        value = get_mask_cache().get(key, tag = tag)
+        if value is not None:
+            n       = struct.unpack_from("<I", value)[0]
+            lengths = np.frombuffer(value, dtype = "<u4", count = n, offset = 4)
+            offsets = 4 + 4 * n + np.concatenate([[0], np.cumsum(lengths, dtype = np.int64)])
+            pieces  = shapely.from_wkb([value[i:j] for i, j in zip(offsets[:-1], offsets[1:])])
+            return gpd.GeoDataFrame(geometry = pieces, crs = "EPSG:4326")
+
+    # Dissolve
+    mask = get_coverage_mask(isochrones, **kwargs)
+
+    # Store as count, WKB lengths and WKB
+    if cache:
+        wkb   = shapely.to_wkb(mask.geometry.values)
+        value = struct.pack("<I", len(wkb)) + np.array([len(x) for x in wkb], dtype = "<u4").tobytes() + b"".join(wkb)
+        get_mask_cache().set(key, value, tag = tag)
+
+    return mask
@@ -0,0 +1,254 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+import h3.api.numpy_int as h3_int
+
+# Vectorized H3 functions live in `h3.unstable` (h3 < 4)
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+    try:
+        from h3.unstable import vect as h3_vect
+    except ImportError:
+        h3_vect = None
+
+def get_h3_index(lat, lon, resolution = 6):
+    """
+    calculates the H3 cell for arrays of latitude and longitude in one call
+
+    Parameters
+    ----------
+    lat,lon : array-like
+        latitude, longitude in degrees (EPSG:4326)
+    resolution : int, optional
+        H3 resolution (default is 6)
+        https://h3geo.org/docs/core-library/restable/
+
+    Returns
+    ----------
+    numpy.ndarray
+        array of H3 cells as unsigned 64-bit integers
+    """
+
+    # Inputs as contiguous float arrays
+    lat = np.ascontiguousarray(lat, dtype = np.float64)
+    lon = np.ascontiguousarray(lon, dtype = np.float64)
+
+    # Batched index
+    if h3_vect is not None:
+        return h3_vect.geo_to_h3(lat, lon, resolution)
+
+    # Fallback: element-wise index without pandas overhead
+    index = np.frompyfunc(lambda y, x: h3_int.geo_to_h3(y, x, resolution), 2, 1)
+    return index(lat, lon).astype(np.uint64)
+
+def get_h3_grid(transform, rows, cols, resolution = 6, block = 8):
+    """
+    calculates the H3 cell of grid cells (cell centers) on a north-up grid
+    blocks of `block` x `block` cells whose four corners are in the same H3 cell take it without
+    indexing their cells (H3 cells are convex), only cells of blocks crossing an H3 edge are indexed
+
+    Parameters
+    ----------
+    transform : affine.Affine
+        grid transform
+    rows,cols : numpy.ndarray
+        row and column of the cells
+    resolution : int, optional
+        H3 resolution (default is 6)
+    block : int, optional
+        block size in cells (default is 8)
+
+    Returns
+    ----------
+    numpy.ndarray
+        array of H3 cells as unsigned 64-bit integers
+    """
+
+    t    = transform
+    rows = np.asarray(rows, dtype = np.int64)
+    cols = np.asarray(cols, dtype = np.int64)
+    lat  = t.f + (rows + 0.5) * t.e
+    lon  = t.c + (cols + 0.5) * t.a
+    if len(rows) == 0:
+        return get_h3_index(lat, lon, resolution)
+
+    # Blocks spanned by the cells, fewer corners than cells or every cell is indexed
+    brow, bcol    = rows // block, cols // block
+    row0, col0    = brow.min(), bcol.min()
+    height, width = brow.max() - row0 + 1, bcol.max() - col0 + 1
+    if (height + 1) * (width + 1) >= len(rows):
+        return get_h3_index(lat, lon, resolution)
+
+    # H3 cell of the block corners (grid lines every `block` cells)
+    corner_lat = t.f + (row0 + np.arange(height + 1)) * block * t.e
+    corner_lon = t.c + (col0 + np.arange(width + 1))  * block * t.a
+    corners    = get_h3_index(np.repeat(corner_lat, width + 1), np.tile(corner_lon, height + 1), resolution)
+    corners    = corners.reshape(height + 1, width + 1)
+    uniform    = ((corners[:-1, :-1] == corners[:-1, 1:]) & (corners[:-1, :-1] == corners[1:, :-1]) &
+                  (corners[:-1, :-1] == corners[1:, 1:]))
+
+    # Cells of uniform blocks take the corner cell, the others are indexed
+    i, j    = brow - row0, bcol - col0
+    hex_ids = corners[i, j]
+    mixed   = ~uniform[i, j]
+    hex_ids[mixed] = get_h3_index(lat[mixed], lon[mixed], resolution)
+
+    return hex_ids
+
+def get_h3_string(hex_ids):
+    """
+    converts H3 cells from unsigned 64-bit integers to hexadecimal strings
+
+    Parameters
+    ----------
+    hex_ids : array-like
+        array of H3 cells as unsigned 64-bit integers
+
+    Returns
+    ----------
+    numpy.ndarray
+        array of H3 cells as strings (e.g. '86672b9afffffff')
+    """
+
+    return np.array([format(int(x), "x") for x in hex_ids], dtype = object)
+
+def get_h3_integer(hex_ids):
+    """
+    converts H3 cells from hexadecimal strings to unsigned 64-bit integers
+    (integer input is returned as is)
+    """
+
+    hex_ids = np.asarray(hex_ids)
+    if hex_ids.dtype.kind in "OUS":
+        hex_ids = np.array([int(x, 16) for x in hex_ids], dtype = np.uint64)
+
+    return hex_ids.astype(np.uint64)
+
+def get_h3_parent(hex_ids, resolution):
+    """
+    calculates the parent cell of an array of H3 cells
+
+    Parameters
+    ----------
+    hex_ids : array-like
+        array of H3 cells as unsigned 64-bit integers
+    resolution : int
+        parent resolution, not finer than the cells
+
+    Returns
+    ----------
+    numpy.ndarray
+        array of parent cells as unsigned 64-bit integers
+    """
+
+    hex_ids = np.ascontiguousarray(hex_ids, dtype = np.uint64)
+    if h3_vect is not None:
+        return h3_vect.h3_to_parent(hex_ids, resolution)
+
+    parent = np.frompyfunc(lambda x: h3_int.h3_to_parent(x, resolution), 1, 1)
+    return parent(hex_ids).astype(np.uint64)
+
+def get_h3_cells(hex_ids, resolution):
+    """
+    expresses a set of H3 cells at another resolution
+    coarser cells are replaced by their children and finer cells by their parents
+
+    Parameters
+    ----------
+    hex_ids : array-like
+        array of H3 cells as unsigned 64-bit integers or strings
+    resolution : int
+        target resolution
+
+    Returns
+    ----------
+    numpy.ndarray
+        sorted array of unique cells at `resolution` as unsigned 64-bit integers
+    """
+
+    cells = []
+    for hex_id in np.unique(get_h3_integer(hex_ids)):
+        resolution_ = h3_int.h3_get_resolution(hex_id)
+        if resolution_ > resolution:
+            cells.append([h3_int.h3_to_parent(hex_id, resolution)])
+        elif resolution_ < resolution:
+            cells.append(h3_int.h3_to_children(hex_id, resolution))
+        else:
+            cells.append([hex_id])
+
+    if len(cells) == 0:
+        return np.array([], dtype = np.uint64)
+
+    # Cast each part: uint64 with int64 children would be promoted to float64 and lose precision
+    return np.unique(np.concatenate([np.asarray(part).astype(np.uint64) for part in cells]))
+
+def get_h3_geometry(hex_ids):
+    """
+    builds the hexagon (or pentagon) boundaries for an array of H3 cells
+    as one vectorized array of shapely polygons
+
+    Parameters
+    ----------
+    hex_ids : array-like
+        array of H3 cells as unsigned 64-bit integers or strings
+
+    Returns
+    ----------
+    numpy.ndarray
+        array of shapely polygons (lon-lat) aligned with `hex_ids`
+    """
+
+    # H3 cells as integers
+    hex_ids = get_h3_integer(hex_ids)
+
+    if len(hex_ids) == 0:
+        return np.array([], dtype = object)
+
+    # Closed rings as (lon, lat), pentagons have one vertex less
+    rings   = [h3_int.h3_to_geo_boundary(x, geo_json = True) for x in hex_ids]
+    coords  = np.concatenate([np.asarray(ring) for ring in rings])
+    indices = np.repeat(np.arange(len(rings)), [len(ring) for ring in rings])
+
+    # Vectorized geometry construction
+    rings = shapely.linearrings(coords, indices = indices)
+
+    return shapely.polygons(rings)
+
+def get_h3_population(data, resolution = 6, value = "population"):
+    """
+    collapses population points into H3 cells
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        dataframe with `latitude`, `longitude` and population column
+    resolution : int, optional
+        H3 resolution (default is 6)
+    value : str or list, optional
+        name of the population column or list of columns, e.g. all groups
+        from `get_population_groups`, aggregated in one pass (default is `population`)
+
+    Returns
+    ----------
+    geopandas.GeoDataFrame
+        geo pandas dataframe with `hex_id`, population column(s) and hexagon `geometry`
+    """
+
+    # Calculate H3 cells per population points
+    hex_ids = get_h3_index(data["latitude"].values, data["longitude"].values, resolution)
+
+    # Collapse by H3
+    cells, inverse = np.unique(hex_ids, return_inverse = True)
+    values         = [value] if isinstance(value, str) else list(value)
+    total          = {name: np.bincount(inverse.ravel(), weights = np.nan_to_num(data[name].values), minlength = len(cells))
+                      for name in values}
+
+    # Hexagons
+    h3_data = pd.DataFrame({"hex_id": get_h3_string(cells), **total})
+    h3_data = gpd.GeoDataFrame(h3_data, geometry = get_h3_geometry(cells), crs = "EPSG:4326")
+
+    return h3_data
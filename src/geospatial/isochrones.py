@@ -1,4 +1,89 @@
-def get_isochrone(lon, lat, minute, profile, generalize = 500):
+import os
+import time
+import random
+import asyncio
+import datetime
+import email.utils
+import concurrent.futures
+
+import aiohttp
+import requests
+import geopandas as gpd
+
+from .clusters import get_facility_clusters
+from .routing  import get_isochrones_osm
+from ..utilities.cache import DiskCache, get_cache_key
+
+# Mapbox isochrone API
+# Default rate limit is 300 requests per minute
+# https://docs.mapbox.com/api/navigation/isochrone/
+MAPBOX_URL   = "https://api.mapbox.com/isochrone/v1/mapbox/"
+MAX_CONTOURS = 4
+
+# On-disk isochrone cache (created on first use)
+isochrone_cache = None
+
+def get_isochrone_cache(max_size = 2**30):
+    """
+    gets the on-disk isochrone cache shared by `get_isochrone` and `get_isochrones_country`
+    
+    Parameters
+    ----------
+    max_size : int, optional
+        maximum size of the cache in bytes (default is 1 GB)
+    
+    Returns
+    ----------
+    DiskCache
+        isochrone cache, with `stats()` for hit/miss counters and `clear()` for invalidation
+    """
+    
+    global isochrone_cache
+    if isochrone_cache is None:
+        isochrone_cache = DiskCache("isochrones", max_size = max_size)
+    
+    return isochrone_cache
+
+def get_isochrone_key(lon, lat, minute, profile, generalize = 500, base_url = MAPBOX_URL):
+    """
+    creates the cache key of an isochrone from rounded lon-lat (~1 m), routing parameters and endpoint
+    facilities that move get a new key and are requested again,
+    isochrones from other endpoints than Mapbox (e.g. a local stand-in) never share keys with Mapbox ones
+    """
+    
+    endpoint = {} if base_url == MAPBOX_URL else {"base_url": base_url}
+    
+    return get_cache_key(lon = round(float(lon), 5), lat = round(float(lat), 5), 
+                         minute = minute, profile = profile, generalize = generalize, **endpoint)
+
+def get_contours(features, minutes):
+    """
+    splits the features of a multi-contour response by minute
+    each feature is tagged with its `minute`
+    
+    Parameters
+    ----------
+    features : list
+        list of GeoJSON features with `contour` property
+    minutes : list
+        list of requested minutes
+    
+    Returns
+    ----------
+    dict
+        dictionary with list of features by minute {minute: [features]}
+    """
+    
+    contours = {minute: [] for minute in minutes}
+    for feature in features:
+        minute = feature.get("properties", {}).get("contour")
+        if minute in contours:
+            feature["properties"]["minute"] = minute
+            contours[minute].append(feature)
+    
+    return contours
+
+def get_isochrone(lon, lat, minute, profile, generalize = 500, cache = True):
     """
     calculates the individual isochrones based on lat-lon
     for more detail on the API options, refer to the following link:
@@ -8,8 +93,9 @@ def get_isochrone(lon, lat, minute, profile, generalize = 500):
     ----------
     lat,lon : float
         latitude, longitude
-    minute : int 
+    minute : int or list
         distance in minutes from facility 
+        a list of minutes is requested as one multi-contour call (up to 4 per call)
     profile : str
         routing profile, including:
             walking
@@ -17,33 +103,267 @@ def get_isochrone(lon, lat, minute, profile, generalize = 500):
             driving
     generalize : int, optional
         tolerance for Douglas-Peucker generalization in meters (default is 500)
+    cache : bool, optional
+        read and store the isochrone in the on-disk cache (default is True)
         
     Returns
     ----------
     geopandas.GeoDataFrame
         geo pandas dataframe with isochrone for each latitude and longitude points
+        one row per minute, tagged with `minute`
     """
     
-    # Define url 
-    token = os.environ.get("access_token_dp")
-    url   = "https://api.mapbox.com/isochrone/v1/mapbox/"
-    url   = f'{url}{profile}/{lon},{lat}?contours_minutes={minute}&generalize={generalize}&polygons=true&access_token={token}'
+    # Minutes and cached isochrones
+    minutes    = sorted(set(minute)) if isinstance(minute, (list, tuple, set)) else [minute]
+    keys       = {minute_: get_isochrone_key(lon, lat, minute_, profile, generalize) for minute_ in minutes}
+    isochrones = {minute_: get_isochrone_cache().get_json(keys[minute_]) if cache else None for minute_ in minutes}
+    missing    = [minute_ for minute_ in minutes if isochrones[minute_] is None]
     
-    # Request isochrones
-    response = requests.get(url).json()
+    # Request missing minutes, up to 4 contours per request
+    token = os.environ.get("access_token_dp")
+    for n in range(0, len(missing), MAX_CONTOURS):
+        contours = missing[n:n + MAX_CONTOURS]
+        
+        # Define url 
+        url = MAPBOX_URL
+        url = f'{url}{profile}/{lon},{lat}?contours_minutes={",".join(map(str, contours))}&generalize={generalize}&polygons=true&access_token={token}'
+        
+        # Request isochrones
+        try: 
+            response = requests.get(url).json()
+            features = get_contours(response['features'], contours)
+        except:
+            continue
+        
+        for minute_, features_ in features.items():
+            isochrones[minute_] = features_
+            if cache:
+                get_isochrone_cache().set_json(keys[minute_], features_)
     
     # Create GeoDataframe and append results 
-    try: 
-        features  = response['features']
-        isochrone = gpd.GeoDataFrame.from_features(features)
-    except:
-        isochrone = gpd.GeoDataFrame()
+    features  = [feature for minute_ in minutes for feature in (isochrones[minute_] or [])]
+    isochrone = gpd.GeoDataFrame.from_features(features) if len(features) > 0 else gpd.GeoDataFrame()
     
     return isochrone
 
-def get_isochrones_country(code, data, minute, profile):
+class RateLimiter:
+    """
+    spaces requests evenly to stay within a requests-per-minute budget
+    
+    Parameters
+    ----------
+    requests_per_minute : int
+        maximum number of requests per minute
+    """
+    
+    def __init__(self, requests_per_minute):
+        self.interval = 60 / requests_per_minute
+        self.next_    = 0
+        self.lock     = asyncio.Lock()
+    
+    async def wait(self):
+        # Reserve the next slot and sleep until it starts
+        async with self.lock:
+            now        = time.monotonic()
+            delay      = self.next_ - now
+            self.next_ = max(now, self.next_) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+def get_retry_after(value):
+    """
+    converts a `Retry-After` header (seconds or HTTP date) into seconds to wait
+    
+    Returns
+    ----------
+    float
+        seconds to wait (None if missing or not valid)
+    """
+    
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo = datetime.timezone.utc)
+    
+    return max((date - datetime.datetime.now(datetime.timezone.utc)).total_seconds(), 0)
+
+async def fetch_isochrone(session, limiter, lon, lat, minute, profile, generalize = 500, 
+                          base_url = MAPBOX_URL, retries = 5, backoff = 1):
+    """
+    requests one isochrone with retries and exponential backoff on 429/5xx
+    
+    Parameters
+    ----------
+    session : aiohttp.ClientSession
+        persistent HTTP session (connection pool)
+    limiter : RateLimiter
+        shared requests-per-minute budget
+    lat,lon : float
+        latitude, longitude
+    minute : int or list
+        distance in minutes from facility (up to 4 minutes)
+    profile : str
+        routing profile (walking, cycling, driving)
+    generalize : int, optional
+        tolerance for Douglas-Peucker generalization in meters (default is 500)
+    base_url : str, optional
+        isochrone API URL (default is Mapbox)
+    retries : int, optional
+        maximum number of retries (default is 5)
+    backoff : float, optional
+        initial backoff in seconds, doubled after each retry (default is 1)
+        
+    Returns
+    ----------
+    list
+        list of GeoJSON features (None if the request failed)
+    """
+    
+    # Define url 
+    url    = f"{base_url}{profile}/{lon},{lat}"
+    minute = minute if isinstance(minute, (list, tuple)) else [minute]
+    params = {"contours_minutes": ",".join(map(str, minute)),
+              "generalize"      : str(generalize),
+              "polygons"        : "true",
+              "access_token"    : os.environ.get("access_token_dp", "")}
+    
+    # Request isochrones
+    for attempt in range(retries + 1):
+        await limiter.wait()
+        try:
+            async with session.get(url, params = params) as response:
+                if response.status == 200:
+                    content = await response.json(content_type = None)
+                    return content.get("features", [])
+                
+                # Client errors other than rate limit are not retried
+                if response.status != 429 and response.status < 500:
+                    return None
+                
+                # Honor `Retry-After` when provided (seconds or HTTP date)
+                wait = get_retry_after(response.headers.get("Retry-After"))
+                wait = wait if wait is not None else backoff * 2 ** attempt
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            wait = backoff * 2 ** attempt
+        
+        if attempt < retries:
+            await asyncio.sleep(wait + random.uniform(0, backoff))
+    
+    return None
+
+async def fetch_isochrones(data, minute, profile, generalize = 500, base_url = MAPBOX_URL, 
+                           requests_per_minute = 300, max_connections = 20, retries = 5, 
+                           backoff = 1, timeout = 30, cache = True, columns = ("amenity",)):
+    """
+    requests the isochrones for all facilities concurrently 
+    within a requests-per-minute budget
+    
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        facilities with `lon`, `lat` and `amenity`
+    minute : int or list
+        distance in minutes from facility 
+        a list of minutes is requested as multi-contour calls (up to 4 per call)
+    profile : str
+        routing profile (walking, cycling, driving)
+    generalize : int, optional
+        tolerance for Douglas-Peucker generalization in meters (default is 500)
+    base_url : str, optional
+        isochrone API URL (default is Mapbox)
+    requests_per_minute : int, optional
+        requests-per-minute budget (default is 300, Mapbox default limit)
+    max_connections : int, optional
+        size of the connection pool and maximum requests in flight (default is 20)
+    retries : int, optional
+        maximum number of retries per request (default is 5)
+    backoff : float, optional
+        initial backoff in seconds (default is 1)
+    timeout : float, optional
+        timeout per request in seconds (default is 30)
+    cache : bool, optional
+        only request facilities missing from the on-disk cache, 
+        i.e. new or moved facilities (default is True)
+    columns : tuple, optional
+        facility columns copied to their isochrones (default is `amenity`)
+         
+    Returns
+    ----------
+    geopandas.GeoDataFrame
+        geo pandas dataframe with isochrones per facility and minute, in the same order as `data`
+        `attrs["requests"]` has the number of requests, failed requests, facilities and minutes 
+        (cache hits and misses are in `get_isochrone_cache().stats()`)
+        `attrs["failed"]` lists the facilities (index in `data`, `lon`, `lat`, `minutes`) still failing after retries
+    """
+    
+    # Shared resources
+    limiter   = RateLimiter(requests_per_minute)
+    semaphore = asyncio.Semaphore(max_connections)
+    connector = aiohttp.TCPConnector(limit = max_connections)
+    timeout   = aiohttp.ClientTimeout(total = timeout)
+    
+    async def fetch_(i, x, y, contours):
+        async with semaphore:
+            features = await fetch_isochrone(session, limiter, x, y, contours, profile, generalize, 
+                                             base_url, retries, backoff)
+        return i, contours, features
+    
+    # Minutes and cached isochrones by facility
+    minutes    = sorted(set(minute)) if isinstance(minute, (list, tuple, set)) else [minute]
+    keys       = [{minute_: get_isochrone_key(x, y, minute_, profile, generalize, base_url) for minute_ in minutes} 
+                  for x, y in zip(data.lon, data.lat)]
+    isochrones = [{minute_: get_isochrone_cache().get_json(key[minute_]) if cache else None for minute_ in minutes} 
+                  for key in keys]
+    
+    # Request missing minutes (multi-contour) and stream results as they complete
+    async with aiohttp.ClientSession(connector = connector, timeout = timeout) as session:
+        tasks = []
+        for i, (x, y) in enumerate(zip(data.lon, data.lat)):
+            missing = [minute_ for minute_ in minutes if isochrones[i][minute_] is None]
+            for n in range(0, len(missing), MAX_CONTOURS):
+                tasks.append(fetch_(i, x, y, missing[n:n + MAX_CONTOURS]))
+        
+        failed = []
+        for task in asyncio.as_completed(tasks):
+            i, contours, features = await task
+            if features is None:
+                failed.append((i, contours))
+                continue
+            for minute_, features_ in get_contours(features, contours).items():
+                if cache:
+                    get_isochrone_cache().set_json(keys[i][minute_], features_)
+                isochrones[i][minute_] = features_
+    
+    # Tag facilities
+    isochrones = [[feature for minute_ in minutes for feature in (features[minute_] or [])] for features in isochrones]
+    tags = data[list(columns)].to_dict("records")
+    for i, features in enumerate(isochrones):
+        for feature in features:
+            feature["properties"] = {**feature.get("properties", {}), **tags[i]}
+    
+    # Master table 
+    features   = [feature for features in isochrones for feature in features]
+    isochrones = gpd.GeoDataFrame.from_features(features) if len(features) > 0 else gpd.GeoDataFrame()
+    isochrones.attrs["requests"] = {"requests": len(tasks), "failed": len(failed), "facilities": len(keys), "minutes": len(minutes)}
+    isochrones.attrs["failed"]   = [{"index": data.index[i], "lon": float(data.lon.iloc[i]), "lat": float(data.lat.iloc[i]), "minutes": contours} 
+                                    for i, contours in sorted(failed)]
+    
+    return isochrones
+
+def get_isochrones_country(code, data, minute, profile, distance = None, engine = "mapbox", network = None, **kwargs):
     """
     calculates the isochrones per country based on mapbox API
+    requests are sent concurrently with a persistent connection pool,
+    a requests-per-minute budget and retries (see `fetch_isochrones`)
+    or offline from a local OSM road network (see `get_isochrones_osm`)
     for more detail on the API options, refer to the following link:
         https://docs.mapbox.com/playground/isochrone/
     
@@ -51,8 +371,9 @@ def get_isochrones_country(code, data, minute, profile):
     ----------
     code : str
         country isoalpha3 code
-    minute : int 
+    minute : int or list
         distance in minutes from facility 
+        a list of minutes is requested as multi-contour calls, rows are tagged with `minute`
     profile : str
         routing profile, including:
             walking
@@ -60,6 +381,19 @@ def get_isochrones_country(code, data, minute, profile):
             driving
     data : str
         data in csv format with isoalpha3 included
+    distance : float, optional
+        if provided, facilities within `distance` meters are clustered and only 
+        one representative per cluster is routed, rows are tagged with `cluster_id`
+        (see `get_facility_clusters`, default is None)
+    engine : str, optional
+        isochrone engine, including:
+            mapbox: Mapbox isochrone API (default)
+            osm   : local OSM road network, requires `network`
+    network : dict, optional
+        road network from `get_road_network` for the same profile (default is None)
+    **kwargs
+        options passed to `fetch_isochrones` (e.g. `requests_per_minute`, `base_url`)
+        or `get_isochrones_osm`
          
     Returns
     ----------
@@ -71,15 +405,27 @@ def get_isochrones_country(code, data, minute, profile):
     data = data[data.isoalpha3 == code]
     data = data[~data.lat.isna()]
     
+    # Route one representative per cluster of nearby facilities
+    if distance is not None:
+        data, _ = get_facility_clusters(data, distance)
+        kwargs.setdefault("columns", ("amenity", "cluster_id", "n_facilities"))
+    
+    # Offline engine: all facilities in one graph pass
+    if engine == "osm":
+        return get_isochrones_osm(data, minute, profile, network, **kwargs)
+    
     # Get list of isochrones 
-    isochrones = []
-    for x,y,name in zip(data.lon, data.lat, data.amenity):
-        # Calculate isochrone 
-        shp_            = get_isochrone(x, y, minute, profile)
-        shp_['amenity'] = name
-        isochrones.append(shp_)
-            
-    # Master table 
-    isochrones = pd.concat(isochrones)
+    # Note: notebooks already run an event loop, use a separate thread there
+    fetch = lambda: asyncio.run(fetch_isochrones(data, minute, profile, **kwargs))
+    try:
+        running = asyncio.get_running_loop() is not None
+    except RuntimeError:
+        running = False
+    
+    if running:
+        with concurrent.futures.ThreadPoolExecutor(max_workers = 1) as executor:
+            isochrones = executor.submit(fetch).result()
+    else:
+        isochrones = fetch()
     
     return isochrones
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from affine import Affine
+
+from .raster import get_rasterized
+
+def get_polygon_index(geometries, lon, lat, size = 2048):
+    """
+    finds the first polygon containing every point, from coordinate arrays (no point geometries)
+    polygons are rasterized onto a grid over their extent: points in cells away from every boundary
+    take the polygon of their cell, only points in boundary cells are tested with `shapely.intersects_xy`
+    points on a border are inside, as with the `intersects` predicate
+
+    Parameters
+    ----------
+    geometries : array-like
+        shapely polygons (EPSG:4326), may contain missing or empty geometries
+    lon,lat : numpy.ndarray
+        longitude, latitude of the points in degrees
+    size : int, optional
+        number of grid cells along the longest side of the extent (default is 2048)
+
+    Returns
+    ----------
+    numpy.ndarray
+        index of the first polygon containing each point (-1 outside every polygon)
+    """
+
+    lon   = np.asarray(lon, dtype = np.float64)
+    lat   = np.asarray(lat, dtype = np.float64)
+    index = np.full(len(lon), -1, dtype = np.int64)
+
+    geometries = np.asarray(geometries, dtype = object)
+    ids        = np.flatnonzero(~(shapely.is_missing(geometries) | shapely.is_empty(geometries)))
+    if len(ids) == 0 or len(lon) == 0:
+        return index
+
+    # Grid over the polygons' extent
+    xmin, ymin, xmax, ymax = shapely.total_bounds(geometries[ids])
+    cell   = max(xmax - xmin, ymax - ymin, 1e-9) / size
+    shape  = (max(int(np.ceil((ymax - ymin) / cell)), 1), max(int(np.ceil((xmax - xmin) / cell)), 1))
+    grid   = Affine(cell, 0, xmin, 0, -cell, ymax)
+
+        # Polygon of every cell (by its center) and cells touched by a boundary (and their neighbours)
+    polygon = get_rasterized(geometries[ids], ids + 1, grid, shape) - 1
+    edge    = get_rasterized(shapely.boundary(geometries[ids]), np.ones(len(ids)), grid, shape,
+                             dtype = "uint8", all_touched = True) == 1
+    edge_   = edge.copy()
+    edge_[1:]     |= edge[:-1]
+    edge_[:-1]    |= edge[1:]
+    edge_[:, 1:]  |= edge[:, :-1]
+    edge_[:, :-1] |= edge[:, 1:]
+
+    # Grid lookup, points within the extent (points on its east or south side fall one cell
+    # past the grid, they are clipped to the last cell and tested exactly)
+    selected = np.flatnonzero((lon >= xmin) & (lon <= xmax) & (lat >= ymin) & (lat <= ymax))
+    rows     = np.floor((ymax - lat[selected]) / cell).astype(np.int64)
+    cols     = np.floor((lon[selected] - xmin) / cell).astype(np.int64)
+    outside  = (rows >= shape[0]) | (cols >= shape[1])
+    rows     = np.minimum(rows, shape[0] - 1)
+    cols     = np.minimum(cols, shape[1] - 1)
+    border   = edge_[rows, cols] | outside
+    index[selected[~border]] = polygon[rows[~border], cols[~border]]
+
+    # Exact test near boundaries, polygons in order (first wins), candidates by bounding box
+    todo = selected[border]
+    if len(todo) == 0:
+        return index
+
+    order = todo[np.argsort(lon[todo], kind = "stable")]
+    lon_  = lon[order]
+    shapely.prepare(geometries[ids])
+    for id_, (xmin_, ymin_, xmax_, ymax_) in zip(ids, shapely.bounds(geometries[ids])):
+        start      = np.searchsorted(lon_, xmin_, side = "left")
+        end        = np.searchsorted(lon_, xmax_, side = "right")
+        candidate  = order[start:end]
+        candidate  = candidate[(index[candidate] == -1) & (lat[candidate] >= ymin_) & (lat[candidate] <= ymax_)]
+        if len(candidate) == 0:
+            continue
+        index[candidate[shapely.intersects_xy(geometries[id_], lon[candidate], lat[candidate])]] = id_
+
+    return index
+
+def get_polygon_population(population, shp, column, value = "population"):
+    """
+    sums population points by polygon (e.g. admin units) from coordinate arrays,
+    instead of a spatial join with point geometries
+
+    Parameters
+    ----------
+    population : pandas.DataFrame
+        dataframe with `latitude`, `longitude` and population column
+    shp : geopandas.GeoDataFrame
+        polygons with an identifier column
+    column : str
+        identifier column, e.g. `ADM2_PCODE`
+    value : str, optional
+        name of the population column (default is `population`)
+
+    Returns
+    ----------
+    pandas.DataFrame
+        dataframe with `column` and `value` for the polygons with population points inside
+    """
+
+    index  = get_polygon_index(shp.geometry.values, population["longitude"].values, population["latitude"].values)
+    inside = index >= 0
+
+    data = pd.DataFrame({column: shp[column].values[index[inside]],
+                         value : population[value].values[inside]})
+
+    return data.groupby(column, sort = True).sum().reset_index()
+
+def get_point_gdf(data, crs = 4326):
+    """
+    converts a dataframe with `latitude` and `longitude` into a GeoDataFrame of points
+    only needed when geometries are part of the output
+    """
+
+    geometry = gpd.points_from_xy(data["longitude"].values, data["latitude"].values)
+    return gpd.GeoDataFrame(data, geometry = geometry, crs = crs)
@@ -0,0 +1,192 @@
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import h3.api.numpy_int as h3_int
+
+from .hexagons import get_h3_index, get_h3_parent, get_h3_integer, get_h3_string, get_h3_geometry
+
+# Finest and coarsest resolution of the pyramid
+PYRAMID_RESOLUTIONS = (9, 3)
+
+def get_h3_sums(hex_ids, values):
+    """
+    sums values by H3 cell
+
+    Returns
+    ----------
+    numpy.ndarray
+        sorted unique cells as unsigned 64-bit integers
+    numpy.ndarray
+        sum of values per cell
+    """
+
+    cells, inverse = np.unique(hex_ids, return_inverse = True)
+    return cells, np.bincount(inverse.ravel(), weights = values, minlength = len(cells))
+
+def get_h3_pyramid(data, resolutions = PYRAMID_RESOLUTIONS, value = "population"):
+    """
+    builds a pyramid of population sums by H3 cell from the finest to the coarsest resolution
+    points are indexed once at the finest resolution, every other level sums the children of the level below
+    (coarser levels follow the H3 hierarchy, which differs slightly from indexing points at that resolution)
+
+    Parameters
+    ----------
+    data : pandas.DataFrame or iterable
+        dataframe with `latitude`, `longitude` and population column
+        or an iterable of such dataframes (e.g. batches of the population store)
+    resolutions : tuple, optional
+        finest and coarsest resolution (default is 9 and 3)
+    value : str, optional
+        name of the population column (default is `population`)
+
+    Returns
+    ----------
+    pandas.DataFrame
+        dataframe with `resolution`, `hex_id` (unsigned 64-bit integer) and `population`
+        sorted by resolution and cell
+    """
+
+    finest, coarsest = resolutions
+    chunks = [data] if isinstance(data, pd.DataFrame) else data
+
+    # Finest level, chunk by chunk
+    cells, sums = [], []
+    for chunk in chunks:
+        cells_, sums_ = get_h3_sums(get_h3_index(chunk["latitude"].values, chunk["longitude"].values, finest),
+                                    np.nan_to_num(chunk[value].values.astype(np.float64)))
+        cells.append(cells_)
+        sums .append(sums_)
+
+    cells, sums = get_h3_sums(np.concatenate(cells), np.concatenate(sums)) if cells else (np.array([], dtype = np.uint64), np.array([]))
+    levels      = [(finest, cells, sums)]
+
+    # Coarser levels from the children
+    for resolution in range(finest - 1, coarsest - 1, -1):
+        cells, sums = get_h3_sums(get_h3_parent(cells, resolution), sums) if len(cells) else (cells, sums)
+        levels.append((resolution, cells, sums))
+
+    pyramid = pd.DataFrame({"resolution": np.concatenate([np.full(len(c), r, dtype = np.uint8) for r, c, _ in levels]),
+                            "hex_id"    : np.concatenate([c for _, c, _ in levels]).astype(np.uint64),
+                            "population": np.concatenate([s for _, _, s in levels])})
+
+    return pyramid.sort_values(["resolution", "hex_id"], kind = "stable").reset_index(drop = True)
+
+def write_h3_pyramid(pyramid, path, filesystem = None):
+    """
+    writes a pyramid from `get_h3_pyramid` as parquet (one row group per resolution)
+    """
+
+    with pq.ParquetWriter(path, pa.Schema.from_pandas(pyramid, preserve_index = False), filesystem = filesystem,
+                          compression = "zstd") as writer:
+        for _, level in pyramid.groupby("resolution", sort = True):
+            writer.write_table(pa.Table.from_pandas(level, preserve_index = False))
+
+    return path
+
+class H3Pyramid:
+    """
+    population queries on an H3 pyramid without touching population points
+    cells without population are 0
+
+    Parameters
+    ----------
+    pyramid : str or pandas.DataFrame
+        parquet file from `write_h3_pyramid` or dataframe from `get_h3_pyramid`
+    filesystem : pyarrow.fs.FileSystem, optional
+        filesystem of the parquet file (default is local)
+    """
+
+    def __init__(self, pyramid, filesystem = None):
+        if isinstance(pyramid, str):
+            pyramid = pq.read_table(pyramid, filesystem = filesystem).to_pandas()
+
+        # Sorted cells and sums by resolution
+        self.levels = {int(resolution): (level.hex_id.values.astype(np.uint64), level.population.values)
+                       for resolution, level in pyramid.groupby("resolution", sort = True)}
+        self.resolutions = sorted(self.levels)
+
+    def get_population(self, hex_ids):
+        """
+        population of H3 cells (any resolution of the pyramid, as integers or strings)
+
+        Returns
+        ----------
+        numpy.ndarray
+            population per cell
+        """
+
+        hex_ids    = get_h3_integer(hex_ids)
+        population = np.zeros(len(hex_ids))
+        resolution = np.array([h3_int.h3_get_resolution(x) for x in hex_ids], dtype = np.int64)
+        for resolution_ in np.unique(resolution):
+            if resolution_ not in self.levels:
+                raise ValueError(f"resolution {resolution_} is not in the pyramid ({self.resolutions})")
+
+            cells, sums = self.levels[resolution_]
+            selected    = np.flatnonzero(resolution == resolution_)
+            position    = np.minimum(np.searchsorted(cells, hex_ids[selected]), max(len(cells) - 1, 0))
+            found       = (cells[position] == hex_ids[selected]) if len(cells) else np.zeros(len(selected), dtype = bool)
+            population[selected[found]] = sums[position[found]]
+
+        return population
+
+    def get_kring(self, hex_ids, k = 1):
+        """
+        population within `k` rings of H3 cells (neighbourhood sums)
+
+        Returns
+        ----------
+        numpy.ndarray
+            population of the k-ring of each cell
+        """
+
+        hex_ids = get_h3_integer(hex_ids)
+        rings   = [h3_int.k_ring(hex_id, k) for hex_id in hex_ids]
+        sums    = self.get_population(np.concatenate(rings)) if rings else np.array([])
+
+        return np.add.reduceat(sums, np.cumsum([0] + [len(ring) for ring in rings[:-1]])) if rings else sums
+
+    def get_parent(self, hex_ids, resolution):
+        """
+        population of the parent cells at a coarser resolution (rollup)
+
+        Returns
+        ----------
+        numpy.ndarray
+            population of the parent of each cell
+        """
+
+        return self.get_population(get_h3_parent(get_h3_integer(hex_ids), resolution))
+
+    def get_children(self, hex_id, resolution):
+        """
+        population of the children of a cell at a finer resolution
+
+        Returns
+        ----------
+        pandas.DataFrame
+            dataframe with `hex_id` (string) and `population` of the populated children
+        """
+
+        children   = np.sort(h3_int.h3_to_children(int(get_h3_integer([hex_id])[0]), resolution).astype(np.uint64))
+        population = self.get_population(children)
+
+        return pd.DataFrame({"hex_id": get_h3_string(children), "population": population})[population > 0].reset_index(drop = True)
+
+    def get_level(self, resolution, geometry = True):
+        """
+        population of every populated cell at a resolution, e.g. for maps
+
+        Returns
+        ----------
+        geopandas.GeoDataFrame or pandas.DataFrame
+            dataframe with `hex_id` (string), `population` and hexagon `geometry` (if `geometry`)
+        """
+
+        cells, sums = self.levels[resolution]
+        level       = pd.DataFrame({"hex_id": get_h3_string(cells), "population": sums})
+
+        return gpd.GeoDataFrame(level, geometry = get_h3_geometry(cells), crs = "EPSG:4326") if geometry else level
@@ -0,0 +1,323 @@
+import json
+
+import numpy as np
+from affine import Affine
+
+# META population grid (1 arc-second, ~30 m)
+GRID_RESOLUTION = 1 / 3600
+
+def get_grid(lat, lon, resolution = GRID_RESOLUTION):
+    """
+    fits a regular grid to points on cell centers
+
+    Parameters
+    ----------
+    lat,lon : numpy.ndarray
+        latitude, longitude of cell centers in degrees (EPSG:4326)
+    resolution : float, optional
+        cell size in degrees (default is 1 arc-second)
+
+    Returns
+    ----------
+    affine.Affine
+        transform from (col, row) to (lon, lat) of the upper-left cell corner
+    tuple
+        grid shape (height, width)
+    numpy.ndarray
+        row of every point
+    numpy.ndarray
+        column of every point
+    """
+
+    west  = lon.min() - resolution / 2
+    north = lat.max() + resolution / 2
+    rows  = np.round((north - lat) / resolution - 0.5).astype(np.int64)
+    cols  = np.round((lon - west)  / resolution - 0.5).astype(np.int64)
+
+    transform = Affine(resolution, 0, west, 0, -resolution, north)
+
+    return transform, (int(rows.max()) + 1, int(cols.max()) + 1), rows, cols
+
+def get_tiles(rows, cols, values, tile = 256):
+    """
+    sums points into square tiles of `tile` x `tile` cells, only tiles with points are yielded
+    points are binned one strip of tiles at a time: memory is bounded by the strip, not by the country,
+    and `values` are read per strip (no copy of the whole table)
+
+    Parameters
+    ----------
+    rows,cols : numpy.ndarray
+        row and column of every point
+    values : list
+        one array per band with the value of every point (NaN counts as 0)
+    tile : int, optional
+        tile size in cells (default is 256)
+
+    Yields
+    ----------
+    tuple
+        (tile row, tile column, numpy.ndarray of shape (bands, tile, tile))
+    """
+
+    order  = np.argsort(rows, kind = "stable")
+    bounds = np.searchsorted(rows[order], np.arange(0, rows.max() + tile + 1, tile)) if len(rows) else [0]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if start == end:
+            continue
+
+        index      = order[start:end]
+        row, col   = rows[index] % tile, cols[index]
+        ids, inner = np.unique(col // tile, return_inverse = True)
+        flat       = (inner * tile + row) * tile + col % tile
+
+        strip = np.stack([np.bincount(flat, weights = np.nan_to_num(np.asarray(band[index], dtype = np.float64)),
+                                      minlength = len(ids) * tile * tile) for band in values]).astype(np.float32)
+        strip = strip.reshape(len(values), len(ids), tile, tile)
+
+        for n, tile_col in enumerate(ids):
+            yield int(rows[index[0]] // tile), int(tile_col), strip[:, n]
+
+def write_population_raster(data, path, columns = None, resolution = GRID_RESOLUTION, tile = 256):
+    """
+    converts population points on the META grid into a raster with one band per column
+    cells without population are 0, only tiles with population are stored
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        dataframe with `latitude`, `longitude` and population columns
+        (e.g. all groups from `get_population_groups`)
+    path : str
+        output file, tiled GeoTIFF (.tif) or block-sparse NumPy tiles (.npy, with a .json sidecar
+        for the transform, bands and tile positions)
+    columns : list, optional
+        population columns, one band each (default is every column but the coordinates)
+    resolution : float, optional
+        cell size in degrees (default is 1 arc-second)
+    tile : int, optional
+        tile size in cells (default is 256)
+
+    Returns
+    ----------
+    str
+        path of the raster
+    """
+
+    if len(data) == 0:
+        raise ValueError("write_population_raster: no population points")
+
+    columns = [name for name in data.columns if name not in ["latitude", "longitude"]] if columns is None else list(columns)
+    values  = [data[name].values for name in columns]
+
+    transform, shape, rows, cols = get_grid(data["latitude"].values.astype(np.float64),
+                                            data["longitude"].values.astype(np.float64), resolution)
+
+    # NumPy: memory-mapped array (tiles, bands, tile, tile) of the populated tiles only
+    if path.endswith(".npy"):
+        across = -(-shape[1] // tile)
+        keys   = np.unique((rows // tile) * across + cols // tile)
+        raster = np.lib.format.open_memmap(path, mode = "w+", dtype = np.float32, shape = (len(keys), len(columns), tile, tile))
+        for tile_row, tile_col, array in get_tiles(rows, cols, values, tile):
+            raster[np.searchsorted(keys, tile_row * across + tile_col)] = array
+        raster.flush()
+        del raster
+
+        with open(f"{path}.json", "w") as file:
+            json.dump({"transform": [transform.a, transform.b, transform.c, transform.d, transform.e, transform.f],
+                       "crs"      : "EPSG:4326",
+                       "bands"    : columns,
+                       "shape"    : list(shape),
+                       "tile"     : tile,
+                       "tiles"    : [[int(key // across), int(key % across)] for key in keys]}, file)
+
+        return path
+
+    # GeoTIFF: tiled and compressed, empty tiles are not written
+    import rasterio
+    from rasterio.windows import Window
+
+    profile = {"driver"    : "GTiff",
+               "dtype"     : "float32",
+               "count"     : len(columns),
+               "height"    : shape[0],
+               "width"     : shape[1],
+               "crs"       : "EPSG:4326",
+               "transform" : transform,
+               "tiled"     : True,
+               "blockxsize": tile,
+               "blockysize": tile,
+               "compress"  : "deflate",
+               "predictor" : 3,
+               "sparse_ok" : True,
+               "bigtiff"   : "if_safer"}
+
+    with rasterio.open(path, "w", **profile) as raster:
+        for band, name in enumerate(columns, start = 1):
+            raster.set_band_description(band, name)
+        for tile_row, tile_col, array in get_tiles(rows, cols, values, tile):
+            row0, col0 = tile_row * tile, tile_col * tile
+            height     = min(tile, shape[0] - row0)
+            width      = min(tile, shape[1] - col0)
+            raster.write(array[:, :height, :width], window = Window(col0, row0, width, height))
+
+    return path
+
+def get_rasterized(geometries, values, transform, shape, fill = 0, dtype = "int32", all_touched = False):
+    """
+    burns polygons onto a grid, a cell takes the value of the polygons containing its center
+    where polygons overlap, the first one wins
+
+    Parameters
+    ----------
+    geometries : array-like
+        shapely polygons (EPSG:4326)
+    values : array-like
+        value burnt for each polygon
+    transform : affine.Affine
+        grid transform
+    shape : tuple
+        grid shape (height, width)
+    fill : int or float, optional
+        value of cells outside every polygon (default is 0)
+    dtype : str, optional
+        grid dtype (default is int32)
+    all_touched : bool, optional
+        burn every cell touched by a geometry, not only cells with their center inside (default is False)
+
+    Returns
+    ----------
+    numpy.ndarray
+        array of shape (height, width)
+    """
+
+    from rasterio.features import rasterize
+
+    # Later shapes overwrite earlier ones: burn in reverse order
+    shapes = [(geometry, value) for geometry, value in zip(geometries, values) if geometry is not None and not geometry.is_empty][::-1]
+    if len(shapes) == 0 or shape[0] == 0 or shape[1] == 0:
+        return np.full(shape, fill, dtype = dtype)
+
+    return rasterize(shapes, out_shape = shape, transform = transform, fill = fill, dtype = dtype, all_touched = all_touched)
+
+class PopulationRaster:
+    """
+    read access to a north-up population raster (GeoTIFF or memory-mapped NumPy tiles) by windows
+    only the tiles of the requested window are read from disk
+
+    Parameters
+    ----------
+    path : str
+        raster from `write_population_raster`
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if path.endswith(".npy"):
+            with open(f"{path}.json") as file:
+                meta = json.load(file)
+            self.raster    = np.load(path, mmap_mode = "r")
+            self.transform = Affine(*meta["transform"])
+            self.crs       = meta["crs"]
+            self.bands     = meta["bands"]
+            self.shape     = tuple(meta["shape"])
+            self.tile      = meta["tile"]
+
+            # Position of every tile in the file (-1 for empty tiles)
+            self.tiles = np.full((-(-self.shape[0] // self.tile), -(-self.shape[1] // self.tile)), -1, dtype = np.int64)
+            if len(meta["tiles"]):
+                self.tiles[tuple(np.array(meta["tiles"]).T)] = np.arange(len(meta["tiles"]))
+        else:
+            import rasterio
+            self.raster    = rasterio.open(path)
+            self.transform = self.raster.transform
+            self.crs       = self.raster.crs.to_string()
+            self.bands     = list(self.raster.descriptions)
+            self.shape     = (self.raster.height, self.raster.width)
+
+    def index(self, lon, lat):
+        """
+        returns the row and column of the cells containing the points (may be outside the raster)
+        """
+
+        # North-up grid: only scale and translation
+        t   = self.transform
+        row = (np.asarray(lat, dtype = np.float64) - t.f) / t.e
+        col = (np.asarray(lon, dtype = np.float64) - t.c) / t.a
+
+        return np.floor(row).astype(np.int64), np.floor(col).astype(np.int64)
+
+    def xy(self, rows, cols):
+        """
+        returns the longitude and latitude of cell centers
+        """
+
+        t = self.transform
+        return t.c + (np.asarray(cols) + 0.5) * t.a, t.f + (np.asarray(rows) + 0.5) * t.e
+
+    def get_window(self, bbox):
+        """
+        returns the window (row offset, column offset, height, width) covering a bounding box,
+        clipped to the raster
+        """
+
+        xmin, ymin, xmax, ymax = bbox
+        (row0, row1), (col0, col1) = self.index([xmin, xmax], [ymax, ymin])
+        row0, col0 = max(row0, 0), max(col0, 0)
+        row1, col1 = min(row1 + 1, self.shape[0]), min(col1 + 1, self.shape[1])
+
+        return int(row0), int(col0), int(max(row1 - row0, 0)), int(max(col1 - col0, 0))
+
+    def read(self, bbox = None, bands = None, window = None):
+        """
+        reads a window of the raster
+
+        Parameters
+        ----------
+        bbox : tuple, optional
+            bounding box (xmin, ymin, xmax, ymax) in degrees (default is the whole raster)
+        bands : list, optional
+            band names (default is all bands)
+        window : tuple, optional
+            window (row offset, column offset, height, width), instead of `bbox`
+
+        Returns
+        ----------
+        numpy.ndarray
+            array of shape (bands, height, width)
+        affine.Affine
+            transform of the window
+        """
+
+        if window is None:
+            window = (0, 0, *self.shape) if bbox is None else self.get_window(bbox)
+        row0, col0, height, width = window
+        index = list(range(len(self.bands))) if bands is None else [self.bands.index(name) for name in bands]
+
+        if isinstance(self.raster, np.ndarray):
+            array = np.zeros((len(index), height, width), dtype = np.float32)
+            tile  = self.tile
+            for tile_row in range(row0 // tile, -(-(row0 + height) // tile)):
+                for tile_col in range(col0 // tile, -(-(col0 + width) // tile)):
+                    n = self.tiles[tile_row, tile_col]
+                    if n < 0:
+                        continue
+                    r0, r1 = max(row0, tile_row * tile), min(row0 + height, (tile_row + 1) * tile)
+                    c0, c1 = max(col0, tile_col * tile), min(col0 + width, (tile_col + 1) * tile)
+                    array[:, r0 - row0:r1 - row0, c0 - col0:c1 - col0] = \
+                        self.raster[n, index, r0 - tile_row * tile:r1 - tile_row * tile, c0 - tile_col * tile:c1 - tile_col * tile]
+        else:
+            from rasterio.windows import Window
+            array = self.raster.read([i + 1 for i in index], window = Window(col0, row0, width, height))
+
+        t = self.transform
+        return array, Affine(t.a, t.b, t.c + col0 * t.a, t.d, t.e, t.f + row0 * t.e)
+
+    def close(self):
+        if not isinstance(self.raster, np.ndarray):
+            self.raster.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
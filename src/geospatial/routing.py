@@ -0,0 +1,236 @@
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from scipy import sparse
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+
+from .clusters import METERS_PER_DEGREE
+
+# Speeds by road class (km/h) and routing profile
+# Road classes follow the `fclass` attribute of Geofabrik OSM extracts (`highway` tag in OSM)
+# https://download.geofabrik.de/osm-data-in-gis-formats-free.pdf
+PROFILE_SPEEDS = {
+    "driving": {"motorway"      : 100, "motorway_link" : 60,
+                "trunk"         : 80 , "trunk_link"    : 50,
+                "primary"       : 60 , "primary_link"  : 40,
+                "secondary"     : 50 , "secondary_link": 35,
+                "tertiary"      : 40 , "tertiary_link" : 30,
+                "unclassified"  : 30 , "residential"   : 30,
+                "living_street" : 10 , "service"       : 20,
+                "track"         : 15 , "track_grade1"  : 20,
+                "track_grade2"  : 15 , "track_grade3"  : 10,
+                "unknown"       : 20},
+    "walking": {road: 5 for road in ["primary", "primary_link", "secondary", "secondary_link",
+                                     "tertiary", "tertiary_link", "unclassified", "residential",
+                                     "living_street", "service", "track", "track_grade1",
+                                     "track_grade2", "track_grade3", "track_grade4", "track_grade5",
+                                     "pedestrian", "footway", "path", "steps", "bridleway", "unknown"]},
+    "cycling": {road: 15 for road in ["primary", "primary_link", "secondary", "secondary_link",
+                                      "tertiary", "tertiary_link", "unclassified", "residential",
+                                      "living_street", "service", "track", "track_grade1",
+                                      "track_grade2", "cycleway", "path", "unknown"]}
+}
+
+# Mean Earth radius (m)
+EARTH_RADIUS = 6_371_008.8
+
+def get_haversine(lon1, lat1, lon2, lat2):
+    """
+    calculates the great-circle distance in meters between arrays of points
+    """
+
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+def get_road_network(roads, profile, speeds = None, road_class = "fclass", oneway = "oneway"):
+    """
+    builds a routable graph from a local OSM road extract
+
+    Parameters
+    ----------
+    roads : str or geopandas.GeoDataFrame
+        path to (or dataframe of) road lines, e.g. Geofabrik `gis_osm_roads_free_1.shp`
+    profile : str
+        routing profile, including:
+            walking
+            cycling
+            driving
+    speeds : dict, optional
+        speeds by road class in km/h (default is `PROFILE_SPEEDS[profile]`)
+    road_class : str, optional
+        column with the road class (default is `fclass`)
+    oneway : str, optional
+        column with the oneway flag, `F` (forward), `T` (backward) or `B` (both),
+        only used for driving (default is `oneway`)
+
+    Returns
+    ----------
+    dict
+        road network, including:
+            lon,lat: node coordinates
+            graph  : sparse matrix with travel time in seconds between nodes
+    """
+
+    # Road lines with a speed for the profile
+    if isinstance(roads, str):
+        roads = gpd.read_file(roads)
+    speeds = PROFILE_SPEEDS[profile] if speeds is None else speeds
+    roads  = roads[roads[road_class].isin(speeds.keys())]
+    roads  = roads[roads.geometry.geom_type.isin(["LineString", "MultiLineString"])]
+    roads  = roads.explode(index_parts = False).reset_index(drop = True)
+
+    # Vertices and nodes (vertices snapped at 1e-7 degrees)
+    coords, line = shapely.get_coordinates(roads.geometry.values, return_index = True)
+    nodes, node  = np.unique(np.round(coords, 7), axis = 0, return_inverse = True)
+    node         = node.ravel()
+
+    # Edges between consecutive vertices of a line
+    same   = line[:-1] == line[1:]
+    source = node[:-1][same]
+    target = node[1:][same]
+    line   = line[:-1][same]
+
+        # Travel time in seconds
+    length = get_haversine(coords[:-1, 0][same], coords[:-1, 1][same], coords[1:, 0][same], coords[1:, 1][same])
+    speed  = roads[road_class].map(speeds).values[line] / 3.6
+    time_  = np.maximum(length / speed, 1e-3)
+
+        # Direction (OSM oneway for driving)
+    if profile == "driving" and oneway in roads.columns:
+        flag     = roads[oneway].fillna("B").values[line]
+        forward  = flag != "T"
+        backward = flag != "F"
+    else:
+        forward  = np.ones(len(line), dtype = bool)
+        backward = forward
+
+    edges = pd.DataFrame({"u"   : np.concatenate([source[forward], target[backward]]),
+                          "v"   : np.concatenate([target[forward], source[backward]]),
+                          "time": np.concatenate([time_[forward] , time_[backward]])})
+
+    # Duplicated or overlapping segments: fastest edge per node pair (COO to CSR would add them up)
+    edges = edges.groupby(["u", "v"], sort = False).time.min().reset_index()
+    graph = sparse.coo_matrix((edges.time.values, (edges.u.values, edges.v.values)), shape = (len(nodes), len(nodes))).tocsr()
+
+    return {"lon": nodes[:, 0], "lat": nodes[:, 1], "graph": graph}
+
+def get_travel_times(network, lon, lat, minute, max_snap = 1000):
+    """
+    calculates the travel time from the closest facility to every node
+    with one multi-source Dijkstra over all facilities
+
+    Parameters
+    ----------
+    network : dict
+        road network from `get_road_network`
+    lon,lat : array-like
+        facility coordinates
+    minute : int
+        maximum travel time in minutes
+    max_snap : float, optional
+        maximum distance in meters from a facility to its nearest node, farther facilities
+        are not routed (default is 1000, None for no limit)
+
+    Returns
+    ----------
+    pandas.DataFrame
+        dataframe with reached nodes, including:
+            lon,lat : node coordinates
+            minutes : travel time from the closest facility in minutes
+            facility: position of the closest facility in `lon`, `lat`
+        facilities snapped to the same node share its reached nodes (one row per facility)
+        `attrs["unsnapped"]` has the position of facilities farther than `max_snap` from the network
+    """
+
+    # Snap facilities to the nearest node (local equirectangular projection, distances in degrees of latitude)
+    lon     = np.asarray(lon, dtype = np.float64)
+    lat     = np.asarray(lat, dtype = np.float64)
+    scale   = np.cos(np.radians(np.mean(network["lat"])))
+    tree    = cKDTree(np.column_stack([network["lon"] * scale, network["lat"]]))
+    d, src  = tree.query(np.column_stack([lon * scale, lat]))
+    snapped = np.ones(len(src), dtype = bool) if max_snap is None else d * METERS_PER_DEGREE <= max_snap
+
+    # No facility on the network: nothing is reached
+    times = pd.DataFrame({"lon": [], "lat": [], "minutes": [], "facility": np.array([], dtype = np.int64)})
+    times.attrs["unsnapped"] = np.flatnonzero(~snapped).tolist()
+    if not snapped.any():
+        return times
+
+    # Multi-source Dijkstra (all facilities in one graph pass)
+    seconds, _, sources = dijkstra(network["graph"], directed = True, indices = np.unique(src[snapped]),
+                                   return_predecessors = True, limit = minute * 60, min_only = True)
+
+    # Reached nodes and every facility of their closest source node
+    reached    = np.flatnonzero(np.isfinite(seconds))
+    facilities = pd.DataFrame({"source_": src[snapped], "facility": np.flatnonzero(snapped)})
+
+    times_ = pd.DataFrame({"lon"     : network["lon"][reached],
+                           "lat"     : network["lat"][reached],
+                           "minutes" : seconds[reached] / 60,
+                           "source_" : sources[reached]})
+    times_ = times_.merge(facilities, on = "source_").drop(columns = "source_")
+    times_.attrs["unsnapped"] = times.attrs["unsnapped"]
+
+    return times_
+
+def get_isochrones_osm(data, minute, profile, network, columns = ("amenity",), ratio = 0.3, buffer = 0.001, max_snap = 1000):
+    """
+    calculates isochrones for all facilities from a local OSM road network
+    output follows the schema of `fetch_isochrones` (one row per facility and minute)
+
+    each node is assigned to its closest facility, so the union of the isochrones
+    of a country is exact while each polygon only covers the nodes its facility reaches first
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        facilities with `lon`, `lat` and `amenity`
+    minute : int or list
+        distance in minutes from facility
+    profile : str
+        routing profile (walking, cycling, driving)
+    network : dict
+        road network from `get_road_network` for the same profile
+    columns : tuple, optional
+        facility columns copied to their isochrones (default is `amenity`)
+    ratio : float, optional
+        concave hull ratio, 1 is the convex hull (default is 0.3)
+    buffer : float, optional
+        buffer around the reached nodes in degrees (default is 0.001, ~100 m)
+    max_snap : float, optional
+        maximum distance in meters from a facility to the network (default is 1000), see `get_travel_times`
+
+    Returns
+    ----------
+    geopandas.GeoDataFrame
+        geo pandas dataframe with isochrones per facility and minute
+    """
+
+    # Travel times to all nodes within the largest minute
+    minutes = sorted(set(minute)) if isinstance(minute, (list, tuple, set)) else [minute]
+    times   = get_travel_times(network, data.lon.values, data.lat.values, max(minutes), max_snap)
+
+    # Polygon per facility and minute: concave hull of reached nodes
+    isochrones = []
+    tags       = data[list(columns)].reset_index(drop = True)
+    for minute_ in minutes:
+        times_ = times[times.minutes <= minute_]
+        for facility, nodes in times_.groupby("facility"):
+            points  = shapely.multipoints(np.column_stack([nodes.lon.values, nodes.lat.values]))
+            polygon = shapely.concave_hull(points, ratio = ratio) if len(nodes) > 2 else points
+            isochrones.append({"geometry": shapely.buffer(polygon, buffer),
+                               "contour" : minute_,
+                               "minute"  : minute_,
+                               **tags.iloc[int(facility)].to_dict()})
+
+    # Master table
+    if len(isochrones) == 0:
+        return gpd.GeoDataFrame()
+
+    isochrones = gpd.GeoDataFrame(isochrones, geometry = "geometry", crs = "EPSG:4326")
+
+    return isochrones
@@ -0,0 +1,224 @@
+import os
+import json
+
+import numpy as np
+import shapely
+from affine import Affine
+
+from .raster import PopulationRaster, get_rasterized
+
+def write_population_index(raster, path, factor = 16, bands = None):
+    """
+    builds a summed-area table (integral image) of a population raster
+    over blocks of `factor` x `factor` cells, one table per band
+
+    `factor` trades table size for query cost: the table has bands x (height / factor) x (width / factor)
+    float64 entries, and queries read the cells along their edges (strips under `factor` cells wide) from
+    the raster, so a query costs O(1) table lookups plus O(perimeter x factor) cells. `factor = 1` gives
+    O(1) rectangle queries without raster reads, but an 8-byte entry per cell and band (e.g. ~150 GB per
+    band for a 140,000 x 140,000 cell country), so it only fits small rasters
+
+    Parameters
+    ----------
+    raster : str
+        population raster from `write_population_raster`
+    path : str
+        output file (.npy, with a .json sidecar)
+    factor : int, optional
+        block size in cells, 1 gives a table at full resolution (default is 16, a table
+        256 times smaller than the raster)
+    bands : list, optional
+        band names, e.g. demographic groups (default is all bands)
+
+    Returns
+    ----------
+    str
+        path of the index
+    """
+
+    source        = PopulationRaster(raster)
+    bands         = source.bands if bands is None else list(bands)
+    height, width = source.shape
+    rows, cols    = -(-height // factor), -(-width // factor)
+
+    # Table with a leading row and column of zeros: table[i, j] = sum of blocks [0, i) x [0, j)
+    table = np.lib.format.open_memmap(path, mode = "w+", dtype = np.float64, shape = (len(bands), rows + 1, cols + 1))
+    table[:, 0, :] = 0
+    table[:, :, 0] = 0
+
+    # One strip of blocks at a time
+    for row in range(rows):
+        strip, _ = source.read(bands = bands, window = (row * factor, 0, min(factor, height - row * factor), width))
+        strip    = np.pad(strip.astype(np.float64), ((0, 0), (0, factor - strip.shape[1]), (0, cols * factor - width)))
+        blocks   = strip.reshape(len(bands), factor, cols, factor).sum(axis = (1, 3))
+        table[:, row + 1, 1:] = table[:, row, 1:] + np.cumsum(blocks, axis = 1)
+
+    table.flush()
+    del table
+    source.close()
+
+    t = source.transform
+    with open(f"{path}.json", "w") as file:
+        json.dump({"raster"   : os.path.abspath(raster),
+                   "factor"   : factor,
+                   "bands"    : bands,
+                   "transform": [t.a, t.b, t.c, t.d, t.e, t.f],
+                   "shape"    : [height, width]}, file)
+
+    return path
+
+class PopulationIndex:
+    """
+    population sums over rectangles and polygons from a summed-area table
+    blocks fully inside a shape are summed in O(1) per rectangle from the table,
+    the remaining cells along the edges are read from the population raster
+
+    a cell is counted if its center is inside the shape (as in `get_raster_labels`)
+
+    Parameters
+    ----------
+    path : str
+        index from `write_population_index`
+    """
+
+    def __init__(self, path):
+        with open(f"{path}.json") as file:
+            meta = json.load(file)
+        self.table     = np.load(path, mmap_mode = "r")
+        self.raster    = PopulationRaster(meta["raster"])
+        self.factor    = meta["factor"]
+        self.bands     = meta["bands"]
+        self.transform = Affine(*meta["transform"])
+        self.shape     = tuple(meta["shape"])
+
+    def get_block_sum(self, band, row0, col0, row1, col1):
+        # Sum of blocks [row0, row1) x [col0, col1) in O(1)
+        table = self.table[band]
+        return table[row1, col1] - table[row0, col1] - table[row1, col0] + table[row0, col0]
+
+    def get_cell_sum(self, band, row0, col0, row1, col1):
+        # Sum of cells [row0, row1) x [col0, col1) read from the raster
+        if row1 <= row0 or col1 <= col0:
+            return 0.0
+        array, _ = self.raster.read(bands = [self.bands[band]], window = (row0, col0, row1 - row0, col1 - col0))
+        return float(array.sum(dtype = np.float64))
+
+    def get_cells(self, bbox):
+        # Cells [row0, row1) x [col0, col1) whose centers are inside a bounding box
+        t = self.transform
+        xmin, ymin, xmax, ymax = bbox
+        col0 = int(np.ceil((xmin - t.c) / t.a - 0.5))
+        col1 = int(np.floor((xmax - t.c) / t.a - 0.5)) + 1
+        row0 = int(np.ceil((ymax - t.f) / t.e - 0.5))
+        row1 = int(np.floor((ymin - t.f) / t.e - 0.5)) + 1
+
+        return max(row0, 0), max(col0, 0), min(row1, self.shape[0]), min(col1, self.shape[1])
+
+    def get_rectangle_sum(self, bbox, band = "total_population"):
+        """
+        population inside a bounding box
+        O(1) from the table for inner blocks, plus the cells of the four edge strips (under `factor`
+        cells wide) read from the raster, i.e. O(perimeter x factor) unless the index has `factor = 1`
+
+        Parameters
+        ----------
+        bbox : tuple
+            bounding box (xmin, ymin, xmax, ymax) in degrees
+        band : str, optional
+            band name (default is `total_population`)
+
+        Returns
+        ----------
+        float
+            population
+        """
+
+        band = self.bands.index(band)
+        f    = self.factor
+        row0, col0, row1, col1 = self.get_cells(bbox)
+        if row1 <= row0 or col1 <= col0:
+            return 0.0
+
+        # Inner blocks
+        brow0, bcol0 = -(-row0 // f), -(-col0 // f)
+        brow1, bcol1 = row1 // f, col1 // f
+        if brow1 <= brow0 or bcol1 <= bcol0:
+            return self.get_cell_sum(band, row0, col0, row1, col1)
+
+        total = self.get_block_sum(band, brow0, bcol0, brow1, bcol1)
+
+        # Edge strips (top, bottom, left, right)
+        total += self.get_cell_sum(band, row0, col0, brow0 * f, col1)
+        total += self.get_cell_sum(band, brow1 * f, col0, row1, col1)
+        total += self.get_cell_sum(band, brow0 * f, col0, brow1 * f, bcol0 * f)
+        total += self.get_cell_sum(band, brow0 * f, bcol1 * f, brow1 * f, col1)
+
+        return float(total)
+
+    def get_polygon_sum(self, polygon, band = "total_population"):
+        """
+        population inside a polygon (e.g. a buffer or catchment)
+        interior blocks are grouped into one rectangle per run of blocks in a row
+        and blocks crossed by the boundary are corrected cell by cell
+
+        Parameters
+        ----------
+        polygon : shapely.Geometry
+            polygon or multipolygon (EPSG:4326)
+        band : str, optional
+            band name (default is `total_population`)
+
+        Returns
+        ----------
+        float
+            population
+        """
+
+        band_ = self.bands.index(band)
+        f     = self.factor
+        t     = self.transform
+        row0, col0, row1, col1 = self.get_cells(polygon.bounds)
+        if row1 <= row0 or col1 <= col0:
+            return 0.0
+
+        # Block grid over the polygon bounds
+        brow0, bcol0 = row0 // f, col0 // f
+        brow1, bcol1 = -(-row1 // f), -(-col1 // f)
+        shape_       = (brow1 - brow0, bcol1 - bcol0)
+        transform    = Affine(t.a * f, 0, t.c + bcol0 * f * t.a, 0, t.e * f, t.f + brow0 * f * t.e)
+
+            # Blocks touched by the boundary and blocks inside
+        edge   = get_rasterized([polygon.boundary], [1], transform, shape_, dtype = "uint8", all_touched = True) == 1
+        inside = (get_rasterized([polygon], [1], transform, shape_, dtype = "uint8") == 1) & ~edge
+
+        # Interior: runs of consecutive blocks per row as rectangles
+        total = 0.0
+        for row in np.flatnonzero(inside.any(axis = 1)):
+            run    = np.diff(np.concatenate([[0], inside[row].astype(np.int8), [0]]))
+            starts = np.flatnonzero(run == 1)
+            ends   = np.flatnonzero(run == -1)
+            for start, end in zip(starts, ends):
+                total += self.get_block_sum(band_, brow0 + row, bcol0 + start, brow0 + row + 1, bcol0 + end)
+
+        # Edge correction: cells of boundary blocks with their center inside the polygon
+        for row in np.flatnonzero(edge.any(axis = 1)):
+            blocks     = np.flatnonzero(edge[row])
+            rr0, cc0   = (brow0 + row) * f, (bcol0 + blocks.min()) * f
+            rr1, cc1   = min(rr0 + f, self.shape[0]), min((bcol0 + blocks.max() + 1) * f, self.shape[1])
+            if rr1 <= rr0 or cc1 <= cc0:
+                continue
+
+            array, transform_ = self.raster.read(bands = [band], window = (rr0, cc0, rr1 - rr0, cc1 - cc0))
+            mask = get_rasterized([polygon], [1], transform_, array.shape[1:], dtype = "uint8") == 1
+            mask &= np.repeat(edge[row, blocks.min():blocks.max() + 1], f)[:cc1 - cc0][None, :]
+            total += float(array[0][mask].sum(dtype = np.float64))
+
+        return total
+
+    def get_sums(self, geometries, band = "total_population"):
+        """
+        population inside every geometry of an array (polygons or bounding boxes)
+        """
+
+        return np.array([self.get_polygon_sum(geometry, band) if not shapely.is_empty(geometry) else 0.0
+                         for geometry in geometries])
@@ -1,9 +1,9 @@
 """
 Import libraries
     Standard
-    Thrid-party 
+    Thrid-party (imported on first use)
     Local modules
-        Initialize the `src` package
+        Initialize the `src` package (functions are imported on first use)
 """
 
 # Standard 
@@ -12,61 +12,101 @@ import os
 import re
 import time
 from datetime import datetime
+from importlib import import_module
 import urllib
 
-# AWS and environment
-import boto3
+# Environment
 import dotenv
 
-# Data management and processing
-import numpy as np
-import pandas as pd
-import geopandas as gpd
-from sodapy import Socrata
-
-# Web scraping and requests
-import requests
-from bs4 import BeautifulSoup
-
-# Geospatial 
-import fiona
-import rasterio
-from geopandas.tools import sjoin
-from shapely.geometry import Polygon
-from h3 import geo_to_h3, h3_to_geo_boundary
-
-# Visualization
-import matplotlib.pyplot as plt
-
 # Local Application/Library Imports
-from src.processing import *
-from src.geospatial import *
-from src.utilities  import *
-from src.statistics import *
+from src import processing, geospatial, utilities, statistics
+from src.utilities.aws import get_s3_client, get_s3_resource, get_s3_bucket
 
 # Working environments
 dotenv.load_dotenv()
 sclbucket   = os.environ.get("sclbucket")
 scldatalake = os.environ.get("scldatalake")
 
-# Resources and buckets
-s3  = boto3.client('s3')
-s3_ = boto3.resource("s3")
-s3_bucket = s3_.Bucket(sclbucket)
+# Third-party libraries and objects, imported on first access
+    # {name: (module, attribute)}
+libraries = {
+    # AWS
+    "boto3"              : ("boto3", None),
+    # Data management and processing
+    "np"                 : ("numpy", None),
+    "pd"                 : ("pandas", None),
+    "gpd"                : ("geopandas", None),
+    "Socrata"            : ("sodapy", "Socrata"),
+    # Web scraping and requests
+    "requests"           : ("requests", None),
+    "BeautifulSoup"      : ("bs4", "BeautifulSoup"),
+    # Geospatial
+    "fiona"              : ("fiona", None),
+    "rasterio"           : ("rasterio", None),
+    "sjoin"              : ("geopandas.tools", "sjoin"),
+    "Polygon"            : ("shapely.geometry", "Polygon"),
+    "geo_to_h3"          : ("h3", "geo_to_h3"),
+    "h3_to_geo_boundary" : ("h3", "h3_to_geo_boundary"),
+    # Visualization
+    "plt"                : ("matplotlib.pyplot", None)
+}
+
+# Resources and buckets, created on first access
+resources = {
+    "s3"       : lambda: get_s3_client(),
+    "s3_"      : lambda: get_s3_resource(),
+    "s3_bucket": lambda: get_s3_bucket(sclbucket)
+}
 
 # Define funcionts accessible via 'from src import *'
 __all__ = [
     'get_iadb',
     'get_country_shp',
+    'clear_auxiliary_cache',
     'get_meta_url',
     'get_population',
+    'get_population_groups',
+    'get_population_raster',
+    'write_population_store',
+    'read_population_store',
+    'write_population_pyramid',
+    'read_population_pyramid',
     'get_coordinates',
     'get_isochrone',
     'get_isochrones_country',
+    'fetch_isochrones',
+    'get_isochrone_cache',
     'get_tile_url',
     'get_amenity_official',
+    'get_amenity_public',
     'get_amenity',
+    'get_ingest_manifest',
+    'get_public_records',
+    'get_conflated',
     'get_access',
+    'get_access_bands',
+    'get_h3_index',
+    'get_h3_geometry',
+    'get_h3_population',
+    'get_polygon_index',
+    'get_polygon_population',
+    'get_point_gdf',
+    'get_point_labels',
+    'get_raster_labels',
+    'get_coverage',
+    'get_facility_clusters',
+    'get_coverage_mask',
+    'get_coverage_mask_country',
+    'get_road_network',
+    'get_travel_times',
+    'get_isochrones_osm',
+    'write_population_raster',
+    'PopulationRaster',
+    'write_population_index',
+    'PopulationIndex',
+    'get_h3_pyramid',
+    'write_h3_pyramid',
+    'H3Pyramid',
     'quarter_start',
     'find_best_match',
     'calculate_stats',
@@ -80,3 +120,22 @@ __all__ = [
     'get_metadata',
     'get_data_types'
 ]
+
+def __getattr__(name):
+    # Lazy libraries, S3 resources and package functions (PEP 562)
+    if name in libraries:
+        module, attribute = libraries[name]
+        value = import_module(module)
+        value = value if attribute is None else getattr(value, attribute)
+    elif name in resources:
+        value = resources[name]()
+    else:
+        for package in [processing, geospatial, utilities, statistics]:
+            if name in package.__all__:
+                value = getattr(package, name)
+                break
+        else:
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    globals()[name] = value
+    return value
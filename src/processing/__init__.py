@@ -1,17 +1,46 @@
-from .population     import get_population, get_meta_url
-from .infrastructure import get_amenity_official, get_amenity
-from .connectivity   import get_tile_url
-from .nat_disasters  import get_desinventar, get_emdat, get_desastres
-#from .ecosystems     import 
+from importlib import import_module
+
+# Functions by module, imported on first use
+modules = {
+    ".population"      : ['get_population', 'get_population_groups', 'get_population_raster', 'get_meta_url'],
+    ".population_store": ['write_population_store', 'read_population_store',
+                           'write_population_pyramid', 'read_population_pyramid'],
+    ".infrastructure"  : ['get_amenity_official', 'get_amenity_public', 'get_amenity', 'get_ingest_manifest',
+                           'get_public_records'],
+    ".conflation"      : ['get_conflated'],
+    ".connectivity"    : ['get_tile_url'],
+    ".nat_disasters"   : ['get_desinventar', 'get_emdat', 'get_desastres']
+}
 
 __all__ = [
     'get_meta_url',
     'get_population',
+    'get_population_groups',
+    'get_population_raster',
+    'write_population_store',
+    'read_population_store',
+    'write_population_pyramid',
+    'read_population_pyramid',
     'get_amenity_official',
+    'get_amenity_public',
     'get_amenity',
+    'get_ingest_manifest',
+    'get_public_records',
+    'get_conflated',
     'get_tile_url',
     'get_desinventar',
     'get_emdat',
     'get_desastres'
 ]
-            
\ No newline at end of file
+
+def __getattr__(name):
+    # Import the module of a function on first access (PEP 562)
+    for module, names in modules.items():
+        if name in names:
+            value = getattr(import_module(module, __name__), name)
+            globals()[name] = value
+            return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
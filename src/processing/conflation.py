@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+
+from ..geospatial.clusters import get_nearby_pairs
+
+# Generic words of facility names (do not identify a facility)
+NAME_STOPWORDS = {"a", "and", "centre", "center", "centro", "clinic", "clinica", "da", "das", "de", "del", "do", "dos",
+                  "dr", "dra", "e", "el", "health", "hospital", "la", "las", "los", "medical", "medico", "of", "posto",
+                  "puesto", "salud", "sante", "saude", "the", "unidad", "unidade", "y"}
+
+def get_name_keys(names):
+    """
+    normalizes facility names for matching: without accents, punctuation and generic words (`NAME_STOPWORDS`)
+    names with only generic words keep them
+
+    Returns
+    ----------
+    pandas.Series
+        normalized names ("" if missing)
+    """
+
+    names  = pd.Series(names, dtype = "str").fillna("")
+    names  = names.str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii").str.lower()
+    names  = names.str.replace(r"[^a-z0-9]+", " ", regex = True).str.strip()
+    tokens = names.str.split()
+    keys   = tokens.map(lambda words: " ".join(word for word in words if word not in NAME_STOPWORDS))
+
+    return keys.where(keys != "", names)
+
+def get_name_similarity(keys, pairs):
+    """
+    scores name similarity of candidate pairs only (Jaccard index of character trigrams)
+
+    Parameters
+    ----------
+    keys : pandas.Series
+        normalized names from `get_name_keys`
+    pairs : numpy.ndarray
+        array of shape (n_pairs, 2) with record indices
+
+    Returns
+    ----------
+    numpy.ndarray
+        similarity in [0, 1] per pair (NaN if a name is missing)
+    """
+
+    # Trigrams of the records in a pair, once per record
+    records = np.unique(pairs)
+    grams   = dict(zip(records, [frozenset(f" {key} "[i:i + 3] for i in range(len(key))) if key else None
+                                 for key in keys.values[records]]))
+
+    similarity = np.full(len(pairs), np.nan)
+    for n, (i, j) in enumerate(pairs):
+        a, b = grams[i], grams[j]
+        if a is not None and b is not None:
+            similarity[n] = len(a & b) / len(a | b)
+
+    return similarity
+
+def get_conflated(frames, distance = 150, threshold = 0.5, snap = 25):
+    """
+    conflates facility records of several sources into one deduplicated master table
+    candidate pairs (different sources, same country, within `distance`) come from a spatial grid,
+    names are only compared for candidates, so the cost grows with the number of records, not its square
+    pairs are merged from the most similar, a facility has at most one record per source
+    records without coordinates are kept as single-record facilities
+
+    Parameters
+    ----------
+    frames : list
+        dataframes with `isoalpha3`, `source`, `source_id`, `amenity`, `name`, `lat` and `lon`
+        in priority order (e.g. official, healthsites.io, OSM), the first record of a facility is its representative
+    distance : float, optional
+        maximum distance in meters between records of a facility (default is 150)
+    threshold : float, optional
+        minimum name similarity of records of a facility (default is 0.5)
+    snap : float, optional
+        maximum distance in meters between records without name (default is 25)
+
+    Returns
+    ----------
+    pandas.DataFrame
+        master table, one row per facility, including:
+            facility_id: facility identifier
+            isoalpha3  : country code
+            source     : source of the representative record
+            source_id  : identifier of the representative record
+            amenity    : amenity of the representative record
+            name       : name of the representative record (or the first name available)
+            lat,lon    : coordinates of the representative record
+            n_sources  : number of records of the facility
+            sources    : list of sources of the facility (priority order)
+            source_ids : list of `source_id` of the facility (priority order)
+            similarity : lowest name similarity of the merged pairs (NaN if not merged by name)
+    pandas.DataFrame
+        mapping from `source` and `source_id` to `facility_id`
+    """
+
+    # Inputs: records in priority order
+    data = pd.concat([frame.assign(rank_ = rank) for rank, frame in enumerate(frames)], ignore_index = True)
+    for column in ["isoalpha3", "source", "amenity"]:
+        data[column] = data[column].astype(object)
+    data["name"] = data["name"].astype(object)
+
+    # Sources by priority (rank of the frame and order of appearance)
+    code   = pd.factorize(pd.MultiIndex.from_arrays([data.rank_, data.source]))[0]
+    lat    = data.lat.values.astype(np.float64)
+    lon    = data.lon.values.astype(np.float64)
+
+    # Candidates: located records of different sources within distance (same country, great-circle distance)
+    located  = np.flatnonzero(~np.isnan(lat) & ~np.isnan(lon))
+    pairs, d = get_nearby_pairs(lon[located], lat[located], distance, pd.factorize(data.isoalpha3.values[located])[0])
+    pairs    = located[pairs]
+    selected = code[pairs[:, 0]] != code[pairs[:, 1]]
+    pairs, d = pairs[selected], d[selected]
+
+    # Matches: similar names, or records without name at the same place
+    similarity = get_name_similarity(get_name_keys(data.name), pairs)
+    selected   = np.where(np.isnan(similarity), d <= snap, similarity >= threshold)
+    pairs, similarity, d = pairs[selected], similarity[selected], d[selected]
+
+    # Greedy merge, most similar and closest first, one record per source (source sets as bit masks)
+    parent = np.arange(len(data))
+    masks  = {i: 1 << int(c) for i, c in enumerate(code)}
+    lowest = {}
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for n in np.lexsort((d, -np.nan_to_num(similarity, nan = 0))):
+        i, j = find(pairs[n, 0]), find(pairs[n, 1])
+        if i == j or masks[i] & masks[j]:
+            continue
+        i, j        = min(i, j), max(i, j)
+        parent[j]   = i
+        masks[i]   |= masks.pop(j)
+        lowest[i]   = min(lowest.pop(i, np.inf), lowest.pop(j, np.inf), np.inf if np.isnan(similarity[n]) else similarity[n])
+
+    labels = np.array([find(i) for i in range(len(data))], dtype = np.int64)
+
+    # Facilities: records sorted by facility and source priority
+    data = data.assign(facility_id = pd.factorize(labels)[0], code_ = code,
+                       similarity = pd.Series(lowest, dtype = float).reindex(labels).replace(np.inf, np.nan).values)
+    data = data.sort_values(["facility_id", "code_"], kind = "stable")
+
+    facilities = data.drop_duplicates("facility_id").reset_index(drop = True)
+    facilities["name"] = data.groupby("facility_id", sort = True).name.first().values
+
+        # Provenance (data is sorted by facility)
+    n_sources = np.bincount(data.facility_id.values)
+    split     = np.cumsum(n_sources)[:-1]
+    facilities["n_sources"]  = n_sources
+    facilities["sources"]    = [list(sources) for sources in np.split(data.source.values, split)] if len(data) else []
+    facilities["source_ids"] = [list(ids) for ids in np.split(data.source_id.values, split)] if len(data) else []
+
+    columns    = ["facility_id", "isoalpha3", "source", "source_id", "amenity", "name", "lat", "lon",
+                  "n_sources", "sources", "source_ids", "similarity"]
+    facilities = facilities[columns]
+    for column in ["isoalpha3", "source", "amenity"]:
+        facilities[column] = facilities[column].astype("category")
+
+    # Mapping back to the original records
+    mapping = data[["source", "source_id", "facility_id"]].sort_index().reset_index(drop = True)
+
+    return facilities, mapping
@@ -1,3 +1,5 @@
+from ..utilities.general import quarter_start
+
 def get_tile_url(service: str, year: int, q: int) -> str:
     """
     returns the URL of a tile
@@ -1,7 +1,398 @@
-def get_amenity_official(amenity, official):
+import io
+import os
+import time
+import threading
+import concurrent.futures
+
+import dotenv
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from ..utilities.aws            import get_s3_client, get_s3_bucket, get_arrow_filesystem
+from ..utilities.auxiliary_data import get_iadb
+from ..utilities.cache          import DiskCache, get_cache_key, CACHE_DIR
+from .conflation                import get_conflated
+
+dotenv.load_dotenv()
+sclbucket   = os.environ.get("sclbucket")
+scldatalake = os.environ.get("scldatalake")
+
+# Normalized frames by source and ingest manifests (created on first use)
+infrastructure_cache = None
+
+# Version of the readers and normalization, part of the tag of every cached source frame
+# bump it when a reader (`get_official_*`, `get_public_*`) or `get_official_columns` changes, so cached frames are rebuilt
+INGEST_VERSION = 1
+
+# Local columnar copies of public records (parquet, by file and ETag)
+COLUMNAR_DIR = os.path.join(CACHE_DIR, "columnar")
+
+# Compact types of public records (text as dictionary/categorical, float32 coordinates, integer OSM ids)
+# other columns are read as text
+PUBLIC_TYPES = {"id"       : pa.int64(),
+                "isoalpha3": pa.dictionary(pa.int32(), pa.string()),
+                "source"   : pa.dictionary(pa.int32(), pa.string()),
+                "amenity"  : pa.dictionary(pa.int32(), pa.string()),
+                "lat"      : pa.float32(),
+                "lon"      : pa.float32()}
+
+# Official sources by amenity and country {(amenity, code): source}
+    # filled by `register_official`, read in registration order
+OFFICIAL_SOURCES = {}
+
+# Columns of the master table
+OFFICIAL_COLUMNS = ['isoalpha3','source','source_id','amenity','name','lat','lon']
+
+def get_infrastructure_cache():
+    """
+    gets the on-disk cache of normalized infrastructure frames by source
+    """
+    
+    global infrastructure_cache
+    if infrastructure_cache is None:
+        infrastructure_cache = DiskCache("infrastructure")
+    
+    return infrastructure_cache
+
+def get_object_manifest(path):
+    """
+    lists the source files under an S3 prefix with their ETag and size
+    
+    Parameters
+    ----------
+    path : str
+        prefix in the S3 bucket, e.g. `Geospatial infrastructure/Healthcare Facilities`
+    
+    Returns
+    ----------
+    dict
+        dictionary with {"etag", "size"} by file (key relative to `path`)
+    """
+    
+    return {obj.key.split(path + "/")[1]: {"etag": obj.e_tag, "size": obj.size}
+            for obj in get_s3_bucket(sclbucket).objects.filter(Prefix = path).all()}
+
+def get_ingest_manifest(amenity, group):
+    """
+    gets the ingest manifest of an amenity and group: source files (ETag, size),
+    rows and build time of every cached source frame
+    
+    Returns
+    ----------
+    dict
+        dictionary with {"files", "rows", "built"} by source
+    """
+    
+    return get_infrastructure_cache().get_json(get_cache_key(manifest = amenity, group = group)) or {}
+
+def get_source_frames(amenity, group, sources, objects = None, refresh = False, max_workers = 8):
+    """
+    loads normalized frames by source, reusing the cached frame of every source
+    whose files did not change (same ETag and size) since it was built with the same `INGEST_VERSION`
+    changed or new sources are rebuilt concurrently (loading is I/O-bound)
+    sources without records are cached as empty values, and skipped too
+    
+    Parameters
+    ----------
+    amenity : str
+        amenity name, e.g. `Healthcare`
+    group : str
+        data group, `official` or `public`
+    sources : dict
+        dictionary with (files, load) or (files, load, version) by source name, 
+        `load()` returns the normalized frame (or None), 
+        `version` identifies other inputs of the frame (e.g. countries of interest)
+    objects : dict, optional
+        manifest of the source files from `get_object_manifest` (default is None, no caching)
+    refresh : bool, optional
+        rebuild every source (default is False)
+    max_workers : int, optional
+        number of concurrent loads (default is 8)
+    
+    Returns
+    ----------
+    dict
+        normalized frame by source (None if the source has no records)
+    dict
+        dictionary with `skipped` and `rebuilt` source names
+    """
+    
+    cache    = get_infrastructure_cache()
+    key      = get_cache_key(manifest = amenity, group = group)
+    manifest = (cache.get_json(key) or {}) if objects is not None else {}
+    frames   = {}
+    report   = {"skipped": [], "rebuilt": []}
+    
+    # Unchanged sources from the cache
+    tags = {}
+    for name, (files, *version) in sources.items():
+        if objects is None:
+            continue
+        tags[name] = repr([INGEST_VERSION] + sorted((file, objects[file]["etag"], objects[file]["size"]) for file in files) + version[1:])
+        value      = None if refresh else cache.get(get_cache_key(amenity = amenity, group = group, source = name), tag = tags[name])
+        if value is not None:
+            # Pickle keeps mixed-type columns (e.g. numeric and text ids) exactly as built, empty for no records
+            frames[name] = pd.read_pickle(io.BytesIO(value)) if value else None
+            report["skipped"].append(name)
+    
+    # Changed or new sources
+    todo = [name for name in sources if name not in frames]
+    with concurrent.futures.ThreadPoolExecutor(max_workers = max_workers) as executor:
+        for name, frame in zip(todo, executor.map(lambda name: sources[name][1](), todo)):
+            frames[name] = frame
+            report["rebuilt"].append(name)
+            if objects is None:
+                continue
+            
+            value = io.BytesIO()
+            if frame is not None:
+                frame.to_pickle(value)
+            cache.set(get_cache_key(amenity = amenity, group = group, source = name), value.getvalue(), tag = tags[name])
+            manifest[name] = {"files": {file: objects[file] for file in sources[name][0]},
+                              "rows" : 0 if frame is None else len(frame),
+                              "built": time.time()}
+    
+    if objects is not None:
+        cache.set_json(key, manifest)
+        print(f"{amenity} {group} records: {len(report['rebuilt'])} sources rebuilt {report['rebuilt']}, "
+              f"{len(report['skipped'])} skipped")
+    
+    return {name: frames[name] for name in sources}, report
+
+def register_official(amenity, code, format = "csv", extension = None, multiple = False, read = None,
+                      source = "Ministry of Health", columns = None):
+    """
+    registers the reader of a country's official records
+    the decorated function preprocesses the raw file (e.g. filter amenities) and returns it
+    
+    Parameters
+    ----------
+    amenity : str
+        amenity name, e.g. `Healthcare`
+    code : str
+        country's isoalpha3 code, official files are matched by code
+    format : str, optional
+        source format (default is `csv`), including:
+            csv : .csv in the Data Lake
+            shp : shapefile in the Data Lake
+            xlsx: Excel file in the S3 bucket
+    extension : str, optional
+        keep only files with this extension, e.g. `.shp` (default is None)
+    multiple : bool, optional
+        read every matching file, otherwise only the first one (default is False)
+    read : dict, optional
+        keyword arguments of the format reader, e.g. `sep` or `encoding` (default is None)
+    source : str, optional
+        source name (default is `Ministry of Health`)
+    columns : dict, optional
+        master table column by output name (`source_id`, `amenity`, `name`, `lat`, `lon`, `source`)
+        as a source column name, a function of the file or a constant
+        without `source_id`, sequential ids {code}{n} are created
+    
+    Returns
+    ----------
+    function
+        decorator
+    """
+    
+    def decorator(func):
+        OFFICIAL_SOURCES[(amenity, code)] = {"code"     : code,
+                                             "format"   : format,
+                                             "extension": extension,
+                                             "multiple" : multiple,
+                                             "read"     : read or {},
+                                             "source"   : source,
+                                             "columns"  : columns or {},
+                                             "reader"   : func}
+        return func
+    
+    return decorator
+
+def get_official_file(path, file, format = "csv", read = None):
+    """
+    reads a raw official file from the Data Lake (csv, shp) or the S3 bucket (xlsx)
+    """
+    
+    read = read or {}
+    if format == "csv":
+        return pd.read_csv(f"{scldatalake}{path}/{file}", **read)
+    if format == "shp":
+        return gpd.read_file(f"{scldatalake}{path}/{file}", **read)
+    if format == "xlsx":
+        obj = get_s3_client().get_object(Bucket = sclbucket, Key = f"{path}/{file}")
+        return pd.read_excel(io.BytesIO(obj['Body'].read()), engine = 'openpyxl', **read)
+    
+    raise ValueError(f"unknown official source format: {format}")
+
+def get_text(file, columns, sep = ", ", title = False):
+    """
+    joins columns as text, by column instead of by row
+    same as `file[columns].apply(lambda x: sep.join(str(value) for value in x), axis = 1)`
+    
+    Parameters
+    ----------
+    file : pandas.DataFrame
+        dataframe
+    columns : list
+        columns to join, in order
+    sep : str, optional
+        separator (default is `, `)
+    title : bool, optional
+        title case every column (text columns only) (default is False)
+    
+    Returns
+    ----------
+    pandas.Series
+        joined text by row
+    """
+    
+    parts = [(file[name].str.title() if title else file[name]).map(str) for name in columns]
+    
+    return parts[0].str.cat(parts[1:], sep = sep)
+
+def get_coordinates(text):
+    """
+    extracts the first two decimal numbers of a text (e.g. GeoJSON coordinates) by column
+    same as `text.apply(lambda x: re.findall(r"\d+\.\d+", x)[:2])`
+    
+    Returns
+    ----------
+    pandas.DataFrame
+        dataframe with the first (0) and second (1) numbers as float
+    """
+    
+    return text.str.extract(r"(?s)(\d+\.\d+).*?(\d+\.\d+)").astype(float)
+
+def get_numeric(values):
+    """
+    converts text to float32 numbers (NaN if not numeric), other values are kept as they are
+    same as `values.apply(pd.to_numeric, errors = 'coerce', downcast = 'float')`, by column
+    
+    Parameters
+    ----------
+    values : pandas.Series
+        numbers, text or a mix of both (e.g. coordinates of several sources)
+    
+    Returns
+    ----------
+    pandas.Series
+        numbers
+    """
+    
+    # Numbers only
+    if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+        return values.copy()
+    
+    # Text parsed at once, None as NaN (float32)
+    data = values.to_numpy(dtype = object, copy = True)
+    text = np.frompyfunc(isinstance, 2, 1)(data, str).astype(bool)
+    none = np.equal(data, None)
+    
+    number = pd.to_numeric(pd.Series(data[text], dtype = object), errors = 'coerce').to_numpy(dtype = np.float64)
+    fits   = ~(np.abs(number) > np.finfo(np.float32).max)
+    text   = np.flatnonzero(text)
+    
+        # float32 as `downcast = 'float'`, float64 beyond the float32 range
+    data[text[fits]]  = list(number[fits].astype(np.float32))
+    data[text[~fits]] = list(number[~fits])
+    data[none]        = np.float32(np.nan)
+    
+    return pd.Series(data, index = values.index, name = values.name).infer_objects()
+
+def get_source_id(infrastructure):
+    """
+    adds the country code to numeric source ids (e.g. 123 or "0123" become "ARG123"), by column
+    same as `str(isoalpha3) + str(int(source_id))` for ids starting with a digit
+    """
+    
+    source_id = infrastructure.source_id
+    numeric   = source_id.map(str).str.match(r'^\d').to_numpy()
+    
+    data = source_id.to_numpy(dtype = object, copy = True)
+    if numeric.any():
+        ids = pd.to_numeric(pd.Series(data[numeric], dtype = object), errors = 'raise')
+        data[numeric] = (infrastructure.isoalpha3.map(str).to_numpy()[numeric].astype(object) + 
+                         ids.astype(np.int64).astype(str).to_numpy().astype(object))
+    
+    return pd.Series(data, index = infrastructure.index, name = "source_id").infer_objects()
+
+def get_official_columns(file, source, id_n = 0):
+    """
+    selects the master table columns of a preprocessed official file
+    """
+    
+    code    = source["code"]
+    columns = {"source": source["source"], **source["columns"]}
+    
+    table = pd.DataFrame(index = file.index)
+    table['isoalpha3'] = code
+    for name in OFFICIAL_COLUMNS[1:]:
+        if name == "source_id" and name not in columns:
+            table[name] = [code + str(i) for i in range(id_n, id_n + len(file))]
+            continue
+        
+        value = columns[name]
+        if callable(value):
+            table[name] = value(file)
+        elif isinstance(value, str) and name != "source":
+            table[name] = file[value]
+        else:
+            table[name] = value
+    
+    return table
+
+def get_official_files(source, official):
+    """
+    selects the official files of a registered source
+    """
+    
+    files = [file for file in official if source["code"] in file and (source["extension"] is None or source["extension"] in file)]
+    
+    return files if source["multiple"] else files[:1]
+
+def get_official_source(amenity, code, official):
+    """
+    reads the official records of one country (any registered source)
+    
+    Parameters
+    ----------
+    amenity : str
+        amenity name, e.g. `Healthcare`
+    code : str
+        country's isoalpha3 code
+    official : list
+        official files in the amenity folder
+    
+    Returns
+    ----------
+    pandas.DataFrame
+        dataframe with the master table columns (None if the country has no official files)
+    """
+    
+    source = OFFICIAL_SOURCES[(amenity, code)]
+    path   = f"Geospatial infrastructure/{amenity} Facilities"
+    files  = get_official_files(source, official)
+    
+    tables = []
+    id_n   = 0
+    for name in files:
+        file = get_official_file(path, name, source["format"], source["read"])
+        file = source["reader"](file, name)
+        tables.append(get_official_columns(file, source, id_n))
+        id_n += len(file)
+    
+    return pd.concat(tables) if tables else None
+
+def get_amenity_official(amenity, official, countries = None, max_workers = 8, objects = None, refresh = False):
     """
     process official records by country
-    each country's raw data is different, preprocessing is done individually
+    each country's raw data is different, preprocessing is done individually by its registered reader
+    readers are I/O-bound and run concurrently
     
     Parameters
     ----------
@@ -11,6 +402,15 @@ def get_amenity_official(amenity, official):
             healthcare
     official : list
         list of countries with official data
+    countries : list, optional
+        isoalpha3 codes of the countries to process (default is every registered country)
+    max_workers : int, optional
+        number of concurrent readers (default is 8)
+    objects : dict, optional
+        manifest of the official files from `get_object_manifest`, 
+        countries whose files did not change are read from the cache (default is None, read every country)
+    refresh : bool, optional
+        read every country even if its files did not change (default is False)
     
     Returns
     ----------
@@ -23,469 +423,393 @@ def get_amenity_official(amenity, official):
             lon      : longitude
     """
     
-    # Inputs
-    path = f"Geospatial infrastructure/{amenity} Facilities"
-    
-    # Master table 
-    infrastructure = []
+    # Registered sources of interest
+    codes = [code for (amenity_, code) in OFFICIAL_SOURCES if amenity_ == amenity]
+    if countries is not None:
+        codes = [code for code in codes if code in countries]
     
     # Financial Facilities
     # No official records yet
+    infrastructure = []
+    if len(codes) == 0:
+        return infrastructure
     
-    # Healthcare Facilities
-    if amenity == "Healthcare":
-        # Argentina
-        #--------------------------------------------------------
-        # Import data
-        file  = [file for file in official if "ARG" in file][0]
-        path_ = f"{scldatalake}{path}/{file}"
-        file  = pd.read_csv(path_)
-        
-        # Filter amenities
-        file = file[~file.tipologia_id.isin([53,80])]
-
-        # Create variables
-        file['isoalpha3'] = "ARG"
-        file['source']    = "Ministry of Health"
-        file['source_id'] = ['ARG' + str(i) for i in range(len(file))]
-        file['amenity']   = file.tipologia_sigla
-        file['name']      = file.establecimiento_nombre
-        file['lat']       = file.y
-        file['lon']       = file.x
-
-        # Keep variables of interest
-        file = file[file.columns[-7::]]
-
-        # Add to master table
-        infrastructure.append(file)
-        
-        # Bolivia
-        #--------------------------------------------------------
-        file_ = [file for file in official if ("BOL" in file) and (".shp" in file)]
-        id_n = 0
-        
-        for file in file_:
-            path_ = f"{scldatalake}{path}/{file}"
-            file  = gpd.read_file(path_)
-
-            # Create variables
-            file['isoalpha3'] = "BOL"
-            file['source']    = "Ministry of Health"
-            file['source_id'] = ['BOL' + str(i) for i in range(id_n, id_n + len(file))]
-            file['amenity']   = file.CLASE.str.lower()
-            file['name']      = file[['Name','MUNICIPIO','PROVINCIA']].apply(lambda x : '{}, {}, {}'.format(x[0], x[1], x[2]), axis = 1)
-            file['lat']       = file.LATITUD
-            file['lon']       = file.LONGITUD
-
-            # Keep variables of interest
-            file = file[file.columns[-7::]]
+    # Concurrent readers (changed countries only), results in registration order
+    sources = {code: (get_official_files(OFFICIAL_SOURCES[(amenity, code)], official),
+                      lambda code = code: get_official_source(amenity, code, official)) for code in codes}
+    tables, report = get_source_frames(amenity, "official", sources, objects, refresh, max_workers)
+    
+    for code, table in tables.items():
+        if table is None:
+            print(f"No official records for {amenity} infrastructure in {code}")
+            continue
+        infrastructure.append(table)
+    
+    # Master table 
+    #--------------------------------------------------------
+    # Generate master table 
+    infrastructure = pd.concat(infrastructure)
+    infrastructure = infrastructure.reset_index(drop = True)
+    
+    # Convert lat-lon to numeric
+    infrastructure.lat = get_numeric(infrastructure.lat)
+    infrastructure.lon = get_numeric(infrastructure.lon)
+    
+    # Remove NAs
+    infrastructure = infrastructure[~infrastructure.lat.isna()] 
+    
+    # Add country code to soure_id
+    infrastructure['source_id'] = get_source_id(infrastructure)
+    infrastructure.attrs["ingest"] = report
+    
+    return infrastructure
 
-            # Add to master table
-            infrastructure.append(file)
-            id_n += len(file)
-        
-        # Brazil 
-        #--------------------------------------------------------
-        # Import data
-        file  = [file for file in official if "BRA" in file][0]
-        path_ = f"{scldatalake}{path}/{file}"
-        file  = pd.read_csv(path_, sep = ";", encoding = "unicode_escape")
-        
-        # Filter amenities
-        file = file[file.TP_UNIDADE.isin([1,2,4,5,7,15,20,21,36,61,62,69,70,71,72,73,83,85])]
-        
-        # Amenities name 
-        UNID_NAME = {1 :"Posto de Saude",
-                     2 :"Centro de Saude/Unidade Basica",
-                     4 :"Policlinica",
-                     5 :"Hospital Geral",
-                     7 :"Hospital Especializado",
-                     15:"Unidade Mista",
-                     20:"Pronto Socorro General",
-                     21:"Pronto Socorro Especializado",
-                     36:"Clinica/Centro de Especialidade",
-                     61:"Centro de Parto Normal - Isolado",
-                     62:"Hospital/Dia - Isolado",
-                     69:"Centro de Atencao Hemoterapica E Ou Hematologica",
-                     70:"Centro de Atencao Psicossocial",
-                     71:"Centro de Apoio a Saude da Familia",
-                     72:"Unidade de Atencao a Saude Indigena",
-                     73:"Pronto Atendimento",
-                     83:"Polo de Prevencao de Doencas e Agravos e Promocao da Saude",
-                     85:"Centro de Imunizacao"}
-        
-        # Replace codes with unit name
-        file.TP_UNIDADE = file.TP_UNIDADE.replace(UNID_NAME)
-        
-        # Create variables
-        file['isoalpha3'] = "BRA"
-        file['source']    = "Ministry of Health"
-        file['source_id'] = file.CO_CNES
-        file['amenity']   = file.TP_UNIDADE
-        file['name']      = file.NO_FANTASIA
-        file['lat']       = file.NU_LATITUDE
-        file['lon']       = file.NU_LONGITUDE
-
-        # Keep variables of interest
-        file = file[file.columns[-7::]]
-
-        # Add to master table
-        infrastructure.append(file)
-        
-        # Chile
-        #--------------------------------------------------------
-        file  = [file for file in official if ("CHL" in file) and (".shp" in file)][0]
-        path_ = f"{scldatalake}{path}/{file}"
-        file  = gpd.read_file(path_)
-        
-        # Create variables
-        file['isoalpha3'] = "CHL"
-        file['source']    = "Ministry of Health"
-        file['source_id'] = file.C_VIG
-        file['amenity']   = file.TIPO
-        file['name']      = file.NOMBRE
-        file['lat']       = file.LATITUD
-        file['lon']       = file.LONGITUD
-
-        # Keep variables of interest
-        file = file[file.columns[-7::]]
-
-        # Add to master table
-        infrastructure.append(file)
-        
-        # Colombia 
-        #--------------------------------------------------------
-        file  = [file for file in official if "COL" in file][0]
-        path_ = f"{scldatalake}{path}/{file}"
-        file  = pd.read_csv(path_, encoding = "unicode_escape")
-        
-        # Filter amenities
-        file = file[~file["latitute"].isna()]
-        
-        # Create variables
-        file['isoalpha3'] = "COL"
-        file['source']    = "Ministry of Health REPS"
-        file['source_id'] = file.codigohabilitacionsede
-        file['amenity']   = "IPS"
-        file['name']      = file.nombresede
-        file['lat']       = file.latitute
-        file['lon']       = file.longitude
-
-        # Keep variables of interest
-        file = file[file.columns[-7::]]
-
-        # Add to master table
-        infrastructure.append(file)
-        
-        # Dominican Republic
-        #--------------------------------------------------------
-        file  = [file for file in official if "DOM" in file][0]
-        path_ = f"{scldatalake}{path}/{file}"
-        file  = pd.read_csv(path_, sep = ";", encoding = "latin1")
-        
-         # Create variables
-        file['isoalpha3'] = "DOM"
-        file['source']    = "Ministry of Health"
-        file['source_id'] = ['DOM' + str(i) for i in range(len(file))]
-        file['amenity']   = file["TIPO DE CENTRO"]
-        file['name']      = file[['NOMBRE DEL ESTABLECIMIENTO','MUNICIPIO','PROVINCIA']].apply(lambda x : '{}, {}, {}'.format(x[0], x[1], x[2]), axis = 1)
-        file['lat']       = file.COORDENADAS.str.split(',', expand = True)[0]
-        file['lon']       = file.COORDENADAS.str.split(',', expand = True)[1]
-
-        # Keep variables of interest
-        file = file[file.columns[-7::]]
-
-        # Add to master table
-        infrastructure.append(file)
-        
-        # Ecuador
-        #--------------------------------------------------------
-        # Import data
-        file  = [file for file in official if "ECU" in file][0]
-        path_ = f"{scldatalake}{path}/{file}"
-        file  = pd.read_csv(path_)
-        
-        # Filter amenities
-        file = file[file["nivel de atencion"].isin(["NIVEL 1","NIVEL 2","NIVEL 3"])]
-        
-        # Create variables
-        file['isoalpha3'] = "ECU"
-        file['source']    = "Ministry of Health"
-        file['source_id'] = file.unicodigo
-        file['amenity']   = file.tipologia
-        file['name']      = file["nombre oficial"]
-        file['lat']       = file.y
-        file['lon']       = file.x
-
-        # Keep variables of interest
-        file = file[file.columns[-7::]]
-
-        # Add to master table
-        infrastructure.append(file)
-        
-        # Guatemala
-        #--------------------------------------------------------
-        # Import data 
-        file  = [file for file in official if "GTM" in file][0]
-        path_ = f"{scldatalake}{path}/{file}"
-        file  = pd.read_csv(path_)
-        
-        # Filter amenities 
-        tipo_serv = ["CENTRO CONVERGENCIA",
-                     "PUESTO DE SALUD",
-                     "CENTRO DE SALUD",
-                     "HOSPITAL",
-                     "CENTRO ATENCION PERMANEN*",
-                     "UNIDAD TECNICA SALUD",
-                     "CENTRO URGENCIAS MEDICAS",
-                     "UNIDAD 24 HORAS"]
-        file = file[file.tipo_serv.isin(tipo_serv)]
-        
-        # Create variables
-        file['isoalpha3'] = "GTM"
-        file['source']    = "Ministry of Health"
-        file['source_id'] = file.gid
-        file['amenity']   = file.tipo_serv
-        file['name']      = file.servicio
-        file['lat']       = file.lat
-        file['lon']       = file.lon
-
-        # Keep variables of interest
-        file = file[file.columns[-7::]]
-
-        # Add to master table
-        infrastructure.append(file)
-        
-        # Guyana
-        #--------------------------------------------------------
-        # Import data
-            # Define inputs
-        file  = [file for file in official if "GUY" in file][0]
-        path_ = f"{path}/{file}"
-        obj   = s3.get_object(Bucket = sclbucket, Key = path_)
-
-            # Read data
-        excel_data = obj['Body'].read()
-        excel_file = io.BytesIO(excel_data)
-        file       = pd.read_excel(excel_file, engine = 'openpyxl')
-
-        # Create variables
-        file['isoalpha3'] = "GUY"
-        file['source']    = "Ministry of Health"
-        file['source_id'] = ['GUY' + str(i) for i in range(len(file))]
-        file['amenity']   = file["Facility Type"]
-        file['name']      = file.Name
-        file['lat']       = file[" latitude"]
-        file['lon']       = file[" longitude"]
-
-        # Keep variables of interest
-        file = file[file.columns[-7::]]
-
-        # Add to master table
-        infrastructure.append(file)
-        
-        # Haiti
-        #--------------------------------------------------------
-        file  = [file for file in official if "HTI" in file][0]
-        path_ = f"{scldatalake}{path}/{file}"
-        file  = pd.read_csv(path_)
-        
-        # Create variables
-        file['isoalpha3'] = "HTI"
-        file['source']    = file.SourceHosp
-        file['source_id'] = file.HealthC_ID
-        file['amenity']   = file.Categorie
-        file['name']      = file[['NomInstitu','Commune','DistrictNo']].apply(lambda x : '{}, {}, {}'.format(x[0], x[1], x[2]), axis = 1)
-        file['lat']       = file.X_DDS
-        file['lon']       = file.Y_DDS
-
-        # Keep variables of interest
-        file = file[file.columns[-7::]]
-
-        # Add to master table
-        infrastructure.append(file)
-
-        # Honduras
-        #--------------------------------------------------------        
-        # Import data 
-        file       = [file for file in official if "HND" in file][0]
-        path_      = f"{path}/{file}"
-        obj        = s3.get_object(Bucket = sclbucket, Key = path_)
-        excel_data = obj['Body'].read()
-        excel_file = io.BytesIO(excel_data)
-        file       = pd.read_excel(excel_file, engine = 'openpyxl', sheet_name = "coordenadas")
-        
-        # Create variables
-        file['isoalpha3'] = "HND"
-        file['source']    = "Ministry of Health"
-        file['source_id'] = file.codigo
-        file['amenity']   = np.nan
-        file['name']      = file["Nombre US"]
-        file['lat']       = file.lat
-        file['lon']       = file.lon
-
-        # Keep variables of interest
-        file = file[file.columns[-7::]]
-
-        # Add to master table
-        infrastructure.append(file)
-        
-        # Jamaica 
-        #--------------------------------------------------------
-        # Import data
-        file  = [file for file in official if "JAM" in file][0]
-        path_ = f"{scldatalake}{path}/{file}"
-        file  = pd.read_csv(path_)
-
-        # Create variables
-        file['isoalpha3'] = "JAM"
-        file['source']    = "Ministry of Health"
-        file['source_id'] = ['JAM' + str(i) for i in range(len(file))]
-        file['amenity']   = file.Type.str.lower()
-        file['name']      = file[['H_Name','Parish']].apply(lambda x : '{} in {}'.format(x[0],x[1]), axis = 1)
-        file['lat']       = file.GeoJSON.apply(lambda x: re.findall(r"\d+\.\d+", x)[1]).astype(float)
-        file['lon']       = file.GeoJSON.apply(lambda x: re.findall(r"\d+\.\d+", x)[0]).astype(float) * -1
-
-        # Keep variables of interest
-        file = file[file.columns[-7::]]
-
-        # Add to master table
-        infrastructure.append(file)
-        
-        # Mexico 
-        #--------------------------------------------------------
-        # Import data
-            # Define inputs
-        file  = [file for file in official if "MEX" in file][0]
-        path_ = f"{path}/{file}"
-        obj   = s3.get_object(Bucket = sclbucket, Key = path_)
-
-            # Read data
-        excel_data = obj['Body'].read()
-        excel_file = io.BytesIO(excel_data)
-        file       = pd.read_excel(excel_file, engine = 'openpyxl')
-        
-        # Filter amenities 
-        clave = ["CAF","99","W","F","OFI","ALM","BS","X","ANT","NES","UM","HM","OTR","UM TEMPORAL COVID","OTCE","BS","MR","NA","P","PERICIALES"]
-        file  = file[~file["CLAVE DE TIPOLOGIA"].isin(clave)]
-
-        # Create variables
-        file['isoalpha3'] = "MEX"
-        file['source']    = "Ministry of Health"
-        file['source_id'] = file.ID
-        file['amenity']   = file["NOMBRE TIPO ESTABLECIMIENTO"].str.replace("DE ","")
-        file['name']      = file["NOMBRE DE LA UNIDAD"]
-        file['lat']       = file["LATITUD"]
-        file['lon']       = file["LONGITUD"]
-
-        # Keep variables of interest
-        file = file[file.columns[-7::]]
-
-        # Add to master table
-        infrastructure.append(file)
-        
-        # Peru 
-        #--------------------------------------------------------
-        # Import data
-        file  = [file for file in official if "PER" in file][0]
-        path_ = f"{scldatalake}{path}/{file}"
-        file  = pd.read_csv(path_)
-
-        # Dictionary with amenity names
-        n_before  = ['I-1','I-2','I-3','I-4','II-1','II-2','II-E','III-1','III-2','III-E','SD'] 
-        n_after   = ["Primary care"] * 4 + ["Secondary care"] * 3 + ["Tertiary care"] * 3 + [""]
-        d_amenity = dict(zip(n_before,n_after))
-
-        # Create variables
-        file['isoalpha3'] = "PER"
-        file['source']    = "Ministry of Health"
-        file['source_id'] = file.codigo_renaes
-        file['amenity']   = file.categoria.replace(d_amenity)
-        file['name']      = file[['nombre','diresa']].apply(lambda x : '{} in {}'.format(x[0].title(),x[1].title()), axis = 1)
-        file['lat']       = file.latitud
-        file['lon']       = file.longitud
-
-        # Keep variables of interest
-        file = file[file.columns[-7::]]
-
-        # Add to master table
-        infrastructure.append(file)
-        
-        # El Salvador 
-        #--------------------------------------------------------
-        # Import data 
-        file_ = [file for file in official if "SLV" in file]
-        id_n = 0
- 
-        for file in file_:
-            path_ = f"{scldatalake}{path}/{file}"
-            file  = pd.read_csv(path_)
-
-            # Create variables
-            file['isoalpha3'] = "SLV"
-            file['source']    = "Ministry of Health"
-            file['source_id'] = ['SLV' + str(i) for i in range(id_n, id_n + len(file))]
-            file['amenity']   = file.ESPECIALIZACION.str.lower()
-            file['name']      = file[['Name','MUNICIPIO','REGION']].apply(lambda x : '{}, {}, {}'.format(x[0], x[1], x[2]), axis = 1)
-            file['lat']       = file.Y
-            file['lon']       = file.X
-
-            # Keep variables of interest
-            file = file[file.columns[-7::]]
+# Healthcare Facilities
+#--------------------------------------------------------
+# Argentina
+@register_official("Healthcare", "ARG",
+                   columns = {"amenity": "tipologia_sigla", "name": "establecimiento_nombre", "lat": "y", "lon": "x"})
+def get_official_arg(file, name):
+    # Filter amenities
+    return file[~file.tipologia_id.isin([53,80])]
+
+# Bolivia
+@register_official("Healthcare", "BOL", format = "shp", extension = ".shp", multiple = True,
+                   columns = {"amenity": lambda file: file.CLASE.str.lower(),
+                              "name"   : lambda file: get_text(file, ['Name','MUNICIPIO','PROVINCIA']),
+                              "lat"    : "LATITUD",
+                              "lon"    : "LONGITUD"})
+def get_official_bol(file, name):
+    return file
+
+# Brazil 
+@register_official("Healthcare", "BRA", read = {"sep": ";", "encoding": "unicode_escape"},
+                   columns = {"source_id": "CO_CNES", "amenity": "TP_UNIDADE", "name": "NO_FANTASIA",
+                              "lat": "NU_LATITUDE", "lon": "NU_LONGITUDE"})
+def get_official_bra(file, name):
+    # Filter amenities
+    file = file[file.TP_UNIDADE.isin([1,2,4,5,7,15,20,21,36,61,62,69,70,71,72,73,83,85])]
+    
+    # Amenities name 
+    UNID_NAME = {1 :"Posto de Saude",
+                 2 :"Centro de Saude/Unidade Basica",
+                 4 :"Policlinica",
+                 5 :"Hospital Geral",
+                 7 :"Hospital Especializado",
+                 15:"Unidade Mista",
+                 20:"Pronto Socorro General",
+                 21:"Pronto Socorro Especializado",
+                 36:"Clinica/Centro de Especialidade",
+                 61:"Centro de Parto Normal - Isolado",
+                 62:"Hospital/Dia - Isolado",
+                 69:"Centro de Atencao Hemoterapica E Ou Hematologica",
+                 70:"Centro de Atencao Psicossocial",
+                 71:"Centro de Apoio a Saude da Familia",
+                 72:"Unidade de Atencao a Saude Indigena",
+                 73:"Pronto Atendimento",
+                 83:"Polo de Prevencao de Doencas e Agravos e Promocao da Saude",
+                 85:"Centro de Imunizacao"}
+    
+    # Replace codes with unit name
+    file = file.assign(TP_UNIDADE = file.TP_UNIDADE.replace(UNID_NAME))
+    
+    return file
+
+# Chile
+@register_official("Healthcare", "CHL", format = "shp", extension = ".shp",
+                   columns = {"source_id": "C_VIG", "amenity": "TIPO", "name": "NOMBRE", "lat": "LATITUD", "lon": "LONGITUD"})
+def get_official_chl(file, name):
+    return file
+
+# Colombia 
+@register_official("Healthcare", "COL", read = {"encoding": "unicode_escape"}, source = "Ministry of Health REPS",
+                   columns = {"source_id": "codigohabilitacionsede", "amenity": lambda file: "IPS", "name": "nombresede",
+                              "lat": "latitute", "lon": "longitude"})
+def get_official_col(file, name):
+    # Filter amenities
+    return file[~file["latitute"].isna()]
+
+# Dominican Republic
+@register_official("Healthcare", "DOM", read = {"sep": ";", "encoding": "latin1"},
+                   columns = {"amenity": "TIPO DE CENTRO",
+                              "name"   : lambda file: get_text(file, ['NOMBRE DEL ESTABLECIMIENTO','MUNICIPIO','PROVINCIA']),
+                              "lat"    : lambda file: file.COORDENADAS.str.split(',', expand = True)[0],
+                              "lon"    : lambda file: file.COORDENADAS.str.split(',', expand = True)[1]})
+def get_official_dom(file, name):
+    return file
+
+# Ecuador
+@register_official("Healthcare", "ECU",
+                   columns = {"source_id": "unicodigo", "amenity": "tipologia", "name": "nombre oficial", "lat": "y", "lon": "x"})
+def get_official_ecu(file, name):
+    # Filter amenities
+    return file[file["nivel de atencion"].isin(["NIVEL 1","NIVEL 2","NIVEL 3"])]
+
+# Guatemala
+@register_official("Healthcare", "GTM",
+                   columns = {"source_id": "gid", "amenity": "tipo_serv", "name": "servicio", "lat": "lat", "lon": "lon"})
+def get_official_gtm(file, name):
+    # Filter amenities 
+    tipo_serv = ["CENTRO CONVERGENCIA",
+                 "PUESTO DE SALUD",
+                 "CENTRO DE SALUD",
+                 "HOSPITAL",
+                 "CENTRO ATENCION PERMANEN*",
+                 "UNIDAD TECNICA SALUD",
+                 "CENTRO URGENCIAS MEDICAS",
+                 "UNIDAD 24 HORAS"]
+    return file[file.tipo_serv.isin(tipo_serv)]
+
+# Guyana
+@register_official("Healthcare", "GUY", format = "xlsx",
+                   columns = {"amenity": "Facility Type", "name": "Name", "lat": " latitude", "lon": " longitude"})
+def get_official_guy(file, name):
+    return file
+
+# Haiti
+@register_official("Healthcare", "HTI",
+                   columns = {"source"   : lambda file: file.SourceHosp,
+                              "source_id": "HealthC_ID",
+                              "amenity"  : "Categorie",
+                              "name"     : lambda file: get_text(file, ['NomInstitu','Commune','DistrictNo']),
+                              "lat"      : "X_DDS",
+                              "lon"      : "Y_DDS"})
+def get_official_hti(file, name):
+    return file
+
+# Honduras
+@register_official("Healthcare", "HND", format = "xlsx", read = {"sheet_name": "coordenadas"},
+                   columns = {"source_id": "codigo", "amenity": np.nan, "name": "Nombre US", "lat": "lat", "lon": "lon"})
+def get_official_hnd(file, name):
+    return file
+
+# Jamaica 
+@register_official("Healthcare", "JAM",
+                   columns = {"amenity": lambda file: file.Type.str.lower(),
+                              "name"   : lambda file: get_text(file, ['H_Name','Parish'], sep = " in "),
+                              "lat"    : lambda file: get_coordinates(file.GeoJSON)[1],
+                              "lon"    : lambda file: get_coordinates(file.GeoJSON)[0] * -1})
+def get_official_jam(file, name):
+    return file
+
+# Mexico 
+@register_official("Healthcare", "MEX", format = "xlsx",
+                   columns = {"source_id": "ID",
+                              "amenity"  : lambda file: file["NOMBRE TIPO ESTABLECIMIENTO"].str.replace("DE ",""),
+                              "name"     : "NOMBRE DE LA UNIDAD",
+                              "lat"      : "LATITUD",
+                              "lon"      : "LONGITUD"})
+def get_official_mex(file, name):
+    # Filter amenities 
+    clave = ["CAF","99","W","F","OFI","ALM","BS","X","ANT","NES","UM","HM","OTR","UM TEMPORAL COVID","OTCE","BS","MR","NA","P","PERICIALES"]
+    return file[~file["CLAVE DE TIPOLOGIA"].isin(clave)]
+
+# Peru 
+    # Dictionary with amenity names
+PER_AMENITY = dict(zip(['I-1','I-2','I-3','I-4','II-1','II-2','II-E','III-1','III-2','III-E','SD'],
+                       ["Primary care"] * 4 + ["Secondary care"] * 3 + ["Tertiary care"] * 3 + [""]))
+
+@register_official("Healthcare", "PER",
+                   columns = {"source_id": "codigo_renaes",
+                              "amenity"  : lambda file: file.categoria.replace(PER_AMENITY),
+                              "name"     : lambda file: get_text(file, ['nombre','diresa'], sep = " in ", title = True),
+                              "lat"      : "latitud",
+                              "lon"      : "longitud"})
+def get_official_per(file, name):
+    return file
+
+# El Salvador 
+@register_official("Healthcare", "SLV", multiple = True,
+                   columns = {"amenity": lambda file: file.ESPECIALIZACION.str.lower(),
+                              "name"   : lambda file: get_text(file, ['Name','MUNICIPIO','REGION']),
+                              "lat"    : "Y",
+                              "lon"    : "X"})
+def get_official_slv(file, name):
+    return file
+
+# Trinidad and Tobago
+@register_official("Healthcare", "TTO", format = "shp", extension = ".shp", multiple = True,
+                   columns = {"amenity": "type_", "name": "Name",
+                              "lat": lambda file: file['geometry'].y, "lon": lambda file: file['geometry'].x})
+def get_official_tto(file, name):
+    # Amenity from the file name
+    return file.assign(type_ = name.split("/")[-1].split(".")[0])
+
+def get_public_batches(url, columns, block_size = 2**21):
+    """
+    streams a public records file (.csv, may be compressed) in batches
+    only `columns` are parsed, in compact types (`PUBLIC_TYPES`), other columns are text
+    (types inferred from the first block would fail on sparse columns)
+    
+    Yields
+    ----------
+    pyarrow.RecordBatch
+        batch of records
+    """
+    
+    filesystem, url = get_arrow_filesystem(url)
+    
+    convert = pacsv.ConvertOptions(include_columns = columns, strings_can_be_null = True,
+                                   column_types = {name: PUBLIC_TYPES.get(name, pa.string()) for name in columns})
+    with filesystem.open_input_stream(url, compression = "detect") as stream:
+        for batch in pacsv.open_csv(stream, read_options = pacsv.ReadOptions(block_size = block_size), convert_options = convert):
+            yield batch
 
-            # Add to master table
-            infrastructure.append(file)
-            id_n += len(file)
-        
-        # Trinidad and Tobago
-        #--------------------------------------------------------
-        file_ = [file for file in official if ("TTO" in file) and (".shp" in file)]
-        id_n = 0
-        
-        for file in file_:
-            type_ = file.split("/")[-1].split(".")[0]
-            path_ = f"{scldatalake}{path}/{file}"
-            file  = gpd.read_file(path_)
-
-            # Create variables
-            file['isoalpha3'] = "TTO"
-            file['source']    = "Ministry of Health"
-            file['source_id'] = ['TTO' + str(i) for i in range(id_n, id_n + len(file))]
-            file['amenity']   = type_
-            file['name']      = file.Name
-            file['lat']       = file['geometry'].y
-            file['lon']       = file['geometry'].x
-
-            # Keep variables of interest
-            file = file[file.columns[-7::]]
+def get_columnar_path(url, columns, etag):
+    """
+    gets the local columnar copy of a public records file for its current version (ETag)
+    """
+    
+    prefix = get_cache_key(url = url)[:16]
+    return os.path.join(COLUMNAR_DIR, f"{prefix}_{get_cache_key(columns = columns, etag = etag)[:16]}.parquet")
 
-            # Add to master table
-            infrastructure.append(file)
-            id_n += len(file)
-        
-        # Master table 
-        #--------------------------------------------------------
-        # Generate master table 
-        infrastructure = pd.concat(infrastructure)
-        infrastructure = infrastructure.reset_index(drop = True)
-        
-        # Convert lat-lon to numeric
-        infrastructure.lat = infrastructure.lat.apply(pd.to_numeric, errors = 'coerce', downcast = 'float')
-        infrastructure.lon = infrastructure.lon.apply(pd.to_numeric, errors = 'coerce', downcast = 'float')
-        
-        # Remove NAs
-        infrastructure = infrastructure[~infrastructure.lat.isna()] 
-        
-        # Add country code to soure_id
-        infrastructure['source_id'] = infrastructure.apply(
-            lambda row: str(row['isoalpha3']) + str(int(row['source_id'])) if re.match(r'^\d', str(row['source_id'])) else row['source_id'], 
-            axis = 1)
+def write_columnar(url, columns, path):
+    """
+    converts a public records file into a local columnar copy (parquet), batch by batch
+    older copies of the same file are removed
+    """
     
-    return infrastructure
+    os.makedirs(COLUMNAR_DIR, exist_ok = True)
+    temp   = f"{path}.{threading.get_ident()}.tmp"
+    writer = None
+    for batch in get_public_batches(url, columns):
+        if writer is None:
+            writer = pq.ParquetWriter(temp, batch.schema, compression = "zstd")
+        writer.write_batch(batch)
+    if writer is None:
+        return None
+    writer.close()
+    
+    prefix = os.path.basename(path).split("_")[0]
+    for name in os.listdir(COLUMNAR_DIR):
+        if name.startswith(f"{prefix}_") and name.endswith(".parquet"):
+            os.remove(os.path.join(COLUMNAR_DIR, name))
+    os.replace(temp, path)
+    
+    return path
 
-def get_amenity(amenity, group):
+def get_public_records(path, file, columns = None, countries = None, etag = None):
+    """
+    reads public records (OSM, healthsites.io) with only the columns of interest in compact types:
+    categorical isoalpha3, source and amenity, float32 coordinates
+    rows without country or outside `countries` are dropped batch by batch, the full file is never in memory
+    
+    Parameters
+    ----------
+    path : str
+        amenity folder, e.g. `Geospatial infrastructure/Healthcare Facilities`
+    file : str
+        file in the amenity folder
+    columns : list, optional
+        columns to read (default is every column but `geometry`)
+    countries : list, optional
+        isoalpha3 codes of the countries to keep (default is every country)
+    etag : str, optional
+        version of the file, the file is converted once into a local columnar copy (parquet) 
+        and later runs read the copy with the country filter pushed down (default is None, read the .csv)
+    
+    Returns
+    ----------
+    pandas.DataFrame
+        dataframe with public records
+    """
+    
+    url     = f"{scldatalake}{path}/{file}"
+    columns = [name for name in pd.read_csv(url, nrows = 0).columns if name != "geometry"] if columns is None else list(columns)
+    
+    # Country filter
+    filter_ = ds.field("isoalpha3").is_valid()
+    if countries is not None:
+        filter_ = filter_ & ds.field("isoalpha3").isin(pa.array(sorted(countries), type = pa.string()))
+    
+    # Columnar copy (converted once per version)
+    columnar = get_columnar_path(url, columns, etag) if etag is not None else None
+    if columnar is not None and (os.path.exists(columnar) or write_columnar(url, columns, columnar) is not None):
+        table = ds.dataset(columnar, format = "parquet").to_table(filter = filter_)
+    else:
+        batches = [batch.filter(filter_) for batch in get_public_batches(url, columns)]
+        if len(batches) == 0:
+            return pd.DataFrame({name: [] for name in columns})
+        table = pa.Table.from_batches(batches)
+    
+    # Categories of the rows kept only
+    file = table.to_pandas()
+    for column in file.select_dtypes("category"):
+        file[column] = file[column].cat.remove_unused_categories()
+    
+    return file
+
+def get_public_healthsites(path, file, countries = None, etag = None):
+    """
+    reads and normalizes the healthsites.io records (without geometry)
+    """
+    
+    return get_public_records(path, file, countries = countries, etag = etag)
+
+def get_public_osm(path, file, countries = None, etag = None):
+    """
+    reads and normalizes OSM records of `countries`
+    """
+    
+    file = get_public_records(path, file, ['isoalpha3','id','amenity','name','lat','lon'], countries, etag)
+    
+    # Create variables
+    file['source']    = pd.Categorical(["OSM"] * len(file))
+    file['source_id'] = file.id
+    
+    # Keep variables of interest
+    return file[['isoalpha3','source','source_id','amenity','name','lat','lon']]
+
+def get_amenity_public(amenity, public, countries = None, objects = None, refresh = False):
+    """
+    process public records by file: healthsites.io (first file) and OSM (IADB countries)
+    
+    Parameters
+    ----------
+    amenity : str
+        string with amenity name, including:
+            financial
+            healthcare
+    public : list
+        list of public files
+    countries : list, optional
+        isoalpha3 codes of the countries to process (default is all countries)
+    objects : dict, optional
+        manifest of the public files from `get_object_manifest`,
+        files that did not change are read from the cache (default is None, read every file)
+    refresh : bool, optional
+        read every file even if it did not change (default is False)
+    
+    Returns
+    ----------
+    dict
+        dataframe of public records by file
+    dict
+        skipped and rebuilt files
+    """
+    
+    # Countries of interest (IADB countries for OSM records), filtered while reading
+    path   = f"Geospatial infrastructure/{amenity} Facilities"
+    iadb   = set(get_iadb().isoalpha3.dropna())
+    codes  = sorted(countries) if countries is not None else None
+    codes_ = sorted(iadb & set(countries)) if countries is not None else sorted(iadb)
+    etag   = lambda file: objects[file]["etag"] if objects is not None else None
+    
+    # Records different from OSM (first file) and OSM records
+    sources = {}
+    file    = [file for file in public if "OSM" not in file]
+    if len(file) > 0:
+        sources[file[0]] = ([file[0]], lambda file = file[0]: get_public_healthsites(path, file, codes, etag(file)), codes)
+    for file in [file for file in public if "OSM" in file]:
+        sources[file] = ([file], lambda file = file: get_public_osm(path, file, codes_, etag(file)), codes_)
+    
+    return get_source_frames(amenity, "public", sources, objects, refresh)
+
+def get_amenity(amenity, group, countries = None, refresh = False):
     """
     gets the infrastructure data based on official and public records
+    source files are listed with their ETag and size, only changed sources are read and processed again,
+    the others are reused from the cache (`infrastructure.attrs["ingest"]` has the skipped and rebuilt sources)
     
     Parameters
     ----------
@@ -497,6 +821,11 @@ def get_amenity(amenity, group):
         string wtth data group name, including:
             official
             public
+            all (official and public records conflated into one row per facility, see `get_conflated`)
+    countries : list, optional
+        isoalpha3 codes of the countries to process (default is all countries)
+    refresh : bool, optional
+        read and process every source even if it did not change (default is False)
     
     Returns
     ----------
@@ -507,15 +836,16 @@ def get_amenity(amenity, group):
             name     : amenity name
             lat      : latitude
             lon      : longitude
+        with `all`, also facility_id, n_sources, sources, source_ids and similarity (provenance)
     """
     
     # Inputs
-    data    = get_iadb()
     amenity = amenity.title()
     
-    # Get files by bucket
-    path  = f"Geospatial infrastructure/{amenity} Facilities"
-    files = [file.key.split(path + "/")[1] for file in s3_bucket.objects.filter(Prefix = path).all()]
+    # Get files by bucket (with ETag and size)
+    path    = f"Geospatial infrastructure/{amenity} Facilities"
+    objects = get_object_manifest(path)
+    files   = list(objects)
     
     # Identify records by categories
     official = [file for file in files if "official" in file]
@@ -529,58 +859,51 @@ def get_amenity(amenity, group):
     if group == "official":
         # Process official records 
         if len(official) > 0:
-            infrastructure = get_amenity_official(amenity, official)
+            infrastructure = get_amenity_official(amenity, official, countries, objects = objects, refresh = refresh)
         else:
             print(f"No official records for {amenity} infrastructure")
             
     elif group == "public":    
         # Process public records
-        # Records different from OSM
-        file = [file for file in public if "OSM" not in file]
-        if len(file) > 0:
-            # Import data
-            file  = file[0]
-            path_ = f"{scldatalake}{path}/{file}"
-            file  = pd.read_csv(path_)
-
-            # Keep rows of interest
-            file = file[~file.isoalpha3.isin(name)]
-            file = file[~file.isoalpha3.isna()]
-
-            # Keep variables of interest
-            file = file.drop(columns = "geometry")
-
-            # Add to master tables
-            infrastructure.append(file)
-
-            # Identify healthsites country names
-            name =  pd.concat(infrastructure).isoalpha3.unique().tolist()
-        
-        # OSM records
-        # Import data
-        file_  = [file for file in public if "OSM" in file]
-        for file in file_:
-            path_ = f"{scldatalake}{path}/{file}"
-            file  = pd.read_csv(path_, low_memory = False)
-
-            # Keep IADB countries
-            file = file[file.isoalpha3.isin(data.isoalpha3.unique())]
-
+        frames, report = get_amenity_public(amenity, public, countries, objects = objects, refresh = refresh)
+        
+        for file, frame in frames.items():
+            if "OSM" not in file:
+                # Add to master tables
+                infrastructure.append(frame)
+                
+                # Identify healthsites country names
+                name = pd.concat(infrastructure).isoalpha3.unique().tolist()
+                continue
+            
             # Keeps countries without healthsites.io records
-            file = file[~file.isoalpha3.isin(name)]
-
-            # Create variables
-            file['source']    = "OSM"
-            file['source_id'] = file.id
-
-            # Keep variables of interest
-            file = file[['isoalpha3','source','source_id','amenity','name','lat','lon']]
-
+            frame = frame[~frame.isoalpha3.isin(name)]
+            
             # Add to master table
-            infrastructure.append(file)
-
-        # Generate master table 
+            infrastructure.append(frame)
+        
+        # Generate master table (compact types)
         infrastructure = pd.concat(infrastructure)
         infrastructure = infrastructure.reset_index(drop = True)
+        for column in ['isoalpha3','source','amenity']:
+            if column in infrastructure:
+                infrastructure[column] = infrastructure[column].astype("category")
+        infrastructure.attrs["ingest"] = report
+    
+    elif group == "all":
+        # Process official and public records
+        official_ = get_amenity_official(amenity, official, countries, objects = objects, refresh = refresh) if len(official) > 0 else []
+        frames, report = get_amenity_public(amenity, public, countries, objects = objects, refresh = refresh)
+        
+        # Conflate records by priority: official, healthsites.io and OSM
+        frames = ([official_] if len(official_) > 0 else []) + \
+                 [frame for file, frame in frames.items() if "OSM" not in file] + \
+                 [frame for file, frame in frames.items() if "OSM" in file]
+        
+        # Generate master table (one row per facility)
+        if len(frames) > 0:
+            infrastructure, _ = get_conflated(frames)
+            infrastructure.attrs["ingest"] = {"official": official_.attrs.get("ingest") if len(official_) > 0 else None,
+                                              "public"  : report}
     
-    return infrastructure
\ No newline at end of file
+    return infrastructure
@@ -1,7 +1,37 @@
-def get_meta_url(data, code):
+import os
+import re
+import time
+import concurrent.futures
+
+import dotenv
+import requests
+import numpy as np
+import pandas as pd
+import shapely
+
+from .population_store          import write_population_store
+from ..geospatial.raster        import write_population_raster
+from ..geospatial.points        import get_point_gdf
+from ..utilities.auxiliary_data import get_iadb, get_country_shp
+from ..utilities.cache          import DiskCache
+from ..utilities.mirror         import get_mirror
+
+dotenv.load_dotenv()
+scldatalake = os.environ.get("scldatalake")
+
+# Scraped HDX resources are reused for `META_TTL` seconds (one week)
+META_TTL   = 7 * 24 * 3600
+meta_cache = None
+
+# META demographic groups
+POPULATION_GROUPS = ["total_population", "women", "men", "children_under_five", "youth_15_24",
+                     "elderly_60_plus", "women_of_reproductive_age_15_49"]
+
+def get_meta_url(data, code, ttl = META_TTL):
     """
     gets the HTML content from the high density population datasets in HDX
     https://data.humdata.org/organization/facebook?q=high%20resolution%20population%20density
+    results are cached on disk for `ttl` seconds
     
     Parameters
     ----------
@@ -9,6 +39,8 @@ def get_meta_url(data, code):
         dataframe with IADB country names (EN/SP) and isoalpha3 codes
     code : str
         country's isoalpha3 code
+    ttl : float, optional
+        seconds during which a cached scrape is reused, 0 forces a new scrape (default is one week)
     
     Returns
     ----------
@@ -27,14 +59,24 @@ def get_meta_url(data, code):
     # Get latest population density maps name files 
     # Request HTML content
     geo      = data[data.isoalpha3 == code].country_name_en.values[0].lower().replace(" ","-")
-    url      = f"https://data.humdata.org/dataset/{geo}-high-resolution-population-density-maps-demographic-estimates"
-    response = requests.get(url)
+    page     = f"https://data.humdata.org/dataset/{geo}-high-resolution-population-density-maps-demographic-estimates"
+    
+    # Cached scrape (by country and dataset page)
+    global meta_cache
+    if meta_cache is None:
+        meta_cache = DiskCache("hdx_resources")
+    cached = meta_cache.get_json(f"{code}|{page}")
+    if cached is not None and time.time() - cached["time"] < ttl:
+        return cached["value"]
+    
+    response = requests.get(page)
     
     # Omit countries without population daya
     if response.status_code == 200:
     
         # Format HTML code
         html = response.content
+        from bs4 import BeautifulSoup
         soup = BeautifulSoup(html, "html5lib")
 
         # Find file names
@@ -72,9 +114,114 @@ def get_meta_url(data, code):
     else: 
         dict_ = dict(zip([],[]))
     
+    # Cache results (also for countries without population data)
+    if response.status_code in [200, 404]:
+        meta_cache.set_json(f"{code}|{page}", {"time": time.time(), "value": dict_})
+    
     return dict_
 
-def get_population(data, code, group = "total_population"):
+def get_meta_file(url, mirror = True, ttl = None):
+    """
+    gets the local copy of a META file from the download mirror
+    only files changed upstream (ETag/Last-Modified) are downloaded again
+    
+    Parameters
+    ----------
+    url : str
+        URL of the META file
+    mirror : bool, optional
+        use the local mirror, if False the URL is returned (default is True)
+    ttl : float, optional
+        seconds during which a mirrored file is used without revalidation (default is None)
+    
+    Returns
+    ----------
+    str
+        local path (or URL) of the file
+    """
+    
+    return get_mirror().get(url, ttl = ttl) if mirror else url
+
+def get_population_column(columns):
+    """
+    selects the most recent population estimation from the columns of a META file
+    """
+    
+    temp = [name for name in columns if "latit" not in name and "long" not in name]
+    if len(temp) > 1: 
+        if temp[len(temp)-1] > temp[len(temp)-2]:
+            var_ = temp[len(temp)-1]
+        else: 
+            var_ = temp[len(temp)-2]
+    else: 
+        var_ = temp[0]
+    
+    return var_
+
+def get_inside(shape, lon, lat):
+    """
+    tests which points are inside a shape, bounding box first
+    points on the border are kept as in `gpd.clip` (`shape` should be prepared)
+    """
+    
+    xmin, ymin, xmax, ymax = shape.bounds
+    inside = (lon >= xmin) & (lon <= xmax) & (lat >= ymin) & (lat <= ymax)
+    inside[inside] = shapely.intersects_xy(shape, lon[inside], lat[inside])
+    
+    return inside
+
+def get_grid_key(lat, lon):
+    """
+    packs coordinates rounded to 1e-6 degrees into one integer key of the META grid
+    """
+    
+    lat_ = np.round(np.asarray(lat, dtype = np.float64) * 1e6).astype(np.int64) + 90_000_000
+    lon_ = np.round(np.asarray(lon, dtype = np.float64) * 1e6).astype(np.int64) + 180_000_000
+    
+    return lat_ * 360_000_001 + lon_
+
+def get_population_chunks(path, shape, chunksize = 1_000_000):
+    """
+    reads a META population file in chunks and keeps the points inside a shape
+    only the coordinates and the most recent estimation are parsed, population as float32
+    
+    Parameters
+    ----------
+    path : str
+        path or URL to the META .csv file
+    shape : shapely.Geometry
+        country/region of interest
+    chunksize : int, optional
+        number of rows per chunk (default is 1,000,000)
+    
+    Yields
+    ----------
+    pandas.DataFrame
+        dataframe with `latitude`, `longitude` and `population` inside the shape
+        (index is the row number in the file)
+    """
+    
+    # Columns of interest
+    columns = pd.read_csv(path, nrows = 0).columns
+    var_    = get_population_column(columns)
+    lat     = [name for name in columns if "latit" in name][0]
+    lon     = [name for name in columns if "long"  in name][0]
+    
+    # Prepared shape for point-in-polygon tests
+    shapely.prepare(shape)
+    
+    reader = pd.read_csv(path, usecols = [lat, lon, var_], chunksize = chunksize,
+                         dtype = {lat: np.float64, lon: np.float64, var_: np.float32})
+    for chunk in reader:
+        chunk = chunk.rename(columns = {lat: "latitude", lon: "longitude", var_: "population"})
+        chunk = chunk[["latitude", "longitude", "population"]]
+        
+        # Bounding box filter, then clip
+        chunk = chunk[get_inside(shape, chunk.longitude.values, chunk.latitude.values)]
+        
+        yield chunk
+
+def get_population(data, code, group = "total_population", chunksize = None, export = "store", mirror = True, geometry = False):
     """
     META population estimations
     gets the high density population datasets in HDX
@@ -95,11 +242,23 @@ def get_population(data, code, group = "total_population"):
             youth_15_24
             elderly_60_plus
             women_of_reproductive_age_15_49
+    chunksize: int, optional
+        if provided, files are streamed in chunks of `chunksize` rows, clipped chunk by chunk
+        and written incrementally to the Data Lake, keeping memory bounded (default is None)
+    export: str, optional
+        export format in the Data Lake (default is `store`), including:
+            store: columnar population store, one partition per group (see `read_population_store`)
+            csv  : .csv.gz file with all groups
+    mirror: bool, optional
+        read META files from the local download mirror (default is True)
+    geometry: bool, optional
+        return a GeoDataFrame with point geometries (default is False, coordinates only)
     
     Returns
     ----------
-    pandas.DataFrame
+    pandas.DataFrame or geopandas.GeoDataFrame or list or str
         dataframe with adjusted population by admin-0 shapefile (country's admin border)
+        or, if `chunksize` is provided, the store partitions or the path of the exported .csv.gz
     """
     # Import data
     data = get_iadb()
@@ -108,6 +267,11 @@ def get_population(data, code, group = "total_population"):
     # Group of interest 
     groups = [name for name in meta.keys() if group in name]
     
+    # Streaming mode
+    if chunksize is not None:
+        items = {group_: [meta[group_][0], get_meta_file(meta[group_][1], mirror)] for group_ in groups}
+        return get_population_stream(code, items, chunksize, export)
+    
     # Individuals shapefiles 
     files_ = []
     for group_ in groups:
@@ -115,18 +279,11 @@ def get_population(data, code, group = "total_population"):
         item = meta[group_]
         name = item[0]
         path = item[1]
-        pop  = pd.read_csv(path)
+        pop  = pd.read_csv(get_meta_file(path, mirror))
 
         # Keep variables of interest
         # Keep most recent population estimation 
-        temp = [name for name in pop.columns if "latit" not in name and "long" not in name]
-        if len(temp) > 1: 
-            if temp[len(temp)-1] > temp[len(temp)-2]:
-                var_ = temp[len(temp)-1]
-            else: 
-                var_ = temp[len(temp)-2]
-        else: 
-            var_ = temp[0]
+        var_ = get_population_column(pop.columns)
 
         # Select variables of interest
         vars_ = ["latitude","longitude",var_]
@@ -136,26 +293,172 @@ def get_population(data, code, group = "total_population"):
         # Rename variables
         pop.columns = [re.sub("_\d+", "", name) for name in pop.columns]
 
-        # Convert population .csv to .gpd
-        geometry = gpd.points_from_xy(pop['longitude'], pop['latitude'])
-        pop_geo  = gpd.GeoDataFrame(pop.copy(), geometry = geometry, crs = 4326)
-
-        # Keep points inside country/region of interets
+        # Keep points inside country/region of interets (coordinate arrays, no point geometries)
         # get_country_shp() default admin-level-0
-        shp_        = get_country_shp(code)
-        pop_geo_adj = gpd.clip(pop_geo, shp_)
+        shape   = shapely.union_all(get_country_shp(code).geometry.values)
+        shapely.prepare(shape)
+        pop_adj = pop[get_inside(shape, pop.longitude.values, pop.latitude.values)]
+        
+        # Export to the population store (one partition per group)
+        if export == "store":
+            write_population_store(pop_adj, code, group_)
         
-        # Append to list of shapefiles
-        files_.append(pop_geo_adj)
+        # Append to list of dataframes
+        files_.append(pop_adj)
     
     # Create master data
-    pop_geo_adj_ = gpd.pd.concat(files_).pipe(gpd.GeoDataFrame)
+    file = pd.concat(files_)
+    if export == "store":
+        return get_point_gdf(file) if geometry else file
     
     # Export to Data Lake as .csv.gz 
-    file = pop_geo_adj_.copy()
-    file = file.drop(columns = "geometry")
     path = "Development Data Partnership/Facebook - High resolution population density map/public-fb-data/csv"
     path = scldatalake + f"{path}/{code.upper()}/{name}"
     file.to_csv(path, compression = 'gzip')
     
-    return file
\ No newline at end of file
+    return get_point_gdf(file) if geometry else file
+
+def get_population_stream(code, items, chunksize = 1_000_000, export = "store"):
+    """
+    streams META population files into the population store or one .csv.gz in the Data Lake
+    memory is bounded by `chunksize` regardless of country size
+    
+    Parameters
+    ----------
+    code : str
+        country's isoalpha3 code
+    items : dict
+        dictionary with [file name, URL] by group from `get_meta_url`
+    chunksize : int, optional
+        number of rows per chunk (default is 1,000,000)
+    export : str, optional
+        `store` (one partition per group, one sorted part per chunk) or `csv` (default is `store`)
+    
+    Returns
+    ----------
+    list or str
+        store partitions or path of the exported .csv.gz
+    """
+    import fsspec
+    
+    # Country's admin border (admin-0)
+    shape = shapely.union_all(get_country_shp(code).geometry.values)
+    
+    # Export to the population store
+    if export == "store":
+        return [write_population_store(get_population_chunks(url, shape, chunksize), code, group_)
+                for group_, (_, url) in items.items()]
+    
+    # Export to Data Lake as .csv.gz (same layout as `get_population`)
+    name = list(items.values())[-1][0]
+    path = "Development Data Partnership/Facebook - High resolution population density map/public-fb-data/csv"
+    path = scldatalake + f"{path}/{code.upper()}/{name}"
+    
+    header = True
+    with fsspec.open(path, "wt", compression = "gzip") as file:
+        for _, url in items.values():
+            for chunk in get_population_chunks(url, shape, chunksize):
+                chunk.to_csv(file, header = header)
+                header = False
+    
+    return path
+
+def get_population_group(url, group):
+    """
+    reads the most recent estimation of a META file as a population series indexed by grid key
+    """
+    
+    columns = pd.read_csv(url, nrows = 0).columns
+    var_    = get_population_column(columns)
+    lat     = [name for name in columns if "latit" in name][0]
+    lon     = [name for name in columns if "long"  in name][0]
+    
+    pop = pd.read_csv(url, usecols = [lat, lon, var_], 
+                      dtype = {lat: np.float64, lon: np.float64, var_: np.float32})
+    pop = pd.Series(pop[var_].values, index = get_grid_key(pop[lat].values, pop[lon].values), name = group)
+    
+    # One value per grid cell
+    if not pop.index.is_unique:
+        pop = pop.groupby(level = 0).sum()
+    
+    return pop
+
+def get_population_groups(data, code, groups = POPULATION_GROUPS, max_workers = 7, mirror = True):
+    """
+    META population estimations for several demographic groups in one wide table
+    group files are downloaded in parallel, aligned on the shared grid
+    and clipped once by the admin-0 shapefile
+    
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        dataframe with IADB country names (EN/SP) and isoalpha3 codes
+    code : str
+        country's isoalpha3 code
+    groups : list, optional
+        population groups (default is all groups in `POPULATION_GROUPS`)
+    max_workers : int, optional
+        number of parallel downloads (default is 7)
+    mirror : bool, optional
+        read META files from the local download mirror (default is True)
+    
+    Returns
+    ----------
+    pandas.DataFrame
+        dataframe with `latitude`, `longitude` and one population column per group
+        (float32, NaN where a group has no estimation)
+    """
+    
+    # Group files
+    meta   = get_meta_url(data, code)
+    groups = [group for group in groups if group in meta]
+    
+    # Parallel downloads
+    with concurrent.futures.ThreadPoolExecutor(max_workers = max_workers) as executor:
+        pop = list(executor.map(lambda group: get_population_group(get_meta_file(meta[group][1], mirror), group), groups))
+    
+    # Align on the grid key (outer join)
+    pop = pd.concat(pop, axis = 1, join = "outer").sort_index()
+    key = pop.index.values
+    lat = (key // 360_000_001 - 90_000_000) / 1e6
+    lon = (key %  360_000_001 - 180_000_000) / 1e6
+    
+    # Keep points inside country (admin-0), once for all groups
+    shape = shapely.union_all(get_country_shp(code).geometry.values)
+    shapely.prepare(shape)
+    inside = get_inside(shape, lon, lat)
+    
+    # Wide table
+    pop = pop[inside].reset_index(drop = True).astype(np.float32)
+    pop.insert(0, "longitude", lon[inside])
+    pop.insert(0, "latitude" , lat[inside])
+    
+    return pop
+
+def get_population_raster(data, code, path, groups = POPULATION_GROUPS, mirror = True):
+    """
+    converts the META population of a country (every demographic group) into a raster
+    with one band per group, see `write_population_raster` and `PopulationRaster`
+    
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        dataframe with IADB country names (EN/SP) and isoalpha3 codes
+    code : str
+        country's isoalpha3 code
+    path : str
+        output file, GeoTIFF (.tif) or memory-mapped NumPy (.npy)
+    groups : list, optional
+        population groups (default is all groups in `POPULATION_GROUPS`)
+    mirror : bool, optional
+        read META files from the local download mirror (default is True)
+    
+    Returns
+    ----------
+    str
+        path of the raster
+    """
+    
+    pop = get_population_groups(data, code, groups, mirror = mirror)
+    
+    return write_population_raster(pop, path)
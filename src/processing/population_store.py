@@ -0,0 +1,254 @@
+import os
+
+import dotenv
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.fs as pafs
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import h3.api.numpy_int as h3_int
+
+from ..utilities.aws        import get_arrow_filesystem
+from ..geospatial.hexagons import get_h3_index, get_h3_cells, get_h3_integer
+from ..geospatial.pyramid  import get_h3_pyramid, write_h3_pyramid, H3Pyramid, PYRAMID_RESOLUTIONS
+
+dotenv.load_dotenv()
+scldatalake = os.environ.get("scldatalake")
+
+# Population store in the Data Lake
+    # {root}/isoalpha3={code}/group={group}/part-{n}.parquet
+    # Rows are sorted by H3 parent cell so every row group covers a compact region
+    # and its min/max statistics (h3_parent, latitude, longitude) allow predicate pushdown
+    # {root}/isoalpha3={code}/pyramid-{group}.parquet
+    # H3 population pyramid (outside the group partitions, not part of the point dataset)
+POPULATION_STORE = "Development Data Partnership/Facebook - High resolution population density map/public-fb-data/parquet"
+STORE_RESOLUTION = 5
+ROW_GROUP_SIZE   = 65_536
+
+POPULATION_SCHEMA = pa.schema([("h3_parent" , pa.uint64()),
+                               ("latitude"  , pa.float32()),
+                               ("longitude" , pa.float32()),
+                               ("population", pa.float32())])
+
+def get_store_path(code, group = "total_population", path = None):
+    """
+    gets the filesystem and directory of a country/group partition of the population store
+
+    Parameters
+    ----------
+    code : str
+        country's isoalpha3 code
+    group : str, optional
+        population group (default is `total_population`)
+    path : str, optional
+        store root, local path or s3:// URL (default is the store in the Data Lake)
+
+    Returns
+    ----------
+    pyarrow.fs.FileSystem
+        filesystem of the store
+    str
+        partition directory
+    """
+
+    root = scldatalake + POPULATION_STORE if path is None else path
+    filesystem, root = get_arrow_filesystem(root)
+
+    return filesystem, f"{root.rstrip('/')}/isoalpha3={code.upper()}/group={group}"
+
+def get_population_table(data, resolution = STORE_RESOLUTION):
+    """
+    converts population points to the store layout
+    compact dtypes (float32 coordinates and population, uint64 H3 parent) sorted by H3 parent
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        dataframe with `latitude`, `longitude` and `population`
+    resolution : int, optional
+        resolution of the H3 parent cell (default is 5)
+
+    Returns
+    ----------
+    pyarrow.Table
+        table with `h3_parent`, `latitude`, `longitude` and `population`
+    """
+
+    h3_parent = get_h3_index(data["latitude"].values, data["longitude"].values, resolution)
+    order     = np.argsort(h3_parent, kind = "stable")
+
+    table = pa.table({"h3_parent" : h3_parent[order],
+                      "latitude"  : data["latitude"].values[order].astype(np.float32),
+                      "longitude" : data["longitude"].values[order].astype(np.float32),
+                      "population": data["population"].values[order].astype(np.float32)},
+                     schema = POPULATION_SCHEMA)
+
+    return table.replace_schema_metadata({"h3_resolution": str(resolution)})
+
+def write_population_store(data, code, group = "total_population", path = None,
+                           resolution = STORE_RESOLUTION, row_group_size = ROW_GROUP_SIZE):
+    """
+    writes (replaces) the country/group partition of the population store
+
+    Parameters
+    ----------
+    data : pandas.DataFrame or iterable
+        dataframe with `latitude`, `longitude` and `population`
+        or an iterable of such dataframes (e.g. chunks), each written as its own sorted part
+    code : str
+        country's isoalpha3 code
+    group : str, optional
+        population group (default is `total_population`)
+    path : str, optional
+        store root, local path or s3:// URL (default is the store in the Data Lake)
+    resolution : int, optional
+        resolution of the H3 parent cell used as sort key (default is 5)
+    row_group_size : int, optional
+        rows per parquet row group (default is 65,536)
+
+    Returns
+    ----------
+    str
+        partition directory
+    """
+
+    filesystem, directory = get_store_path(code, group, path)
+
+    # Replace the partition
+    if filesystem.get_file_info(directory).type != pafs.FileType.NotFound:
+        filesystem.delete_dir(directory)
+    filesystem.create_dir(directory, recursive = True)
+
+    # One sorted part per dataframe
+    chunks = [data] if isinstance(data, pd.DataFrame) else data
+    for n, chunk in enumerate(chunks):
+        table = get_population_table(chunk, resolution)
+        pq.write_table(table, f"{directory}/part-{n}.parquet", filesystem = filesystem,
+                       row_group_size = row_group_size, compression = "zstd")
+
+    return directory
+
+def read_population_store(code, group = "total_population", columns = None, bbox = None, cells = None, path = None):
+    """
+    reads population points from the store
+    only the selected columns and the row groups that can match the filters are read
+
+    Parameters
+    ----------
+    code : str
+        country's isoalpha3 code
+    group : str, optional
+        population group (default is `total_population`)
+    columns : list, optional
+        columns to read, among `h3_parent`, `latitude`, `longitude` and `population` (default is all)
+    bbox : tuple, optional
+        bounding box (xmin, ymin, xmax, ymax) in degrees (default is None)
+    cells : array-like, optional
+        H3 cells (any resolution, as integers or strings) covering the region of interest,
+        matched through the H3 hierarchy of `h3_parent`, points of cells finer than the store
+        resolution are filtered by their own cell at that resolution (default is None)
+    path : str, optional
+        store root, local path or s3:// URL (default is the store in the Data Lake)
+
+    Returns
+    ----------
+    pandas.DataFrame
+        dataframe with population points (float32 coordinates and population)
+    """
+
+    filesystem, directory = get_store_path(code, group, path)
+    dataset = ds.dataset(directory, filesystem = filesystem, format = "parquet")
+
+    # Filters (pushed down to row group statistics)
+    filters = []
+    if bbox is not None:
+        xmin, ymin, xmax, ymax = bbox
+        filters.append((ds.field("longitude") >= xmin) & (ds.field("longitude") <= xmax) &
+                       (ds.field("latitude")  >= ymin) & (ds.field("latitude")  <= ymax))
+    fine = np.array([], dtype = np.uint64)
+    if cells is not None:
+        metadata   = dataset.schema.metadata or {}
+        resolution = int(metadata.get(b"h3_resolution", STORE_RESOLUTION))
+        cells      = np.unique(get_h3_integer(cells)).astype(np.uint64)
+        levels     = np.array([h3_int.h3_get_resolution(int(cell)) for cell in cells], dtype = np.int64)
+        fine       = cells[levels > resolution]
+        filters.append(ds.field("h3_parent").isin(pa.array(get_h3_cells(cells, resolution), type = pa.uint64())))
+
+    filter_ = None
+    for expression in filters:
+        filter_ = expression if filter_ is None else filter_ & expression
+
+    # Cells finer than the store: coordinates are needed to filter the points of their parents
+    columns_ = columns
+    if len(fine) > 0 and columns is not None:
+        columns_ = list(columns) + [name for name in ["h3_parent", "latitude", "longitude"] if name not in columns]
+
+    data = dataset.to_table(columns = columns_, filter = filter_).to_pandas()
+
+    if len(fine) > 0:
+        coarse = get_h3_cells(cells[levels <= resolution], resolution)
+        keep   = np.isin(data.h3_parent.values.astype(np.uint64), coarse)
+        for level in np.unique(levels[levels > resolution]):
+            index = get_h3_index(data.latitude.values.astype(np.float64), data.longitude.values.astype(np.float64), int(level))
+            keep |= np.isin(np.asarray(index).astype(np.uint64), cells[levels == level])
+        data = data[keep].reset_index(drop = True)
+        data = data[list(columns)] if columns is not None else data
+
+    return data
+
+def get_pyramid_path(code, group = "total_population", path = None):
+    """
+    gets the filesystem and file of the H3 population pyramid of a country/group
+    """
+
+    filesystem, directory = get_store_path(code, group, path)
+    return filesystem, f"{directory.rsplit('/', 1)[0]}/pyramid-{group}.parquet"
+
+def write_population_pyramid(code, group = "total_population", path = None, resolutions = PYRAMID_RESOLUTIONS,
+                             batch_size = 1_000_000):
+    """
+    builds and writes the H3 population pyramid of a country/group from the population store
+    points are read once in batches and indexed at the finest resolution, coarser levels sum their children
+
+    Parameters
+    ----------
+    code : str
+        country's isoalpha3 code
+    group : str, optional
+        population group (default is `total_population`)
+    path : str, optional
+        store root, local path or s3:// URL (default is the store in the Data Lake)
+    resolutions : tuple, optional
+        finest and coarsest resolution (default is 9 and 3)
+    batch_size : int, optional
+        points read at once (default is 1,000,000)
+
+    Returns
+    ----------
+    str
+        pyramid file
+    """
+
+    filesystem, directory = get_store_path(code, group, path)
+    dataset = ds.dataset(directory, filesystem = filesystem, format = "parquet")
+    batches = (batch.to_pandas() for batch in dataset.to_batches(columns = ["latitude", "longitude", "population"],
+                                                                   batch_size = batch_size))
+
+    pyramid = get_h3_pyramid(batches, resolutions)
+
+    _, file = get_pyramid_path(code, group, path)
+    return write_h3_pyramid(pyramid, file, filesystem)
+
+def read_population_pyramid(code, group = "total_population", path = None):
+    """
+    reads the H3 population pyramid of a country/group
+
+    Returns
+    ----------
+    H3Pyramid
+        cell, k-ring and parent population lookups
+    """
+
+    filesystem, file = get_pyramid_path(code, group, path)
+    return H3Pyramid(file, filesystem)
@@ -1,4 +1,9 @@
-from .stats import calculate_stats, palettes, expand_colors, create_bivariate
+from importlib import import_module
+
+# Functions by module, imported on first use
+modules = {
+    ".stats": ['calculate_stats', 'palettes', 'expand_colors', 'create_bivariate']
+}
 
 __all__ = [
     'calculate_stats',
@@ -6,4 +11,15 @@ __all__ = [
     'expand_colors',
     'create_bivariate'
 ]
-            
\ No newline at end of file
+
+def __getattr__(name):
+    # Import the module of a function on first access (PEP 562)
+    for module, names in modules.items():
+        if name in names:
+            value = getattr(import_module(module, __name__), name)
+            globals()[name] = value
+            return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
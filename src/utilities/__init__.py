@@ -1,15 +1,40 @@
-from .auxiliary_data import get_iadb, get_country_shp
-from .general        import quarter_start, find_best_match, normalize_text
-from .metadata       import get_metadata
-from .example        import get_data_types
+from importlib import import_module
+
+# Functions by module, imported on first use
+modules = {
+    ".auxiliary_data": ['get_iadb', 'get_country_shp', 'clear_auxiliary_cache'],
+    ".aws"           : ['get_s3_client', 'get_s3_resource', 'get_s3_bucket', 'get_arrow_filesystem'],
+    ".mirror"        : ['get_mirror', 'Mirror'],
+    ".general"       : ['quarter_start', 'find_best_match', 'normalize_text'],
+    ".metadata"      : ['get_metadata'],
+    ".example"       : ['get_data_types']
+}
 
 __all__ = [
     'get_iadb',
     'get_country_shp',
+    'clear_auxiliary_cache',
+    'get_s3_client',
+    'get_s3_resource',
+    'get_s3_bucket',
+    'get_arrow_filesystem',
+    'get_mirror',
+    'Mirror',
     'quarter_start',
     'find_best_match',
     'normalize_text',
     'get_metadata',
     'get_data_types'
 ]
-            
\ No newline at end of file
+
+def __getattr__(name):
+    # Import the module of a function on first access (PEP 562)
+    for module, names in modules.items():
+        if name in names:
+            value = getattr(import_module(module, __name__), name)
+            globals()[name] = value
+            return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,24 +1,149 @@
 import os
 import io
-import boto3
+import time
+import threading
+import urllib.parse
+from collections import OrderedDict
+
 import dotenv
 
 import pandas as pd
 import geopandas as gpd
 
+from .aws   import get_s3_client
+from .cache import DiskCache
+
 dotenv.load_dotenv()
-s3          = boto3.client('s3')
 sclbucket   = os.environ.get("sclbucket")
 scldatalake = os.environ.get("scldatalake")
 
-def get_iadb():
+# In-process LRU cache {key: (tag, last validation, data)}, shared by threads (`memo_lock`)
+# Entries are revalidated against the source at most every `VALIDATE_SECONDS`
+memo             = OrderedDict()
+memo_lock        = threading.Lock()
+MEMO_SIZE        = 64
+VALIDATE_SECONDS = 300
+
+# On-disk cache (created on first use)
+auxiliary_cache = None
+
+def get_auxiliary_cache():
+    """
+    gets the on-disk cache of `get_iadb` and `get_country_shp`
+    """
+    
+    global auxiliary_cache
+    if auxiliary_cache is None:
+        auxiliary_cache = DiskCache("auxiliary_data")
+    
+    return auxiliary_cache
+
+def clear_auxiliary_cache():
+    """
+    invalidates the in-process and on-disk caches of `get_iadb` and `get_country_shp`
+    """
+    
+    with memo_lock:
+        memo.clear()
+    get_auxiliary_cache().clear()
+
+def get_source_tag(path, bucket = None):
+    """
+    gets the version tag (ETag and last-modified time) of a source file
+    
+    Parameters
+    ----------
+    path : str
+        S3 key (if `bucket` is provided), S3 URL (s3://bucket/key) or local path
+    bucket : str, optional
+        S3 bucket (default is None)
+    
+    Returns
+    ----------
+    str
+        version tag of the file
+    """
+    
+    if bucket is None:
+        url = urllib.parse.urlparse(path)
+        if url.scheme != "s3":
+            return str(os.path.getmtime(path))
+        bucket, path = url.netloc, url.path.lstrip("/")
+    
+    head = get_s3_client().head_object(Bucket = bucket, Key = path)
+    
+    return f"{head['ETag']}|{head['LastModified'].isoformat()}"
+
+def get_memoized(key, get_tag, load, cache = True):
+    """
+    returns a copy of a dataframe from the in-process or on-disk cache 
+    or loads it if missing or if the source changed
+    
+    Parameters
+    ----------
+    key : str
+        cache key
+    get_tag : function
+        returns the current version tag of the source
+    load : function
+        loads the dataframe from the source
+    cache : bool, optional
+        use the caches (default is True)
+    
+    Returns
+    ----------
+    pandas.DataFrame or geopandas.GeoDataFrame
+        dataframe
+    """
+    
+    if not cache:
+        return load()
+    
+    # In-process cache, revalidated at most every `VALIDATE_SECONDS`
+    # (the source is only read outside the lock)
+    now = time.time()
+    with memo_lock:
+        entry = memo.get(key)
+        if entry is not None and now - entry[1] < VALIDATE_SECONDS:
+            memo.move_to_end(key)
+            return entry[2].copy()
+    
+    # Version of the source, resolved once per call
+    tag = get_tag()
+    if entry is not None and entry[0] == tag:
+        data = entry[2]
+    else:
+        # On-disk cache (parquet), valid for the current version of the source
+        value = get_auxiliary_cache().get(key, tag = tag)
+        if value is not None:
+            read = gpd.read_parquet if value[:8] == b"geo-data" else pd.read_parquet
+            data = read(io.BytesIO(value[8:]))
+        else:
+            data  = load()
+            value = io.BytesIO()
+            data.to_parquet(value)
+            kind  = b"geo-data" if isinstance(data, gpd.GeoDataFrame) else b"tabular-"
+            get_auxiliary_cache().set(key, kind + value.getvalue(), tag = tag)
+    
+    # Least recently used entries out
+    with memo_lock:
+        memo[key] = (tag, now, data)
+        memo.move_to_end(key)
+        while len(memo) > MEMO_SIZE:
+            memo.popitem(last = False)
+    
+    return data.copy()
+
+def get_iadb(cache = True):
     """
     process data to obtain the spanish and english country names for IADB countries
     TODO: dataset must be updated directly in the Data Lake to eliminate this step
+    results are cached in-process and on disk, validated by the S3 ETag
     
     Parameters
     ----------
-    None
+    cache : bool, optional
+        use the in-process and on-disk caches (default is True)
     
     Returns
     ----------
@@ -26,11 +151,19 @@ def get_iadb():
         dataframe with IADB country names (EN/SP) and isoalpha3 codes 
     """
     
-    # Import country names
-        # Define path and S3 object 
+    # Define path and S3 object 
     path = "Manuals and Standards/IADB country and area codes for statistical use"
     file = "IADB_country_codes_admin_0.xlsx"
-    obj  = s3.get_object(Bucket = sclbucket, Key = f"{path}/{file}")
+    
+    return get_memoized("iadb", 
+                        lambda: get_source_tag(f"{path}/{file}", bucket = sclbucket), 
+                        lambda: get_iadb_(path, file), 
+                        cache)
+
+def get_iadb_(path, file):
+    # Import country names
+        # S3 object 
+    obj  = get_s3_client().get_object(Bucket = sclbucket, Key = f"{path}/{file}")
     
         # Load excel file from S3 into memory and create file-like object from the bytes read
     excel_data = obj['Body'].read()
@@ -64,9 +197,10 @@ def get_iadb():
     
     return data
 
-def get_country_shp(code = "", level = 0):
+def get_country_shp(code = "", level = 0, cache = True):
     """
     get the country's shapefile at the selected admin level 
+    results are cached in-process and on disk, validated by the S3 ETag of the .shp and .dbf files
     
     Parameters
     ----------
@@ -74,6 +208,8 @@ def get_country_shp(code = "", level = 0):
         country's isoalpha3 code
     level: int, optional 
         administrative level (default is 0)
+    cache : bool, optional
+        use the in-process and on-disk caches (default is True)
     
     Returns
     ----------
@@ -90,6 +226,14 @@ def get_country_shp(code = "", level = 0):
     
     # Import data
     path = scldatalake + file
+    
+    return get_memoized(f"shp|{file}", 
+                        lambda: "|".join(get_source_tag(path[:-4] + ext) for ext in [".shp", ".dbf"]), 
+                        lambda: get_country_shp_(path), 
+                        cache)
+
+def get_country_shp_(path):
+    # Import data
     shp  = gpd.read_file(path) 
     
     # Adjust country codes 
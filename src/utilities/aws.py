@@ -0,0 +1,108 @@
+import os
+import threading
+import urllib.parse
+
+import dotenv
+
+dotenv.load_dotenv()
+
+# Shared S3 client, resource and buckets (created on first use)
+# boto3 is imported and configured only when S3 is needed
+s3_client   = None
+s3_resource = None
+s3_buckets  = {}
+s3_lock     = threading.Lock()
+
+def get_s3_client():
+    """
+    gets the shared S3 client (thread-safe)
+
+    Returns
+    ----------
+    botocore.client.S3
+        S3 client
+    """
+
+    global s3_client
+    with s3_lock:
+        if s3_client is None:
+            import boto3
+            s3_client = boto3.client("s3")
+
+    return s3_client
+
+def get_s3_resource():
+    """
+    gets the shared S3 resource
+
+    Returns
+    ----------
+    boto3.resources.base.ServiceResource
+        S3 resource
+    """
+
+    global s3_resource
+    with s3_lock:
+        if s3_resource is None:
+            import boto3
+            s3_resource = boto3.resource("s3")
+
+    return s3_resource
+
+def get_s3_bucket(bucket = None):
+    """
+    gets a shared S3 bucket resource
+
+    Parameters
+    ----------
+    bucket : str, optional
+        bucket name (default is the `sclbucket` environment variable)
+
+    Returns
+    ----------
+    boto3.resources.factory.s3.Bucket
+        S3 bucket
+    """
+
+    bucket   = os.environ.get("sclbucket") if bucket is None else bucket
+    resource = get_s3_resource()
+    with s3_lock:
+        if bucket not in s3_buckets:
+            s3_buckets[bucket] = resource.Bucket(bucket)
+
+    return s3_buckets[bucket]
+
+def get_arrow_filesystem(url):
+    """
+    gets the pyarrow filesystem and plain path of a local path or URL (file://, s3://)
+    keys are not parsed as URIs, so they may contain spaces (e.g. Data Lake folders)
+
+    Parameters
+    ----------
+    url : str
+        local path or URL
+
+    Returns
+    ----------
+    pyarrow.fs.FileSystem
+        filesystem of the path
+    str
+        path in the filesystem (`bucket/key` for S3)
+    """
+
+    import pyarrow.fs as pafs
+
+    if "://" not in url:
+        return pafs.LocalFileSystem(), os.path.abspath(url)
+
+    scheme, rest = url.split("://", 1)
+    if scheme == "file":
+        return pafs.LocalFileSystem(), urllib.parse.unquote(rest)
+    if scheme == "s3":
+        bucket = rest.split("/", 1)[0]
+        region = os.environ.get("AWS_REGION") or os.environ.get("AWS_DEFAULT_REGION") or pafs.resolve_s3_region(bucket)
+        return pafs.S3FileSystem(region = region), rest
+
+    # Other filesystems: URI with an escaped path
+    filesystem, _ = pafs.FileSystem.from_uri(f"{scheme}://{urllib.parse.quote(rest, safe = '/:@')}")
+    return filesystem, rest
@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+
+# Default cache directory
+# Override with the `scl_cache_dir` environment variable
+CACHE_DIR = os.environ.get("scl_cache_dir", os.path.join(os.path.expanduser("~"), ".cache", "geospatial_analytics_scl"))
+
+def get_cache_key(**kwargs):
+    """
+    creates a content-addressed key from keyword arguments
+
+    Parameters
+    ----------
+    **kwargs
+        values identifying the cached object (JSON serializable)
+
+    Returns
+    ----------
+    str
+        SHA-256 hex digest of the sorted arguments
+    """
+
+    content = json.dumps(kwargs, sort_keys = True, default = str)
+
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+class DiskCache:
+    """
+    size-bounded on-disk key-value cache (SQLite) with least-recently-used eviction
+    values are stored as zlib-compressed bytes
+
+    Parameters
+    ----------
+    name : str
+        cache file name (without extension) inside `path`
+    path : str, optional
+        cache directory (default is `CACHE_DIR`)
+    max_size : int, optional
+        maximum size of the stored values in bytes (default is 1 GB)
+    """
+
+    def __init__(self, name, path = CACHE_DIR, max_size = 2**30):
+        os.makedirs(path, exist_ok = True)
+        self.path     = os.path.join(path, f"{name}.sqlite")
+        self.max_size = max_size
+        self.hits     = 0
+        self.misses   = 0
+        self.lock     = threading.Lock()
+        self.db       = sqlite3.connect(self.path, check_same_thread = False)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS cache (
+                               key      TEXT PRIMARY KEY,
+                               value    BLOB,
+                               size     INTEGER,
+                               tag      TEXT,
+                               created  REAL,
+                               accessed REAL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+        self.db.commit()
+        self.size     = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+
+    def get(self, key, tag = None):
+        """
+        returns the cached value or None if missing (or if `tag` does not match)
+        """
+
+        with self.lock:
+            row = self.db.execute("SELECT value, tag FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None or (tag is not None and row[1] != tag):
+                self.misses += 1
+                return None
+
+            self.db.execute("UPDATE cache SET accessed = ? WHERE key = ?", (time.time(), key))
+            self.db.commit()
+            self.hits += 1
+
+        return zlib.decompress(row[0])
+
+    def set(self, key, value, tag = None):
+        """
+        stores a value (bytes) and evicts least recently used entries above `max_size`
+        """
+
+        value = zlib.compress(value)
+        now   = time.time()
+        with self.lock:
+            row = self.db.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+            self.db.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?)",
+                            (key, value, len(value), tag, now, now))
+            self.size += len(value) - (row[0] if row else 0)
+            self._evict()
+            self.db.commit()
+
+    def get_json(self, key, tag = None):
+        """
+        returns the cached JSON value or None if missing
+        """
+
+        value = self.get(key, tag)
+        return None if value is None else json.loads(value)
+
+    def set_json(self, key, value, tag = None):
+        """
+        stores a JSON serializable value
+        """
+
+        self.set(key, json.dumps(value).encode("utf-8"), tag)
+
+    def delete(self, key):
+        """
+        removes one entry (explicit invalidation)
+        """
+
+        with self.lock:
+            row = self.db.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+            self.db.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self.db.commit()
+            self.size -= row[0] if row else 0
+
+    def clear(self):
+        """
+        removes all entries
+        """
+
+        with self.lock:
+            self.db.execute("DELETE FROM cache")
+            self.db.commit()
+            self.db.execute("VACUUM")
+            self.size = 0
+
+    def _evict(self):
+        # Remove least recently used entries until the cache fits in `max_size`
+        if self.size <= self.max_size:
+            return
+
+        keys = []
+        for key, size in self.db.execute("SELECT key, size FROM cache ORDER BY accessed"):
+            if self.size <= self.max_size:
+                break
+            keys.append((key,))
+            self.size -= size
+        self.db.executemany("DELETE FROM cache WHERE key = ?", keys)
+
+    def stats(self):
+        """
+        returns hit/miss counters and the number and size of stored entries
+        """
+
+        with self.lock:
+            entries = self.db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "size": self.size}
+
+    def __contains__(self, key):
+        # Membership does not count as a hit or miss
+        with self.lock:
+            return self.db.execute("SELECT 1 FROM cache WHERE key = ?", (key,)).fetchone() is not None
@@ -5,9 +5,6 @@ from datetime import datetime
 import pandas as pd
 import geopandas as gpd
 
-# Geospatial 
-import rasterio
-
 def get_metadata(file_path):
     '''
     extract metadata from a geospatial file 
@@ -58,7 +55,8 @@ def get_metadata(file_path):
         metadata["Feature types"]         = ", ".join(gdf.geometry.type.unique())
         
     elif file_path.endswith(('.tif', '.tiff', '.asc', '.nc')):
-        # Handle raster data
+        # Handle raster data (rasterio is imported on first use)
+        import rasterio
         with rasterio.open(file_path) as src:
             metadata["Coordinate system"]     = src.crs.to_string() if src.crs else "Unknown"
             metadata["Geographic extent"]     = f"Lat: {src.bounds.bottom} to {src.bounds.top}, Lon: {src.bounds.left} to {src.bounds.right}"
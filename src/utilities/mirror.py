@@ -0,0 +1,294 @@
+import os
+import json
+import time
+import base64
+import hashlib
+import threading
+import urllib.parse
+
+import urllib3
+import requests
+
+from .cache import CACHE_DIR
+
+# Default mirror directory
+MIRROR_DIR = os.path.join(CACHE_DIR, "mirror")
+
+# Shared mirror (created on first use)
+mirror = None
+
+def get_mirror(path = MIRROR_DIR):
+    """
+    gets the shared local download mirror
+
+    Parameters
+    ----------
+    path : str, optional
+        mirror directory (default is `MIRROR_DIR`)
+
+    Returns
+    ----------
+    Mirror
+        local download mirror
+    """
+
+    global mirror
+    if mirror is None or mirror.path != path:
+        mirror = Mirror(path)
+
+    return mirror
+
+def get_sha256(path, chunk_size = 2**20):
+    """
+    calculates the SHA-256 checksum of a file
+    """
+
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            sha256.update(chunk)
+
+    return sha256.hexdigest()
+
+def get_declared_sha256(headers):
+    """
+    returns the SHA-256 checksum of the whole file declared by the server (hexadecimal), None if not declared
+    from `Repr-Digest` (RFC 9530), `Digest` (RFC 3230) or `x-amz-checksum-sha256`, valid for range responses too
+    """
+
+    values = []
+    for name in ["Repr-Digest", "Digest"]:
+        for item in headers.get(name, "").split(","):
+            algorithm, _, value = item.strip().partition("=")
+            if algorithm.lower() == "sha-256":
+                values.append(value.strip(":"))
+    values.append(headers.get("x-amz-checksum-sha256"))
+
+    for value in values:
+        try:
+            digest = base64.b64decode(value, validate = True) if value else b""
+        except ValueError:
+            continue
+        if len(digest) == 32:
+            return digest.hex()
+
+    return None
+
+def get_part_validator(part):
+    """
+    returns the validator (strong ETag, else Last-Modified) of a partial download, None if unknown
+    """
+
+    try:
+        with open(f"{part}.json") as file:
+            validator = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    etag = validator.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+
+    return validator.get("last_modified")
+
+def set_part_validator(part, etag, last_modified):
+    """
+    stores the validators of a partial download next to it
+    """
+
+    with open(f"{part}.json", "w") as file:
+        json.dump({"etag": etag, "last_modified": last_modified}, file)
+
+def remove_part(part):
+    """
+    removes a partial download and its validators
+    """
+
+    for path in [part, f"{part}.json"]:
+        if os.path.exists(path):
+            os.remove(path)
+
+class Mirror:
+    """
+    local mirror of remote files with conditional and resumable downloads
+    a manifest (manifest.json) records the local file, validators (ETag, Last-Modified),
+    size and SHA-256 checksum of every mirrored URL, checked against the checksum declared by the server (if any)
+
+    Parameters
+    ----------
+    path : str, optional
+        mirror directory (default is `MIRROR_DIR`)
+    chunk_size : int, optional
+        download chunk size in bytes (default is 1 MB)
+    timeout : float, optional
+        request timeout in seconds (default is 60)
+    """
+
+    def __init__(self, path = MIRROR_DIR, chunk_size = 2**20, timeout = 60):
+        os.makedirs(path, exist_ok = True)
+        self.path       = path
+        self.chunk_size = chunk_size
+        self.timeout    = timeout
+        self.lock       = threading.Lock()
+        self.manifest   = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as file:
+                self.manifest = json.load(file)
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.path, "manifest.json")
+
+    def get_file(self, url):
+        # Local file name: hash of the URL (unique) and original name (keeps the extension)
+        name = os.path.basename(urllib.parse.urlparse(url).path) or "index"
+        return os.path.join(self.path, f"{hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]}_{name}")
+
+    def save(self):
+        # Atomic manifest update
+        with self.lock:
+            temp = f"{self.manifest_path}.{threading.get_ident()}.tmp"
+            with open(temp, "w") as file:
+                json.dump(self.manifest, file, indent = 1, sort_keys = True)
+            os.replace(temp, self.manifest_path)
+
+    def get(self, url, ttl = None, retries = 3):
+        """
+        returns the local path of a remote file, downloading it only if it changed upstream
+
+        Parameters
+        ----------
+        url : str
+            remote file URL
+        ttl : float, optional
+            seconds during which a mirrored file is used without revalidation (default is None, always revalidate)
+        retries : int, optional
+            number of attempts, interrupted downloads resume where they stopped (default is 3)
+
+        Returns
+        ----------
+        str
+            local path of the file
+        """
+
+        file  = self.get_file(url)
+        entry = self.manifest.get(url)
+        local = entry is not None and os.path.exists(file) and os.path.getsize(file) == entry["size"]
+
+        # Fresh enough
+        if local and ttl is not None and time.time() - entry["checked"] < ttl:
+            return file
+
+        for attempt in range(retries):
+            try:
+                return self.download(url, file, entry if local else None)
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError,
+                    urllib3.exceptions.HTTPError, IOError) as error:
+                # Client errors other than rate limit are not retried (HTTPError is an IOError)
+                status = error.response.status_code if isinstance(error, requests.HTTPError) and error.response is not None else None
+                if attempt == retries - 1 or (status is not None and status < 500 and status != 429):
+                    raise
+                time.sleep(2 ** attempt)
+
+    def download(self, url, file, entry = None):
+        # Conditional request for mirrored files, range request for partial downloads
+        # bytes are stored as sent (no content decoding), so sizes match Content-Length/Content-Range
+        part    = f"{file}.part"
+        headers = {"Accept-Encoding": "identity"}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        elif os.path.exists(part):
+            # Resume only if the partial file has a validator, If-Range restarts the download if the file changed
+            validator = get_part_validator(part)
+            if validator is not None:
+                headers["Range"]    = f"bytes={os.path.getsize(part)}-"
+                headers["If-Range"] = validator
+
+        with requests.get(url, headers = headers, stream = True, timeout = self.timeout) as response:
+            # Not modified
+            if response.status_code == 304:
+                with self.lock:
+                    self.manifest[url]["checked"] = time.time()
+                self.save()
+                return file
+
+            # Partial file longer than the remote file: start over on the next attempt
+            if response.status_code == 416 and "Range" in headers:
+                remove_part(part)
+                raise IOError(f"partial download of {url} does not match the remote file, restarting")
+
+            response.raise_for_status()
+
+            # Resume (206) or start over (200, the server ignored the range or the file changed)
+            mode = "ab" if response.status_code == 206 else "wb"
+            if mode == "wb":
+                set_part_validator(part, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+            with open(part, mode) as handle:
+                for chunk in response.raw.stream(self.chunk_size, decode_content = False):
+                    handle.write(chunk)
+
+            # Complete download
+            size = os.path.getsize(part)
+            if "Content-Range" in response.headers:
+                total = response.headers["Content-Range"].split("/")[-1]
+            else:
+                total = response.headers.get("Content-Length", "*")
+            if total != "*" and int(total) != size:
+                raise IOError(f"incomplete download of {url}: {size} of {total} bytes")
+
+            # Checksum of the whole file, including resumed downloads, against the one declared by the server
+            sha256   = get_sha256(part, self.chunk_size)
+            declared = get_declared_sha256(response.headers)
+            if declared is not None and declared != sha256:
+                remove_part(part)
+                raise IOError(f"checksum mismatch of {url}{' (resumed download)' if mode == 'ab' else ''}: "
+                              f"{sha256} instead of {declared}")
+
+            etag          = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+        os.replace(part, file)
+        remove_part(part)
+
+        # Manifest
+        with self.lock:
+            self.manifest[url] = {"file"         : os.path.basename(file),
+                                  "etag"         : etag,
+                                  "last_modified": last_modified,
+                                  "size"         : size,
+                                  "sha256"       : sha256,
+                                  "checked"      : time.time()}
+        self.save()
+
+        return file
+
+    def verify(self, url):
+        """
+        checks a mirrored file against the size and checksum in the manifest
+        """
+
+        entry = self.manifest.get(url)
+        file  = self.get_file(url)
+        if entry is None or not os.path.exists(file) or os.path.getsize(file) != entry["size"]:
+            return False
+
+        return get_sha256(file, self.chunk_size) == entry["sha256"]
+
+    def delete(self, url):
+        """
+        removes a mirrored file and its manifest entry (explicit invalidation)
+        """
+
+        file = self.get_file(url)
+        for path in [file, f"{file}.part", f"{file}.part.json"]:
+            if os.path.exists(path):
+                os.remove(path)
+        with self.lock:
+            self.manifest.pop(url, None)
+        self.save()
+
+    def __contains__(self, url):
+        return url in self.manifest and os.path.exists(self.get_file(url))